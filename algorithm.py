@@ -1,19 +1,39 @@
 # ==============================================================
 # Algorithme A* (Altération de : https://www.datacamp.com/fr/tutorial/a-star-algorithm?dc_referrer=https%3A%2F%2Fwww.google.com%2F)
 # Développé par D. MELOCCO
-# Dernière modification : 14/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
-from typing import List, Tuple, Dict
+from typing import BinaryIO, Callable, Iterator, List, Tuple, Union, Optional, Sequence
+from collections import OrderedDict
+from contextlib import contextmanager
+from array import array # Tampons plats (scores g, parents) indexés par case
 import numpy as np
-import matplotlib.pyplot as plt
-from math import sqrt
+from math import sqrt, inf
 import json # Sauvegarder les données en format .json
+import os
+import uuid # Noms des fichiers temporaires (voir replace_file)
+import zipfile # Erreurs de lecture des tables de repères (.npz)
 import heapq # Queue prioritaire pour explorer les meilleurs chemins en premier.
-from itertools import (
-    count, # Évite la comparaison directe des dictionnaires nativement
-    permutations # Teste tous les ordres possibles (brute force)
-)
+from itertools import permutations # Teste tous les ordres possibles (brute force)
+import ordering # Choix de l'ordre de passage (Held-Karp, branch and bound, 2-opt)
+from products import ProductIndex, normalize_name # Emplacements des produits par nom normalisé
+from cells import type_code # Codes des types de cases
+import planbin # Plans au format binaire .mtp
+
+# Déplacements possibles (8 directions), dans l'ordre historique d'exploration
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1),
+              (0, 1), (1, -1), (1, 0), (1, 1)]
+
+# Champs de distances conservés par grille (au plus MAX_CACHED_FIELDS, dans FIELD_CACHE_BYTES)
+MAX_CACHED_FIELDS = 64
+FIELD_CACHE_BYTES = 256 * 1024 * 1024
+FIELD_BYTES_PER_CELL = 8 + 8 + 1 # Distance (double), prédécesseur (long) et case fixée (octet)
+
+# Repères de l'heuristique ALT (voir Landmarks)
+MAX_LANDMARKS = 8 # Repères retenus par plan (4 octets par case chacun)
+SEED_LANDMARKS = 6 # Repères imposés (entrée, coins, caisses), les autres sont les cases les plus éloignées
+ACTIVE_LANDMARKS = 4 # Repères consultés par recherche (les plus informatifs pour le trajet)
 
 def calculate_heuristic(pos1: Tuple[int, int], pos2: Tuple[int, int]) -> float:
     """Distance entre deux points"""
@@ -33,21 +53,155 @@ def calculate_total_distance(path: List[Tuple[int, int]], cell_size: float = 1.0
 def get_valid_neighbors(grid: np.ndarray, position: Tuple[int, int]) -> List[Tuple[int, int]]:
     """Obtient les prochains positions possibles"""
     x, y = position
-    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1),
-                  (0, 1), (1, -1), (1, 0), (1, 1)]
     neighbors = []
-    for dx, dy in directions:
+    for dx, dy in DIRECTIONS:
         nx, ny = x + dx, y + dy
         if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1] and grid[nx, ny] == 0:
             neighbors.append((nx, ny))
     return neighbors
 
-def reconstruct_path(node: Dict) -> List[Tuple[int, int]]:
-    """Construction du parcours"""
+# ==============================================================
+# Grille aplatie pour la recherche A*
+# ==============================================================
+class SearchGrid:
+    """Grille d'obstacles aplatie en tampon contigu pour l'algorithme A*.
+
+    Chaque case est repérée par un indice entier ``(row + 1) * stride + (col + 1)``
+    où ``stride = width + 2`` : la grille est entourée d'une bordure d'obstacles,
+    ce qui supprime tout test de limites lors du parcours des voisins.
+
+    Le masque peut aussi être lu directement dans un fichier projeté en mémoire
+    (voir save_obstacle_grid et open_obstacle_grid) : les très grands plans ne
+    sont alors pas chargés en RAM et plusieurs processus partagent les mêmes pages.
+    """
+
+    def __init__(self, grid: np.ndarray):
+        """Construit le masque d'obstacles et la table des voisins.
+
+        Args:
+            grid (np.ndarray): le quadrillage du magasin (0 = libre, sinon obstacle)
+        """
+        self._setup(padded_obstacles(grid))
+        self.grid = grid
+
+    @classmethod
+    def from_padded(cls, padded: np.ndarray) -> "SearchGrid":
+        """Grille construite sur un masque déjà bordé (uint8, 1 = obstacle), sans copie.
+
+        Args:
+            padded (np.ndarray): masque de (hauteur + 2) x (largeur + 2) cases, éventuellement
+                un numpy.memmap (voir open_obstacle_grid)
+        """
+        search = cls.__new__(cls)
+        search._setup(padded)
+        return search
+
+    def _setup(self, padded: np.ndarray) -> None:
+        """Initialise la grille sur le masque bordé ``padded``."""
+        self.padded = padded
+        self.grid = padded[1:-1, 1:-1] # Vue sur le quadrillage (0 = libre)
+        self.height, self.width = self.grid.shape
+        self.stride = self.width + 2
+        # Indexer une memoryview d'octets est aussi rapide qu'un bytearray
+        self.blocked = memoryview(np.ascontiguousarray(padded).reshape(-1)) # 1 = obstacle ou bordure
+        self.size = len(self.blocked)
+        # Décalage d'indice et coût de chaque déplacement
+        self.neighbor_offsets = tuple(
+            (dx * self.stride + dy, sqrt(dx * dx + dy * dy)) for dx, dy in DIRECTIONS
+        )
+        self._fields = OrderedDict() # Champs de distances déjà calculés (LRU)
+        # Chaque champ occupe FIELD_BYTES_PER_CELL octets par case : moins de champs sur les grands plans
+        self.max_fields = max(1, min(MAX_CACHED_FIELDS, FIELD_CACHE_BYTES // (FIELD_BYTES_PER_CELL * self.size)))
+        self.landmarks: Optional["Landmarks"] = None # Tables de distances des repères (heuristique ALT)
+        self.expanded = 0 # Nœuds développés par find_path depuis la création (banc d'essai)
+        self._g_buffers = [] # Tampons de scores g libres (tout à inf), réutilisés par find_path
+
+    def index(self, position: Tuple[int, int]) -> int:
+        """Indice plat d'une case"""
+        return (position[0] + 1) * self.stride + position[1] + 1
+
+    def position(self, index: int) -> Tuple[int, int]:
+        """Coordonnées (ligne, colonne) d'un indice plat"""
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    def distance_field(self, source: Tuple[int, int]) -> "DistanceField":
+        """Renvoie le champ de distances depuis une case, réutilisé s'il existe déjà."""
+        field = self._fields.get(source)
+        if field is None:
+            field = DistanceField(self, source)
+            self._fields[source] = field
+            if len(self._fields) > self.max_fields:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(source)
+        return field
+
+def as_search_grid(grid: Union[np.ndarray, SearchGrid]) -> SearchGrid:
+    """Renvoie la grille aplatie correspondante (sans la recalculer si possible)"""
+    return grid if isinstance(grid, SearchGrid) else SearchGrid(grid)
+
+def padded_obstacles(grid: np.ndarray) -> np.ndarray:
+    """Masque d'obstacles uint8 (1 = obstacle) entouré d'une bordure d'obstacles"""
+    padded = np.ones((grid.shape[0] + 2, grid.shape[1] + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = grid != 0
+    return padded
+
+# ==============================================================
+# Grille d'obstacles sur disque (projetée en mémoire)
+# ==============================================================
+@contextmanager
+def replace_file(path: str) -> Iterator[BinaryIO]:
+    """Écrit un fichier binaire dans un fichier temporaire voisin, puis le met à la place de ``path``.
+
+    Le fichier existant n'est jamais réécrit sur place : les processus qui
+    l'ont projeté en mémoire (voir open_obstacle_grid) gardent l'ancienne
+    version intacte au lieu de lire des pages tronquées. En cas d'erreur, le
+    fichier existant est conservé.
+    """
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp" # Même dossier : os.replace reste atomique
+    try:
+        with open(temp_path, "xb") as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def save_obstacle_grid(path: str, grid: np.ndarray) -> None:
+    """Enregistre le masque d'obstacles bordé au format .npy (1 octet par case).
+
+    Args:
+        path (str): fichier .npy de destination
+        grid (np.ndarray): le quadrillage du magasin (0 = libre, sinon obstacle)
+    """
+    with replace_file(path) as f:
+        np.save(f, padded_obstacles(grid))
+
+def open_obstacle_grid(path: str) -> SearchGrid:
+    """Ouvre une grille d'obstacles enregistrée par save_obstacle_grid, projetée en mémoire.
+
+    Seules les pages parcourues par la recherche sont lues sur le disque ; le
+    fichier est ouvert en lecture seule et ses pages sont partagées entre les
+    processus qui l'ouvrent.
+
+    Raises:
+        ValueError: si le fichier n'est pas un masque d'obstacles valide
+    """
+    padded = np.load(path, mmap_mode="r")
+    if padded.dtype != np.uint8 or padded.ndim != 2 or min(padded.shape) < 2:
+        raise ValueError(f"Grille d'obstacles invalide : {path}")
+    return SearchGrid.from_padded(padded)
+
+def reconstruct_path(entry_cells: array, entry_parents: array, entry: int, search: SearchGrid) -> List[Tuple[int, int]]:
+    """Construction du parcours en remontant les entrées parentes"""
     path = []
-    while node:
-        path.append(node['position'])
-        node = node['parent']
+    while entry != -1:
+        path.append(search.position(entry_cells[entry]))
+        entry = entry_parents[entry]
     return path[::-1]
 
 def load_grid_from_json(json_path: str) -> Tuple[np.ndarray, Tuple[int, int], List[Tuple[int, int]]]:
@@ -60,8 +214,8 @@ def load_grid_from_json(json_path: str) -> Tuple[np.ndarray, Tuple[int, int], Li
     max_row = max(cell["row"] for cell in cells) + 1
     max_col = max(cell["col"] for cell in cells) + 1
 
-    # Créer la matrice correspondante
-    grid = np.zeros((max_row, max_col), dtype=int)
+    # Créer la matrice correspondante (1 octet par case)
+    grid = np.zeros((max_row, max_col), dtype=np.uint8)
     entry = None # Nombre d'entrée
     caisses = [] # Caisses
     for cell in cells:
@@ -75,72 +229,411 @@ def load_grid_from_json(json_path: str) -> Tuple[np.ndarray, Tuple[int, int], Li
             caisses.append((row, col))
     return grid, entry, caisses
 
-def find_nearest_goal(grid: np.ndarray, start: Tuple[int, int], goals: List[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
+def load_grid_from_binary(binary_path: str) -> Tuple[np.ndarray, Tuple[int, int], List[Tuple[int, int]]]:
+    """Charge la grille, la position de l'entrée et la liste des caisses depuis un plan binaire .mtp
+    (même résultat que load_grid_from_json, voir planbin.py)."""
+    store, _ = planbin.read_plan_binary(binary_path, with_objects=False)
+    grid = np.isin(store.types, [type_code("Rayon"), type_code("Mur")]).astype(np.uint8)
+    entries = np.argwhere(store.types == type_code("Entrée"))
+    entry = tuple(entries[-1].tolist()) if len(entries) else None
+    caisses = [tuple(cell) for cell in np.argwhere(store.types == type_code("Caisse")).tolist()]
+    return grid, entry, caisses
+
+def find_nearest_goal(grid: Union[np.ndarray, SearchGrid], start: Tuple[int, int], goals: List[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
     """Trouve le chemin le plus court de l'entrée à la caisse la plus proche."""
+    search = as_search_grid(grid)
     min_path = None
     min_goal = None
     min_len = float('inf')
     for goal in goals:
-        path = find_path(grid, start, goal)
+        path = find_path(search, start, goal)
         if path and len(path) < min_len:
             min_len = len(path)
             min_path = path
             min_goal = goal
     return min_path, min_goal
 
-def find_path(grid: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-    """Exploration de chemin avec l'agorithme A* de l'entrée aux caisses"""
-    open_heap = []
-    counter = count()  # Évite la comparaison directe des dictionnaires nativement
-
-    start_node = {
-        'position': start,
-        'g': 0,
-        'h': calculate_heuristic(start, goal),
-        'f': 0,
-        'parent': None
-    }
-    start_node['f'] = start_node['g'] + start_node['h']
-    heapq.heappush(open_heap, (start_node['f'], next(counter), start_node))
-    visited: Dict[Tuple[int, int], float] = {start: 0}
+def find_path(grid: Union[np.ndarray, SearchGrid], start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Exploration de chemin avec l'agorithme A* de l'entrée aux caisses
+
+    Les scores g sont stockés dans un tampon plat indexé par case, et chaque
+    entrée de la file de priorité n'est qu'un numéro renvoyant vers deux tampons
+    (case, entrée parente) : aucun dictionnaire n'est alloué par nœud exploré.
+    Le tampon des scores g est gardé par la grille : seules les cases touchées
+    (celles de ``entry_cells``) sont remises à inf après la recherche, si bien
+    qu'une recherche courte ne coûte pas une passe sur tout le plan.
+    L'ordre d'exploration (et donc le chemin renvoyé) est identique à l'ancienne
+    version à base de dictionnaires.
+
+    Si des repères sont attachés à la grille (``search.landmarks``, voir
+    Landmarks), l'heuristique est le maximum de la distance à vol d'oiseau et
+    de la borne ALT : bien moins de nœuds sont développés, pour un chemin de
+    même longueur (le tracé peut différer en cas d'égalité).
+    """
+    search = as_search_grid(grid)
+    try:
+        g_scores = search._g_buffers.pop() # Un tampon par recherche en cours (fils de calcul)
+    except IndexError:
+        g_scores = array('d', [inf]) * search.size
+    entry_cells = array('l') # Case de chaque entrée poussée dans la file
+    entry_parents = array('l') # Entrée parente de chaque entrée
+    try:
+        return _find_path(search, g_scores, entry_cells, entry_parents, start, goal)
+    finally:
+        for cell in entry_cells: # Cases touchées : le tampon redevient tout à inf
+            g_scores[cell] = inf
+        search._g_buffers.append(g_scores)
+
+def _find_path(search: SearchGrid, g_scores: array, entry_cells: array, entry_parents: array,
+               start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Boucle de find_path, sur un tampon de scores g tout à inf."""
+    blocked = search.blocked
+    offsets = search.neighbor_offsets
+    stride = search.stride
+    goal_row, goal_col = goal[0] + 1, goal[1] + 1
+
+    start_index = search.index(start)
+    goal_index = search.index(goal)
+    g_scores[start_index] = 0.0
+    entry_cells.append(start_index)
+    entry_parents.append(-1)
+    active, slack = (), 0.0
+    if search.landmarks is not None and not blocked[start_index]: # Départ sur un obstacle : recherche habituelle
+        active = search.landmarks.active(start_index, goal_index)
+        if active is None: # Départ et arrivée dans deux zones séparées : inutile de chercher
+            return []
+        slack = search.landmarks.slack
+    open_heap = [(calculate_heuristic(start, goal), 0, start_index, 0.0)]
+    expanded = 0
 
     while open_heap:
-        _, _, current = heapq.heappop(open_heap)
-        current_pos = current['position']
-
-        if current_pos == goal:
-            return reconstruct_path(current)
-
-        for neighbor_pos in get_valid_neighbors(grid, current_pos):
-            tentative_g = current['g'] + calculate_heuristic(current_pos, neighbor_pos)
-
-            if neighbor_pos not in visited or tentative_g < visited[neighbor_pos]:
-                visited[neighbor_pos] = tentative_g
-                neighbor = {
-                    'position': neighbor_pos,
-                    'g': tentative_g,
-                    'h': calculate_heuristic(neighbor_pos, goal),
-                    'f': tentative_g + calculate_heuristic(neighbor_pos, goal),
-                    'parent': current
-                }
-                heapq.heappush(open_heap, (neighbor['f'], next(counter), neighbor))
-
+        _, entry, current, current_g = heapq.heappop(open_heap)
+        expanded += 1
+        if current == goal_index:
+            search.expanded += expanded
+            return reconstruct_path(entry_cells, entry_parents, entry, search)
+
+        # Une entrée périmée est développée avec son propre score g, comme
+        # auparavant : elle ne pousse en général rien, mais ignorer ces entrées
+        # changerait le chemin retenu en cas d'égalité d'arrondi.
+        for offset, cost in offsets:
+            neighbor = current + offset
+            if blocked[neighbor]:
+                continue
+            tentative_g = current_g + cost
+            if tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                row, col = divmod(neighbor, stride)
+                heuristic = sqrt((goal_row - row)**2 + (goal_col - col)**2)
+                for table, goal_distance in active:
+                    bound = table[neighbor] - goal_distance
+                    if bound < 0.0:
+                        bound = -bound
+                    if bound - slack > heuristic:
+                        heuristic = bound - slack
+                heapq.heappush(open_heap, (
+                    tentative_g + heuristic,
+                    len(entry_cells), neighbor, tentative_g
+                ))
+                entry_cells.append(neighbor)
+                entry_parents.append(entry)
+
+    search.expanded += expanded
     return []
 
+# ==============================================================
+# Distances réelles entre points (une propagation par point)
+# ==============================================================
+class DistanceField:
+    """Propagation de Dijkstra depuis une case, reprise à la demande.
+
+    La propagation s'arrête dès que les cases demandées sont atteintes et
+    reprend là où elle s'était arrêtée si d'autres cases sont demandées
+    ensuite. L'arbre des prédécesseurs permet de rendre le chemin vers
+    n'importe quelle case atteinte sans relancer de recherche.
+    """
+
+    def __init__(self, search: SearchGrid, source: Tuple[int, int]):
+        """Prépare la propagation depuis ``source``."""
+        self.search = search
+        self.source = source
+        self.distances = array('d', [inf]) * search.size
+        self.parents = array('l', [-1]) * search.size
+        self.settled = bytearray(search.size)
+        source_index = search.index(source)
+        self.distances[source_index] = 0.0
+        self._heap = [(0.0, source_index)]
+
+    def expand_until(self, targets: Sequence[Tuple[int, int]]) -> None:
+        """Poursuit la propagation jusqu'à fixer la distance de toutes les cases demandées."""
+        search = self.search
+        settled = self.settled
+        remaining = {search.index(t) for t in targets}
+        remaining = {index for index in remaining if not settled[index]}
+        if remaining:
+            self._expand(remaining)
+
+    def expand_all(self) -> None:
+        """Poursuit la propagation jusqu'à toutes les cases accessibles."""
+        self._expand(None)
+
+    def _expand(self, remaining: Optional[set]) -> None:
+        """Propage jusqu'à fixer les cases de ``remaining`` (toutes les cases si None)."""
+        search = self.search
+        settled = self.settled
+        blocked = search.blocked
+        offsets = search.neighbor_offsets
+        distances = self.distances
+        parents = self.parents
+        heap = self._heap
+        while heap and (remaining is None or remaining):
+            dist, current = heapq.heappop(heap)
+            if settled[current]:
+                continue
+            settled[current] = 1
+            if remaining is not None:
+                remaining.discard(current)
+            for offset, cost in offsets:
+                neighbor = current + offset
+                if blocked[neighbor]:
+                    continue
+                tentative = dist + cost
+                if tentative < distances[neighbor]:
+                    distances[neighbor] = tentative
+                    parents[neighbor] = current
+                    heapq.heappush(heap, (tentative, neighbor))
+
+    def distance(self, target: Tuple[int, int]) -> float:
+        """Distance de marche jusqu'à ``target`` (inf si inaccessible)"""
+        self.expand_until([target])
+        return self.distances[self.search.index(target)]
+
+    def path_to(self, target: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Chemin depuis la source jusqu'à ``target`` (vide si inaccessible)"""
+        if self.distance(target) == inf:
+            return []
+        path = []
+        index = self.search.index(target)
+        while index != -1:
+            path.append(self.search.position(index))
+            index = self.parents[index]
+        return path[::-1]
+
+class DistanceMatrix:
+    """Matrice des distances de marche entre l'entrée, les articles et les caisses.
+
+    Seules les ``sources`` sont propagées (une propagation par point) ; les
+    ``targets`` (les caisses) ne sont que des arrivées, leurs lignes sont
+    obtenues par symétrie. Les distances entre deux arrivées valent inf.
+    """
+
+    def __init__(self, grid: Union[np.ndarray, SearchGrid], sources: List[Tuple[int, int]],
+                 targets: List[Tuple[int, int]] = (), progress: Optional[Callable[[int, int], None]] = None):
+        """Calcule la matrice des distances.
+
+        Args:
+            grid (np.ndarray | SearchGrid): le quadrillage du magasin
+            sources (List[Tuple[int, int]]): les points de départ possibles (entrée, articles)
+            targets (List[Tuple[int, int]], optional): les points d'arrivée seulement (caisses)
+            progress (Callable[[int, int], None], optional): appelée après chaque propagation
+                avec (propagations terminées, total) ; une exception levée interrompt le calcul
+        """
+        search = as_search_grid(grid)
+        self.points = list(sources) + list(targets)
+        self.n_sources = len(sources)
+        self.fields = [search.distance_field(source) for source in sources]
+        size = len(self.points)
+        self.distances = np.full((size, size), inf)
+        for i, field in enumerate(self.fields):
+            field.expand_until(self.points)
+            for j, point in enumerate(self.points):
+                self.distances[i, j] = field.distance(point)
+            if progress is not None:
+                progress(i + 1, self.n_sources)
+        self.distances[self.n_sources:, :self.n_sources] = self.distances[:self.n_sources, self.n_sources:].T
+
+    def distance(self, i: int, j: int) -> float:
+        """Distance de marche entre les points d'indices ``i`` et ``j``"""
+        return self.distances[i, j]
+
+    def segment(self, i: int, j: int) -> List[Tuple[int, int]]:
+        """Chemin entre les points d'indices ``i`` et ``j``, tiré des arbres de prédécesseurs"""
+        if i < self.n_sources:
+            return self.fields[i].path_to(self.points[j])
+        if j < self.n_sources:
+            return self.fields[j].path_to(self.points[i])[::-1]
+        return []
+
+    def full_path(self, order: List[int]) -> List[Tuple[int, int]]:
+        """Parcours complet passant par les points dans l'ordre donné (vide si impossible)"""
+        full_path = []
+        for i in range(len(order) - 1):
+            segment = self.segment(order[i], order[i + 1])
+            if not segment:
+                print(f"Pas de chemin entre {self.points[order[i]]} et {self.points[order[i + 1]]}")
+                return []
+            full_path.extend(segment if i == 0 else segment[1:])
+        return full_path
+
+# ==============================================================
+# Repères (heuristique ALT : A*, Landmarks, inégalité triangulaire)
+# ==============================================================
+class Landmarks:
+    """Distances exactes depuis quelques cases repères, pour guider A*.
+
+    Pour un repère L, l'inégalité triangulaire donne
+    ``|d(L, but) - d(L, n)| <= d(n, but)`` : le maximum sur les repères est
+    une borne inférieure de la distance de marche, bien plus serrée que la
+    distance à vol d'oiseau dans un magasin fait de longs rayons qu'il faut
+    contourner. Les tables sont en float32 (4 octets par case et par repère)
+    et indexées comme SearchGrid (indice plat, bordure comprise) ; les cases
+    inaccessibles valent inf.
+    """
+
+    def __init__(self, points: List[Tuple[int, int]], tables: np.ndarray, fingerprint: Optional[str] = None):
+        """Repères et leurs tables de distances.
+
+        Args:
+            points (List[Tuple[int, int]]): les cases repères
+            tables (np.ndarray): distances float32, une ligne par repère (taille de la grille bordée)
+            fingerprint (str, optional): empreinte du plan dont la grille est issue
+                (voir CompiledPlan.fingerprint), enregistrée avec les tables
+        """
+        self.points = [tuple(point) for point in points]
+        self.fingerprint = fingerprint
+        self.tables = np.ascontiguousarray(tables, dtype=np.float32).reshape(len(self.points), -1)
+        finite = self.tables[np.isfinite(self.tables)]
+        # Marge d'arrondi des float32 (2^-24 relatif par valeur) : la borne reste minorante
+        self.slack = float(finite.max()) * 2.0 ** -22 if finite.size else 0.0
+        self._views = [memoryview(table) for table in self.tables] # Lecture rapide case par case
+
+    @classmethod
+    def build(cls, grid: Union[np.ndarray, SearchGrid], points: List[Tuple[int, int]],
+              count: int = MAX_LANDMARKS) -> "Landmarks":
+        """Calcule les tables de distances (une propagation de Dijkstra complète par repère).
+
+        Les repères donnés sont complétés jusqu'à ``count`` par la case la plus
+        éloignée (à pied) de tous les repères déjà choisis : des repères bien
+        répartis au bout des allées bornent beaucoup mieux les trajets que
+        des repères voisins.
+
+        Args:
+            grid (np.ndarray | SearchGrid): le quadrillage du magasin
+            points (List[Tuple[int, int]]): les premiers repères (voir choose_landmarks)
+            count (int, optional): nombre de repères
+        """
+        search = as_search_grid(grid)
+        def distances(point):
+            field = DistanceField(search, point)
+            field.expand_all()
+            return np.frombuffer(field.distances, dtype=np.float64)
+
+        points = [tuple(point) for point in points][:count]
+        tables = [distances(point) for point in points]
+        if tables and len(points) < count:
+            nearest = np.minimum.reduce(tables) # Distance de chaque case au repère le plus proche
+            nearest[np.isinf(nearest)] = -1.0 # Cases hors d'atteinte des repères : jamais choisies
+            while len(points) < count:
+                farthest = int(np.argmax(nearest))
+                if nearest[farthest] <= 0.0:
+                    break
+                points.append(search.position(farthest))
+                tables.append(distances(points[-1]))
+                np.minimum(nearest, tables[-1], out=nearest)
+        return cls(points, np.array(tables, dtype=np.float32).reshape(len(points), search.size))
+
+    def active(self, start_index: int, goal_index: int) -> Optional[List[Tuple[memoryview, float]]]:
+        """(table, distance à l'arrivée) des repères les plus informatifs pour un trajet.
+
+        Les repères sont classés par la borne qu'ils donnent au départ ; ceux
+        qui n'atteignent pas le départ ou l'arrivée sont ignorés.
+
+        Returns:
+            Optional[List[Tuple[memoryview, float]]]: les repères retenus, ou None si un
+            repère atteint l'un des deux points mais pas l'autre (aucun chemin possible)
+        """
+        candidates = []
+        for view in self._views:
+            start_distance, goal_distance = view[start_index], view[goal_index]
+            if start_distance != inf and goal_distance != inf:
+                candidates.append((abs(start_distance - goal_distance), view, goal_distance))
+            elif start_distance != inf or goal_distance != inf:
+                return None
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [(view, goal_distance) for _, view, goal_distance in candidates[:ACTIVE_LANDMARKS]]
+
+    def save(self, path: str) -> None:
+        """Enregistre les repères au format .npz."""
+        with replace_file(path) as f:
+            np.savez(f, points=np.array(self.points, dtype=np.int32).reshape(-1, 2), tables=self.tables,
+                     fingerprint=np.array(self.fingerprint or ""))
+
+    @classmethod
+    def load(cls, path: str) -> "Landmarks":
+        """Charge des repères enregistrés par save.
+
+        Raises:
+            ValueError: si le fichier n'est pas une table de repères valide
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                points, tables = data["points"], data["tables"]
+                fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else ""
+        except (KeyError, zipfile.BadZipFile) as e:
+            raise ValueError(f"Table de repères invalide : {path} ({e})")
+        if tables.dtype != np.float32 or tables.ndim != 2 or points.shape != (len(tables), 2):
+            raise ValueError(f"Table de repères invalide : {path}")
+        return cls(points.tolist(), tables, fingerprint or None)
+
+def choose_landmarks(grid: Union[np.ndarray, SearchGrid], entry: Optional[Tuple[int, int]] = None,
+                     caisses: List[Tuple[int, int]] = (), count: int = SEED_LANDMARKS) -> List[Tuple[int, int]]:
+    """Choisit les premiers repères : l'entrée, les cases libres les plus proches des quatre
+    coins du plan, puis l'accès aux caisses (Landmarks.build complète ensuite la liste).
+
+    Args:
+        grid (np.ndarray | SearchGrid): le quadrillage du magasin
+        entry (Tuple[int, int], optional): l'entrée
+        caisses (List[Tuple[int, int]], optional): les caisses
+        count (int, optional): nombre maximal de repères
+
+    Returns:
+        List[Tuple[int, int]]: les repères (cases libres, sans doublon)
+    """
+    search = as_search_grid(grid)
+    free = np.argwhere(np.asarray(search.grid) == 0)
+    if not len(free):
+        return []
+    candidates = [entry] if entry is not None else []
+    for corner in ((0, 0), (0, search.width - 1), (search.height - 1, 0), (search.height - 1, search.width - 1)):
+        nearest = np.argmin(((free - corner) ** 2).sum(axis=1))
+        candidates.append(tuple(free[nearest].tolist()))
+    candidates += [caisse if search.grid[caisse] == 0 else find_accessible_neighbor(search.grid, *caisse)
+                   for caisse in caisses]
+
+    points = []
+    for point in candidates:
+        if point is None:
+            continue
+        point = (int(point[0]), int(point[1]))
+        if point not in points and not search.blocked[search.index(point)]:
+            points.append(point)
+    return points[:count]
+
 # ==============================================================
 # Visualisation
 # ==============================================================
-def visualize_path(grid: np.ndarray, path: List[Tuple[int, int]], points: List[Tuple[int, int]], 
-                   cells: list = None):
-    """Visualisation du parcours via un graphique
+def _plot_path(ax, grid: np.ndarray, path: List[Tuple[int, int]], points: List[Tuple[int, int]],
+               cells: list = None):
+    """Dessine le parcours sur des axes matplotlib.
 
     Args:
+        ax (matplotlib.axes.Axes): les axes où dessiner
         grid (np.ndarray): le quadrillage du magasin
         path (List[Tuple[int, int]]): le parcours de l'algorithme A*
-        waypoints (List[Tuple[int, int]]): les points où passe l'algorithme A*
+        points (List[Tuple[int, int]]): les points où passe l'algorithme A*
         cells (list, optional): les cellules (par défaut aucune)
     """
-    plt.figure(figsize=(10, 5))
+    from matplotlib.patches import Rectangle
 
     # Affichage des couleurs
     if cells is not None:
@@ -153,29 +646,61 @@ def visualize_path(grid: np.ndarray, path: List[Tuple[int, int]], points: List[T
         for cell in cells:
             row, col, typ = cell["row"], cell["col"], cell["type"]
             if typ in color_map:
-                plt.gca().add_patch(
-                    plt.Rectangle((col-0.5, row-0.5), 1, 1, color=color_map[typ], alpha=0.7)
-                )
+                ax.add_patch(Rectangle((col-0.5, row-0.5), 1, 1, color=color_map[typ], alpha=0.7))
 
     # Affiche le quadrillage pour les cases libres
-    plt.imshow(grid, cmap='Greys', alpha=0.2)
+    ax.imshow(grid, cmap='Greys', alpha=0.2)
 
     # Affiche le parcours
     if path:
         path = np.array(path)
-        plt.plot(path[:, 1], path[:, 0], 'b-', linewidth=2, label='Parcours')
-        plt.plot(path[0, 1], path[0, 0], 'go', markersize=10, label='Entrée')
-        plt.plot(path[-1, 1], path[-1, 0], 'ro', markersize=10, label='Caisse')
+        ax.plot(path[:, 1], path[:, 0], 'b-', linewidth=2, label='Parcours')
+        ax.plot(path[0, 1], path[0, 0], 'go', markersize=10, label='Entrée')
+        ax.plot(path[-1, 1], path[-1, 0], 'ro', markersize=10, label='Caisse')
     
     # Numérote les points de passage dans l'ordre
     for idx, pt in enumerate(points):
-        plt.text(pt[1], pt[0], str(idx+1), color="black", fontsize=14, fontweight='bold',
-                 ha='center', va='center', bbox=dict(facecolor='white', edgecolor='none', alpha=0.7))
+        ax.text(pt[1], pt[0], str(idx+1), color="black", fontsize=14, fontweight='bold',
+                ha='center', va='center', bbox=dict(facecolor='white', edgecolor='none', alpha=0.7))
+
+    ax.legend(fontsize=10)
+    ax.set_title("Votre parcours")
+
+def visualize_path(grid: np.ndarray, path: List[Tuple[int, int]], points: List[Tuple[int, int]], 
+                   cells: list = None):
+    """Visualisation du parcours via un graphique (débogage : l'application affiche
+    le parcours directement sur le plan, voir GridOverlay.show_path)
 
-    plt.legend(fontsize=10)
-    plt.title("Votre parcours")
+    Args:
+        grid (np.ndarray): le quadrillage du magasin
+        path (List[Tuple[int, int]]): le parcours de l'algorithme A*
+        points (List[Tuple[int, int]]): les points où passe l'algorithme A*
+        cells (list, optional): les cellules (par défaut aucune)
+    """
+    import matplotlib.pyplot as plt # Importé seulement ici : lent à charger et optionnel
+    _, ax = plt.subplots(figsize=(10, 5))
+    _plot_path(ax, grid, path, points, cells)
     plt.show()
 
+def export_path_image(file_path: str, grid: np.ndarray, path: List[Tuple[int, int]],
+                      points: List[Tuple[int, int]], cells: list = None):
+    """Enregistre le graphique du parcours dans un fichier image, sans ouvrir de fenêtre.
+
+    Args:
+        file_path (str): chemin de l'image (le format est déduit de l'extension)
+        grid (np.ndarray): le quadrillage du magasin
+        path (List[Tuple[int, int]]): le parcours de l'algorithme A*
+        points (List[Tuple[int, int]]): les points où passe l'algorithme A*
+        cells (list, optional): les cellules (par défaut aucune)
+
+    Raises:
+        ImportError: si matplotlib n'est pas installé
+    """
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=(10, 5))
+    _plot_path(figure.subplots(), grid, path, points, cells)
+    figure.savefig(file_path, bbox_inches="tight")
+
 def find_full_path(grid: np.ndarray, points: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
     """Trouve le parcours complet
 
@@ -186,70 +711,165 @@ def find_full_path(grid: np.ndarray, points: List[Tuple[int, int]]) -> List[Tupl
     Returns:
         List[Tuple[int, int]]: le parcours de l'algorithme A*
     """
+    search = as_search_grid(grid)
     full_path = []
     for i in range(len(points) - 1):
-        segment = find_path(grid, points[i], points[i + 1])
+        segment = find_path(search, points[i], points[i + 1])
         if not segment:
             print(f"Pas de chemin entre {points[i]} et {points[i+1]}")
             return []
         full_path.extend(segment if i == 0 else segment[1:])
     return full_path
 
-def find_accessible_neighbor(grid: np.ndarray, row: int, col: int):
-    """Renvoie la première case voisine disponible d'un obstacle"""
+def find_accessible_neighbors(grid: np.ndarray, row: int, col: int) -> List[Tuple[int, int]]:
+    """Renvoie toutes les cases voisines disponibles d'un obstacle"""
+    neighbors = []
     for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
         nx, ny = row + dx, col + dy
         if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
             if grid[nx, ny] == 0:
-                return (nx, ny)
-    return None
+                neighbors.append((nx, ny))
+    return neighbors
 
-def find_nearest_accessible_caisse(grid, start, caisses):
-    """Cherche la case libre la plus proche d'une caisse"""
+def find_accessible_neighbor(grid: np.ndarray, row: int, col: int):
+    """Renvoie la première case voisine disponible d'un obstacle"""
+    neighbors = find_accessible_neighbors(grid, row, col)
+    return neighbors[0] if neighbors else None
+
+def find_accessible_caisses(grid, caisses):
+    """Renvoie la case libre permettant d'accéder à chaque caisse accessible"""
     accessibles = []
     for caisse in caisses:
         access = find_accessible_neighbor(grid, caisse[0], caisse[1])
         if access:
             accessibles.append(access)
+    return accessibles
+
+def find_nearest_accessible_caisse(grid, start, caisses):
+    """Cherche la case libre la plus proche d'une caisse"""
+    accessibles = find_accessible_caisses(grid, caisses)
     if not accessibles:
         return None
     path, goal = find_nearest_goal(grid, start, accessibles)
     return goal
 
+def resolve_shopping_candidates(index, shopping_list, grid, allowed_types=("Rayon",), access=None,
+                                substitutions=None):
+    """Cherche, pour chaque article de la liste, toutes les cases libres donnant accès à l'un de ses emplacements.
+
+    Un article est reconnu sans tenir compte de la casse ni des accents, et à
+    une faute de frappe ou un pluriel près s'il n'est pas dans le plan sous
+    ce nom exact (voir ProductIndex.resolve).
+
+    Args:
+        index (ProductIndex): l'index des emplacements des produits
+        shopping_list (List[str]): la liste de courses
+        grid (np.ndarray): le quadrillage du magasin
+        allowed_types (tuple, optional): les types de cases autorisés (rayons, stocks)
+        access (dict, optional): cases d'accès déjà calculées pour chaque emplacement
+        substitutions (list, optional): reçoit (article, produit du plan) pour chaque article
+            reconnu sous un nom approché, à signaler à l'utilisateur
+
+    Returns:
+        Tuple[list, list]: les cases candidates de chaque article trouvé (dans l'ordre
+        du plan) et les articles introuvables ou inaccessibles
+    """
+    groups = []
+    missing = []
+    for item in shopping_list:
+        candidates = []
+        product = index.resolve(item, allowed_types)
+        for row, col in index.locations(product, allowed_types) if product else ():
+            if access is not None and (row, col) in access:
+                neighbors = access[(row, col)]
+            else:
+                neighbors = find_accessible_neighbors(grid, row, col)
+            candidates.extend(point for point in neighbors if point not in candidates)
+        if candidates:
+            groups.append(candidates)
+            if substitutions is not None and product != normalize_name(item):
+                substitutions.append((item, product))
+        else:
+            missing.append(item)
+    return groups, missing
+
+def resolve_shopping_points(index, shopping_list, grid, allowed_types=("Rayon",), access=None):
+    """Comme resolve_shopping_candidates, en ne gardant que le premier accès de chaque article."""
+    groups, missing = resolve_shopping_candidates(index, shopping_list, grid, allowed_types, access)
+    return [candidates[0] for candidates in groups], missing
+
 def find_shopping_points(cells, shopping_list, grid, allowed_types=("Rayon",)):
     """Retourne la liste des coordonnées à visiter pour chaque élément de la liste de courses."""
-    points = []
-    for item in shopping_list:
-        found = False
-        for cell in cells:
-            if cell.get("type") in allowed_types:
-                obj = cell.get("object")
-                if (isinstance(obj, str) and obj.lower() == item.lower()) or \
-                   (isinstance(obj, dict) and obj.get("product", "").lower() == item.lower()):
-                    row, col = cell["row"], cell["col"]
-                    access = find_accessible_neighbor(grid, row, col)
-                    if access:
-                        points.append(access)
-                    else:
-                        print(f"⚠️  Aucun accès libre autour du {cell.get('type').lower()} '{item}' en ({row},{col})")
-                    found = True
-                    break
-        if not found:
-            print(f"⚠️  Article '{item}' introuvable dans le plan.")
+    points, missing = resolve_shopping_points(ProductIndex.from_cells(cells), shopping_list, grid, allowed_types)
+    if missing:
+        print(f"⚠️  Articles introuvables ou inaccessibles dans le plan : {', '.join(missing)}")
     return points
 
-def brute_force(start, points):
-    """Trouve l'ordre optimal pour visiter tous les points (petite liste seulement)."""
+def brute_force(start, points, distance=calculate_heuristic):
+    """Trouve l'ordre optimal pour visiter tous les points (petite liste seulement).
+
+    Args:
+        start: le point de départ
+        points (list): les points à visiter
+        distance (callable, optional): distance entre deux points (à vol d'oiseau par défaut)
+    """
     min_path = None
     min_len = float('inf')
     for perm in permutations(points):
         path = [start] + list(perm)
-        total = sum(calculate_heuristic(path[i], path[i+1]) for i in range(len(path)-1))
+        total = sum(distance(path[i], path[i+1]) for i in range(len(path)-1))
         if total < min_len:
             min_len = total
             min_path = path
     return min_path
 
+def plan_route(grid, entry, shopping_points, caisses, time_budget=ordering.DEFAULT_TIME_BUDGET, progress=None):
+    """Calcule le parcours complet : entrée, articles puis caisse la plus proche.
+
+    Les distances de marche réelles entre tous les points sont calculées une
+    seule fois (une propagation par point) et servent à la fois à choisir
+    l'ordre de passage (voir ordering.py) et à produire les segments du parcours.
+    Un article peut être donné par plusieurs cases candidates (produit présent
+    dans plusieurs rayons) : une seule est visitée, celle qui raccourcit le plus
+    le parcours.
+
+    Args:
+        grid (np.ndarray | SearchGrid): le quadrillage du magasin
+        entry (Tuple[int, int]): l'entrée du magasin
+        shopping_points (list): pour chaque article, sa case ou la liste de ses cases candidates
+        caisses (List[Tuple[int, int]]): les caisses du magasin
+        time_budget (float, optional): temps maximal accordé au choix de l'ordre (secondes)
+        progress (Callable[[int, int], None], optional): suivi du calcul des distances
+            (voir DistanceMatrix)
+
+    Returns:
+        Tuple[list, list, OrderingResult]: les points de passage (None si aucune
+        caisse n'est accessible), le parcours complet (vide si aucun chemin
+        n'existe) et le détail du choix de l'ordre (None si rien n'a été calculé)
+    """
+    search = as_search_grid(grid)
+    accessibles = find_accessible_caisses(search.grid, caisses)
+    candidates = [list(p) if isinstance(p, list) else [p] for p in shopping_points]
+    sources = [entry] + [point for group in candidates for point in group]
+    matrix = DistanceMatrix(search, sources, accessibles, progress)
+
+    # Ne garde que les cases candidates atteignables depuis l'entrée
+    groups = []
+    index = 1
+    for group in candidates:
+        reachable = [i for i in range(index, index + len(group)) if matrix.distance(0, i) != inf]
+        if not reachable:
+            return [entry] + [group[0] for group in candidates], [], None
+        groups.append(reachable)
+        index += len(group)
+    if not accessibles or matrix.distances[0, matrix.n_sources:].min() == inf:
+        return None, [], None
+
+    # Emplacements, ordre de passage et caisse d'arrivée, sur les distances de marche
+    result = ordering.solve_group_order(matrix.distances, matrix.n_sources, groups, time_budget)
+    full_points = [matrix.points[i] for i in result.order]
+    return full_points, matrix.full_path(result.order), result
+
 # ==============================================================
 # Débogage avec un exemple
 # ==============================================================
@@ -268,33 +888,11 @@ if __name__ == "__main__":
         print("Aucun article de la liste trouvé dans le plan.")
         exit(1)
 
-    # 2. Trouver l'ordre optimal (brute force si peu d'articles)
-    if len(shopping_points) <= 5:
-        ordered_points = brute_force(entry, shopping_points)[1:]  # sans le départ
-    else:
-        # Heuristique : ordre du plus proche à chaque étape
-        ordered_points = []
-        current = entry
-        remaining = shopping_points.copy()
-        while remaining:
-            next_point = min(remaining, key=lambda p: calculate_heuristic(current, p))
-            ordered_points.append(next_point)
-            remaining.remove(next_point)
-            current = next_point
-
-    # 3. Ajouter la caisse la plus proche à la fin
-    if ordered_points:
-        last_point = ordered_points[-1]
-    else:
-        last_point = entry
-    nearest_accessible_caisse = find_nearest_accessible_caisse(grid, last_point, caisses)
-    if nearest_accessible_caisse is None:
+    # 2. Ordre optimal, caisse la plus proche et parcours complet
+    full_points, full_path, result = plan_route(grid, entry, shopping_points, caisses)
+    if full_points is None:
         print("Aucune caisse accessible trouvée.")
         exit(1)
-    full_points = [entry] + ordered_points + [nearest_accessible_caisse]
-
-    # 4. Calculer le chemin complet
-    full_path = find_full_path(grid, full_points)
     
     # Débogage
     print("Entrée :", entry)
@@ -305,6 +903,7 @@ if __name__ == "__main__":
         print(f"Chemin optimisé trouvé ({len(full_path)} étapes).")
         total_distance = calculate_total_distance(full_path)
         print(f"Distance totale du chemin : {total_distance:.2f} mètres")
+        print(f"Ordre choisi par {result.method} (écart à la borne : {result.gap:.1%})")
         visualize_path(grid, full_path, full_points, cells)
     else:
         print("Aucun chemin trouvé :(")
\ No newline at end of file
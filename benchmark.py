@@ -0,0 +1,205 @@
+# ==============================================================
+# Banc d'essai de l'algorithme A*
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Compare le moteur A* à tampons plats de algorithm.py à l'ancienne
+# implémentation (un dictionnaire par nœud) sur le plan json/plan_complet.json
+# et sur des plans synthétiques de 500x500 cases, puis mesure le gain de
+# distance apporté par le choix du rayon quand un produit est à plusieurs
+# endroits.
+#
+# Chaque plan est aussi parcouru avec l'heuristique ALT (tables des repères,
+# voir algorithm.Landmarks) : le banc d'essai compte les nœuds développés
+# avec et sans repères et vérifie que les chemins ont la même longueur.
+#
+# Utilisation : python benchmark.py [--taille 500] [--requetes 5]
+
+import argparse
+import heapq
+import random
+import time
+from itertools import count
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import algorithm
+from products import ProductIndex
+
+# ==============================================================
+# Ancienne implémentation (référence)
+# ==============================================================
+def legacy_reconstruct_path(node: Dict) -> List[Tuple[int, int]]:
+    """Construction du parcours (ancienne version)"""
+    path = []
+    while node:
+        path.append(node['position'])
+        node = node['parent']
+    return path[::-1]
+
+def legacy_find_path(grid: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """A* avec un dictionnaire par nœud exploré (ancienne version)"""
+    open_heap = []
+    counter = count()
+    start_node = {
+        'position': start,
+        'g': 0,
+        'h': algorithm.calculate_heuristic(start, goal),
+        'f': 0,
+        'parent': None
+    }
+    start_node['f'] = start_node['g'] + start_node['h']
+    heapq.heappush(open_heap, (start_node['f'], next(counter), start_node))
+    visited: Dict[Tuple[int, int], float] = {start: 0}
+
+    while open_heap:
+        _, _, current = heapq.heappop(open_heap)
+        current_pos = current['position']
+        if current_pos == goal:
+            return legacy_reconstruct_path(current)
+        for neighbor_pos in algorithm.get_valid_neighbors(grid, current_pos):
+            tentative_g = current['g'] + algorithm.calculate_heuristic(current_pos, neighbor_pos)
+            if neighbor_pos not in visited or tentative_g < visited[neighbor_pos]:
+                visited[neighbor_pos] = tentative_g
+                neighbor = {
+                    'position': neighbor_pos,
+                    'g': tentative_g,
+                    'h': algorithm.calculate_heuristic(neighbor_pos, goal),
+                    'f': tentative_g + algorithm.calculate_heuristic(neighbor_pos, goal),
+                    'parent': current
+                }
+                heapq.heappush(open_heap, (neighbor['f'], next(counter), neighbor))
+    return []
+
+# ==============================================================
+# Plans de test
+# ==============================================================
+def synthetic_grid(size: int, seed: int, aisles: bool) -> np.ndarray:
+    """Génère un plan synthétique : rayons parallèles ou obstacles aléatoires."""
+    rng = np.random.default_rng(seed)
+    if aisles:
+        # Rayons horizontaux percés d'allées transversales, comme un hypermarché
+        grid = np.zeros((size, size), dtype=int)
+        for row in range(2, size - 2, 4):
+            grid[row, 1:size - 1] = 1
+            for gap in rng.choice(size - 2, size // 25, replace=False):
+                grid[row, gap + 1] = 0
+        return grid
+    return (rng.random((size, size)) < 0.25).astype(int)
+
+def free_cells(grid: np.ndarray) -> List[Tuple[int, int]]:
+    """Liste des cases libres du plan."""
+    rows, cols = np.nonzero(grid == 0)
+    return list(zip(rows.tolist(), cols.tolist()))
+
+def random_queries(grid: np.ndarray, n: int, seed: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Tire des couples (départ, arrivée) parmi les cases libres."""
+    rng = random.Random(seed)
+    cells = free_cells(grid)
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(n)]
+
+# ==============================================================
+# Mesures
+# ==============================================================
+def run(name: str, grid: np.ndarray, queries, entry: Tuple[int, int] = None,
+        caisses: List[Tuple[int, int]] = ()) -> None:
+    """Chronomètre les deux implémentations et vérifie qu'elles donnent les mêmes chemins,
+    puis compare A* avec et sans repères (heuristique ALT)."""
+    legacy_time = 0.0
+    new_time = 0.0
+    search = algorithm.SearchGrid(grid)
+    paths = []
+    for start, goal in queries:
+        t0 = time.perf_counter()
+        expected = legacy_find_path(grid, start, goal)
+        t1 = time.perf_counter()
+        path = algorithm.find_path(search, start, goal)
+        t2 = time.perf_counter()
+        legacy_time += t1 - t0
+        new_time += t2 - t1
+        if path != expected:
+            raise AssertionError(f"{name} : chemins différents entre {start} et {goal}")
+        paths.append(path)
+    speedup = legacy_time / new_time if new_time else float('inf')
+    print(f"{name:<28} {len(queries):>4} requêtes  "
+          f"ancien {legacy_time * 1000:9.1f} ms  nouveau {new_time * 1000:9.1f} ms  x{speedup:.1f}")
+
+    # Mêmes requêtes guidées par les repères
+    alt_search = algorithm.SearchGrid(grid)
+    t0 = time.perf_counter()
+    alt_search.landmarks = algorithm.Landmarks.build(alt_search, algorithm.choose_landmarks(alt_search, entry, caisses))
+    build_time = time.perf_counter() - t0
+    alt_time = 0.0
+    for (start, goal), expected in zip(queries, paths):
+        t0 = time.perf_counter()
+        path = algorithm.find_path(alt_search, start, goal)
+        alt_time += time.perf_counter() - t0
+        if bool(path) != bool(expected) or abs(algorithm.calculate_total_distance(path)
+                                               - algorithm.calculate_total_distance(expected)) > 1e-6:
+            raise AssertionError(f"{name} : chemin ALT de longueur différente entre {start} et {goal}")
+    ratio = search.expanded / alt_search.expanded if alt_search.expanded else float('inf')
+    print(f"{'  ALT ' + str(len(alt_search.landmarks.points)) + ' repères':<28} {len(queries):>4} requêtes  "
+          f"tables {build_time * 1000:9.1f} ms  ALT     {alt_time * 1000:9.1f} ms  "
+          f"nœuds {search.expanded} -> {alt_search.expanded} (/{ratio:.1f})")
+
+def run_multi_location(plan_path: str, lists: int, seed: int) -> None:
+    """Compare la distance des parcours avec le premier emplacement trouvé et avec le meilleur emplacement."""
+    import json
+    with open(plan_path, encoding="utf-8") as f:
+        cells = json.load(f)["cells"]
+    grid, entry, caisses = algorithm.load_grid_from_json(plan_path)
+    search = algorithm.SearchGrid(grid)
+
+    # Place 40 produits, chacun dans 1 à 3 rayons (têtes de gondole)
+    rng = random.Random(seed)
+    shelves = [cell for cell in cells if cell["type"] == "Rayon" and algorithm.find_accessible_neighbor(grid, cell["row"], cell["col"])]
+    index = ProductIndex()
+    products = [f"Produit {i}" for i in range(40)]
+    for product in products:
+        for cell in rng.sample(shelves, rng.randint(1, 3)):
+            index.add(product, "Rayon", cell["row"], cell["col"])
+
+    first_total = best_total = 0.0
+    compared = 0
+    for _ in range(lists):
+        shopping_list = rng.sample(products, 6)
+        groups, _ = algorithm.resolve_shopping_candidates(index, shopping_list, grid)
+        first, _ = algorithm.resolve_shopping_points(index, shopping_list, grid)
+        _, first_path, _ = algorithm.plan_route(search, entry, first, caisses)
+        _, best_path, _ = algorithm.plan_route(search, entry, groups, caisses)
+        if not first_path:
+            # Le premier rayon est inaccessible : seul le choix de l'emplacement donne un parcours
+            continue
+        if algorithm.calculate_total_distance(best_path) > algorithm.calculate_total_distance(first_path) + 1e-6:
+            raise AssertionError(f"multi-emplacements : parcours plus long pour {shopping_list}")
+        compared += 1
+        first_total += algorithm.calculate_total_distance(first_path)
+        best_total += algorithm.calculate_total_distance(best_path)
+    compared = max(compared, 1)
+    print(f"{'multi-emplacements':<28} {lists:>4} listes    "
+          f"premier rayon {first_total / compared:7.1f} m  meilleur rayon {best_total / compared:7.1f} m")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'algorithme A*")
+    parser.add_argument("--plan", default="json/plan_complet.json")
+    parser.add_argument("--taille", type=int, default=500, help="côté des plans synthétiques")
+    parser.add_argument("--requetes", type=int, default=5, help="requêtes par plan synthétique")
+    args = parser.parse_args()
+
+    grid, entry, caisses = algorithm.load_grid_from_json(args.plan)
+    plan_queries = random_queries(grid, 200, seed=1)
+    plan_queries += [(entry, algorithm.find_accessible_neighbor(grid, *caisse)) for caisse in caisses]
+    plan_queries = [(start, goal) for start, goal in plan_queries if goal is not None]
+    run(args.plan, grid, plan_queries, entry, caisses)
+
+    for aisles in (False, True):
+        label = "rayons" if aisles else "aléatoire"
+        grid = synthetic_grid(args.taille, seed=42, aisles=aisles)
+        run(f"{args.taille}x{args.taille} {label}", grid, random_queries(grid, args.requetes, seed=2))
+
+    run_multi_location(args.plan, lists=20, seed=3)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# ==============================================================
+# Modèle des cases du plan (types et objets)
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Le type de chaque case est un code dans une grille NumPy uint8
+# (0 = case vide, i + 1 = CELL_TYPES[i]) ; les objets posés sur les rayons
+# et les stocks sont rangés à part, seulement pour les cases qui en ont.
+# Les couleurs ne servent qu'à l'affichage (voir grid.py).
+
+from array import array
+from itertools import count
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+CELL_TYPES = ["Rayon", "Mur", "Caisse", "Entrée", "Stock"] # Types de cases (code = indice + 1)
+SHELF_TYPES = ("Rayon", "Stock") # Types de cases pouvant contenir un produit
+EMPTY = 0 # Code d'une case vide
+
+def type_code(cell_type: str) -> int:
+    """Code d'un type de case (0 s'il est inconnu)."""
+    return CELL_TYPES.index(cell_type) + 1 if cell_type in CELL_TYPES else EMPTY
+
+SHELF_CODES = tuple(type_code(t) for t in SHELF_TYPES)
+
+_store_ids = count(1) # Numéros des modèles créés (jamais réutilisés, contrairement à id())
+
+class CellStore:
+    """Types et objets des cases d'un plan."""
+
+    def __init__(self, rows: int = 0, cols: int = 0):
+        """Initialise un plan vide.
+
+        Args:
+            rows, cols (int, optional): dimensions initiales (la grille s'agrandit au besoin)
+        """
+        self.types = np.zeros((rows, cols), dtype=np.uint8)
+        self.objects: Dict[Tuple[int, int], dict] = {} # (ligne, colonne) -> {"category", "product"}
+        self.uid = next(_store_ids) # Numéro propre à ce modèle dans le processus
+        self.revision = 0 # Incrémenté à chaque modification (invalide les plans compilés)
+
+    def _ensure_shape(self, rows: int, cols: int) -> None:
+        """Agrandit la grille pour contenir rows x cols cases."""
+        if rows <= self.types.shape[0] and cols <= self.types.shape[1]:
+            return
+        self.types = np.pad(self.types, ((0, max(0, rows - self.types.shape[0])),
+                                         (0, max(0, cols - self.types.shape[1]))))
+
+    def code_at(self, row: int, col: int) -> int:
+        """Code du type d'une case (0 si vide ou hors de la grille)."""
+        if 0 <= row < self.types.shape[0] and 0 <= col < self.types.shape[1]:
+            return int(self.types[row, col])
+        return EMPTY
+
+    def type_at(self, row: int, col: int) -> Optional[str]:
+        """Type d'une case, ou None si elle est vide."""
+        code = self.code_at(row, col)
+        return CELL_TYPES[code - 1] if code else None
+
+    def is_shelf(self, row: int, col: int) -> bool:
+        """Indique si la case peut contenir un produit (rayon ou stock)."""
+        return self.code_at(row, col) in SHELF_CODES
+
+    def set_type(self, row: int, col: int, cell_type: Optional[str]) -> None:
+        """Change le type d'une case (None pour l'effacer).
+
+        Les objets ne sont gardés que sur les rayons et les stocks.
+        """
+        if row < 0 or col < 0:
+            return
+        code = type_code(cell_type) if cell_type else EMPTY
+        if code == EMPTY and not (row < self.types.shape[0] and col < self.types.shape[1]):
+            return
+        self._ensure_shape(row + 1, col + 1)
+        self.types[row, col] = code
+        self.revision += 1
+        if code not in SHELF_CODES:
+            self.objects.pop((row, col), None)
+
+    def object_at(self, row: int, col: int) -> Optional[dict]:
+        """Objet posé sur une case, ou None."""
+        return self.objects.get((row, col))
+
+    def set_object(self, row: int, col: int, category: str, product: str) -> None:
+        """Pose un objet sur une case."""
+        self.objects[(row, col)] = {"category": category, "product": product}
+        self.revision += 1
+
+    def count(self, cell_type: str) -> int:
+        """Nombre de cases d'un type."""
+        return int(np.count_nonzero(self.types == type_code(cell_type)))
+
+    def clear(self) -> None:
+        """Efface toutes les cases."""
+        self.types[:] = EMPTY
+        self.objects.clear()
+        self.revision += 1
+
+    def __len__(self) -> int:
+        """Nombre de cases non vides."""
+        return int(np.count_nonzero(self.types))
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str, Optional[dict]]]:
+        """Parcourt les cases non vides (ligne, colonne, type, objet), ligne par ligne."""
+        rows, cols = np.nonzero(self.types)
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            yield row, col, CELL_TYPES[self.types[row, col] - 1], self.objects.get((row, col))
+
+    @classmethod
+    def from_cells(cls, cells: Iterable[dict]) -> "CellStore":
+        """Construit le modèle à partir des cases d'un JSON de quadrillage.
+
+        Les cases sont lues en un seul passage (``cells`` peut être un
+        générateur, voir planjson.PlanJsonReader). Les cases de type inconnu
+        sont ignorées, tout comme les objets hors des rayons et stocks ; un
+        objet donné par son seul nom est rangé dans la catégorie "Autre".
+        """
+        store = cls()
+        rows, cols, codes = array("q"), array("q"), array("B")
+        for cell in cells:
+            code = type_code(cell.get("type"))
+            row, col = cell.get("row", -1), cell.get("col", -1)
+            if code == EMPTY or row < 0 or col < 0:
+                continue
+            rows.append(row)
+            cols.append(col)
+            codes.append(code)
+            obj = cell.get("object")
+            if code not in SHELF_CODES:
+                continue
+            if isinstance(obj, dict):
+                store.set_object(row, col, obj.get("category", "Autre"), obj.get("product", ""))
+            elif obj:
+                store.set_object(row, col, "Autre", obj)
+        if rows:
+            rows, cols = np.frombuffer(rows, dtype=np.int64), np.frombuffer(cols, dtype=np.int64)
+            store._ensure_shape(int(rows.max()) + 1, int(cols.max()) + 1)
+            store.types[rows, cols] = np.frombuffer(codes, dtype=np.uint8)
+        return store
+
+    def iter_cells(self) -> Iterator[dict]:
+        """Cases au format du JSON de quadrillage, une par une (objet seulement pour les rayons et stocks)."""
+        for row, col, cell_type, obj in self:
+            cell = {"row": row, "col": col, "type": cell_type}
+            if cell_type in SHELF_TYPES:
+                cell["object"] = {"category": obj["category"], "product": obj["product"]} if obj else None
+            yield cell
+
+    def to_cells(self) -> List[dict]:
+        """Cases au format du JSON de quadrillage."""
+        return list(self.iter_cells())
@@ -2,7 +2,7 @@
 #
 # Market Tracer - Fenêtre de configuration d'un magasin
 # Développé par Lysandre Pace--Boulnois et David Melocco
-# Dernière modification : 13/06/2025
+# Dernière modification : 18/10/2026
 #
 # ==============================================================
 
@@ -13,17 +13,17 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QFont, QIcon, QPixmap
 from PyQt6.QtCore import Qt, QDate
-import sqlite3
+from models import database
+from models.adminModel import replace_articles
+import json
+import os
 
 # ==============================================================
 # Récupération des données du magasin
 # ==============================================================
 def get_shop_data(user_id):
     """Récupère les données du magasin pour l'utilisateur donné."""
-    conn = sqlite3.connect("market_tracer.db")
-    c = conn.cursor()
-    c.execute("SELECT nom, auteur, date_creation, apropos, chemin, articles_json, plan_json FROM shops WHERE user_id=?", (user_id,))
-    row = c.fetchone()
+    row = database.fetch_one("SELECT nom, auteur, date_creation, apropos, chemin, articles_json, plan_json FROM shops WHERE user_id=?", (user_id,))
     if row:
         shop_data = {
             "nom": row[0] or "",
@@ -36,7 +36,6 @@ def get_shop_data(user_id):
         }
     else:
         shop_data = {}
-    conn.close()
     return shop_data
 
 # ==============================================================
@@ -178,28 +177,39 @@ class ConfigureWindow(QDialog):
         json_path = self.json_input.text()
         plan_json_path = self.plan_json_input.text()
 
-        # Relatif à la base de données
-        import sqlite3
-        conn = sqlite3.connect("market_tracer.db")
-        c = conn.cursor()
-
-        # Vérifier si le magasin existe déjà pour cet utilisateur
-        c.execute("SELECT id FROM shops WHERE user_id=?", (self.user_id,))
-        row = c.fetchone()
-        if row:
-            # Mise à jour
-            c.execute("""
-                UPDATE shops SET nom=?, auteur=?, date_creation=?, apropos=?, chemin=?, articles_json=?, plan_json=?
-                WHERE user_id=?
-            """, (nom, auteur, date, apropos, chemin, json_path, plan_json_path, self.user_id))
-        else:
-            # Insertion
-            c.execute("""
-                INSERT INTO shops (user_id, nom, auteur, date_creation, apropos, chemin, articles_json, plan_json)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (self.user_id, nom, auteur, date, apropos, chemin, json_path, plan_json_path))
-        conn.commit()
-        conn.close()
+        # Relatif à la base de données (une seule transaction)
+        with database.transaction() as conn:
+            c = conn.cursor()
+
+            # Vérifier si le magasin existe déjà pour cet utilisateur
+            c.execute("SELECT id FROM shops WHERE user_id=?", (self.user_id,))
+            row = c.fetchone()
+            if row:
+                # Mise à jour
+                c.execute("""
+                    UPDATE shops SET nom=?, auteur=?, date_creation=?, apropos=?, chemin=?, articles_json=?, plan_json=?
+                    WHERE user_id=?
+                """, (nom, auteur, date, apropos, chemin, json_path, plan_json_path, self.user_id))
+            else:
+                # Insertion
+                c.execute("""
+                    INSERT INTO shops (user_id, nom, auteur, date_creation, apropos, chemin, articles_json, plan_json)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (self.user_id, nom, auteur, date, apropos, chemin, json_path, plan_json_path))
+            shop_id = row[0] if row else c.lastrowid
+
+        # Nouveau fichier d'articles : ses articles remplacent ceux du magasin (repris plus tard
+        # par import_pending_articles s'il n'est pas encore lisible)
+        if json_path != self.shop_data.get("articles_json", ""):
+            database.execute("UPDATE shops SET articles_imported=0 WHERE id=?", (shop_id,))
+            if os.path.isfile(json_path):
+                try:
+                    with open(json_path, encoding="utf-8") as f:
+                        replace_articles(shop_id, json.load(f))
+                    database.execute("UPDATE shops SET articles_imported=1 WHERE id=?", (shop_id,))
+                except (OSError, ValueError, AttributeError) as e:
+                    QMessageBox.warning(self, "Erreur", f"Les articles n'ont pas pu être importés : {e}")
+                    return
 
         self.accept()
 
@@ -1,22 +1,26 @@
 # ==============================================================
 # Contrôleur pour la fenêtre d'administration du gérant
 # Développé par D. MELOCCO, L. PACE--BOULNOIS, S. LECLERCQ-SPETER, N. COLIN
-# Dernière modification : 13/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
-from PyQt6.QtWidgets import QMessageBox, QFileDialog
+from PyQt6.QtWidgets import QMessageBox, QFileDialog, QInputDialog, QProgressDialog, QApplication
+from PyQt6.QtCore import Qt, QTimer
 from models.adminModel import (
-    get_shop_data, update_shop_image, update_articles_json,
-    get_employees_shop_id, get_shop_articles_by_id
+    get_shop_data, update_shop_image, get_employees_shop_id, get_shop_articles_by_id,
+    apply_article_changes, replace_placements
 )
+from models.migrations import import_pending_articles
 from views.adminView import AdminView
 
 from addArticleDialog import AddArticleDialog
 from shopManagerDialog import ShopManagerDialog
 from employeManagerDialog import EmployeManagerDialog
-import json
+from routeWorker import RouteJob, RouteWorker
 import os
 
+DELAI_SAUVEGARDE_MS = 1000 # Délai avant d'enregistrer les modifications d'articles (regroupées)
+
 class AdminController:
     """Contrôleur pour la fenêtre d'administration du gérant"""
     def __init__(self, user_id):
@@ -24,13 +28,22 @@ class AdminController:
         self.user_id = user_id
         self.view = AdminView()
         self.categories = set() # Pour stocker les catégories d'articles
-        self.produit_categorie_map = {} # Pour stocker les produits avec leur catégorie
+        self.route_worker = RouteWorker() # Parcours de test sur le plan en cours d'édition
+        self.shop_id = None # Magasin du gérant (rempli au chargement)
+        self.articles_modifies = {} # (catégorie, article) -> True (ajouté) ou False (retiré), pas encore enregistrés
+        self.minuteur_sauvegarde = QTimer(self.view)
+        self.minuteur_sauvegarde.setSingleShot(True)
+        self.minuteur_sauvegarde.setInterval(DELAI_SAUVEGARDE_MS)
+        self.minuteur_sauvegarde.timeout.connect(self.enregistrer_articles)
+        QApplication.instance().aboutToQuit.connect(self.enregistrer_articles)
+        self.view.fermee.connect(self.fenetre_fermee)
 
         # Connexion des signaux
         self.view.btn_ajouter.clicked.connect(self.ouvrir_dialog_ajout_article)
         self.view.btn_retirer.clicked.connect(self.confirm_remove)
-        self.view.filtre_combo.currentTextChanged.connect(self.filtrer_stocks)
-        self.view.search_input.textChanged.connect(self.rechercher_stocks)
+        self.view.filtre_combo.currentTextChanged.connect(self.view.appliquer_filtre)
+        self.view.search_input.textChanged.connect(lambda _: self.view.stocks_list.search_timer.start())
+        self.view.stocks_list.search_timer.timeout.connect(self.view.appliquer_filtre)
         self.view.btn_ouvrir_image.clicked.connect(self.ouvrir_image_plan)
         self.view.btn_reinitialiser.clicked.connect(self.confirm_reset)
         self.view.btn_exporter.clicked.connect(self.exporter_quadrillage_json)
@@ -43,6 +56,8 @@ class AdminController:
         self.view.menubar.actions()[2].menu().actions()[1].triggered.connect(self.confirm_reset)
         self.view.menubar.actions()[2].menu().actions()[2].triggered.connect(self.exporter_quadrillage_json)
         self.view.menubar.actions()[2].menu().actions()[3].triggered.connect(self.importer_quadrillage_json)
+        self.view.action_tester_parcours.triggered.connect(self.tester_parcours)
+        self.view.grid_overlay.grid_modified.connect(self.annuler_test_parcours)
         self.view.menubar.actions()[3].menu().actions()[0].triggered.connect(self.open_about)
         self.view.menubar.actions()[3].menu().actions()[1].triggered.connect(self.open_help)
         self.view.menubar.actions()[3].menu().actions()[2].triggered.connect(self.open_licence)
@@ -65,15 +80,18 @@ class AdminController:
 
     def load_shop_data(self):
         """Charge les données du magasin et les affiche dans la vue."""
+        self.enregistrer_articles()
         result = get_shop_data(self.user_id)
         
         # Vérifie si les données du magasin ont été récupérées avec succès
         if result:
             articles_json, plan_json, plan_image_path = result
-            # Charge les catégories et les produits depuis le JSON des articles
-            if articles_json and articles_json.endswith('.json') and os.path.isfile(articles_json):
-                with open(articles_json, "r", encoding="utf-8") as f:
-                    articles_json_content = f.read()
+            self.shop_id = get_employees_shop_id(self.user_id)
+            # Fichier d'articles pas encore repris dans la base (absent ou illisible jusqu'ici)
+            import_pending_articles(self.shop_id)
+            # Charge les catégories et les produits depuis la base
+            articles_json_content = get_shop_articles_by_id(self.shop_id)
+            if articles_json_content and articles_json_content != "{}":
                 self.view.afficher_stocks_depuis_json(articles_json_content)
 
             # Charge le plan du magasin
@@ -81,10 +99,11 @@ class AdminController:
                 self.view.grid_overlay.load_image(plan_image_path)
 
             # Charge le quadrillage
-            if plan_json and plan_json.endswith('.json') and os.path.isfile(plan_json):
-                with open(plan_json, "r", encoding="utf-8") as f:
-                    plan_json_content = f.read()
-                self.view.grid_overlay.import_cells_from_json_content(plan_json_content)
+            if plan_json and plan_json.endswith('.mtp') and os.path.isfile(plan_json):
+                self.view.grid_overlay.import_cells_from_binary(plan_json)
+                self.view.slider_grid.setValue(self.view.grid_overlay.grid_size)
+            elif plan_json and plan_json.endswith('.json') and os.path.isfile(plan_json):
+                self.view.grid_overlay.import_cells_from_json(plan_json, self.suivi_progression("Chargement du plan…"))
                 self.view.slider_grid.setValue(self.view.grid_overlay.grid_size)
     
     def set_plan_mode(self, mode):
@@ -112,24 +131,18 @@ class AdminController:
         if dialog.exec():
             nom, categorie = dialog.get_data()
             if nom and categorie:
-                key = f"{categorie.lower()}::{nom.lower()}"
-                if key in self.view.produit_categorie_map:
+                if self.view.contient_produit(categorie, nom):
                     QMessageBox.warning(self.view, "Doublon", f"L'article '{nom}' existe déjà dans la catégorie '{categorie}'.")
                     return
-                self.view.stocks_list.addItem(nom)
-                self.view.produit_categorie_map[key] = (categorie, nom)
-                self.view.categories.add(categorie)
-                self.view.maj_filtre_categories()
-                self.sauvegarder_articles_json()
+                self.view.ajouter_produit(categorie, nom)
+                self.noter_modification_article(categorie, nom, True)
             else:
                 QMessageBox.warning(self.view, "Erreur", "Veuillez remplir tous les champs.")
 
     def confirm_remove(self):
         """Confirme la suppression de l'article sélectionné."""
-        item = self.view.stocks_list.currentItem()
-        
         # Vérifie si un article est sélectionné
-        if not item:
+        if self.view.stocks_list.current_product() is None:
             QMessageBox.warning(self.view, "Aucun article sélectionné", "Veuillez sélectionner un article à retirer.")
             return
 
@@ -141,44 +154,30 @@ class AdminController:
 
     def retirer_article_selectionne(self):
         """Retire l'article sélectionné de la liste des stocks."""
-        item = self.view.stocks_list.currentItem()
-        if not item:
+        produit = self.view.retirer_produit_selectionne()
+        if produit:
+            categorie, nom = produit
+            self.noter_modification_article(categorie, nom, False)
+
+    def noter_modification_article(self, categorie, nom, ajout):
+        """Note l'ajout ou le retrait d'un article ; il sera enregistré avec les suivants.
+
+        Les modifications sont regroupées : elles sont enregistrées ensemble une
+        seconde après la dernière, à la déconnexion ou à la fermeture.
+        """
+        key = (categorie, nom)
+        self.articles_modifies.pop(key, None) # Seule la dernière modification d'un article compte
+        self.articles_modifies[key] = ajout
+        self.minuteur_sauvegarde.start()
+
+    def enregistrer_articles(self):
+        """Enregistre dans la base les modifications d'articles en attente."""
+        self.minuteur_sauvegarde.stop()
+        if not self.articles_modifies or self.shop_id is None:
             return
-        nom = item.text()
-        key_to_remove = None
-        for key, (cat, nom_map) in self.view.produit_categorie_map.items():
-            if nom_map == nom:
-                key_to_remove = key
-                break
-        if key_to_remove:
-            del self.view.produit_categorie_map[key_to_remove]
-            self.view.stocks_list.takeItem(self.view.stocks_list.row(item))
-            self.sauvegarder_articles_json()
-
-    def sauvegarder_articles_json(self):
-        """Sauvegarde les articles et leurs catégories dans un fichier JSON."""
-        data = {}
-        for key, (cat, nom) in self.view.produit_categorie_map.items():
-            data.setdefault(cat, []).append(nom)
-        articles_json_content = json.dumps(data, ensure_ascii=False, indent=2)
-        update_articles_json(self.user_id, articles_json_content)
-
-    def filtrer_stocks(self, categorie):
-        """Filtre les stocks en fonction de la catégorie sélectionnée."""
-        self.view.stocks_list.clear()
-        texte = self.view.search_input.text().lower()
-        for key, (cat, nom) in self.view.produit_categorie_map.items():
-            if (categorie == "Toutes les catégories" or cat.lower() == categorie.lower()) and texte in nom.lower():
-                self.view.stocks_list.addItem(nom)
-
-    def rechercher_stocks(self, texte):
-        """Recherche les stocks en fonction du texte saisi."""
-        texte = texte.lower()
-        categorie = self.view.filtre_combo.currentText()
-        self.view.stocks_list.clear()
-        for key, (cat, nom) in self.view.produit_categorie_map.items():
-            if (categorie == "Toutes les catégories" or cat == categorie) and texte in nom.lower():
-                self.view.stocks_list.addItem(nom)
+        changes = [(categorie, nom, ajout) for (categorie, nom), ajout in self.articles_modifies.items()]
+        self.articles_modifies = {}
+        apply_article_changes(self.shop_id, changes)
 
     def ouvrir_image_plan(self):
         """Ouvre un dialogue pour choisir une image de plan et la charge dans le quadrillage."""
@@ -199,25 +198,60 @@ class AdminController:
         if self.view.grid_overlay.image_item is None:
             QMessageBox.warning(self.view, "Erreur", "Veuillez d'abord charger une image de plan avant d'exporter un JSON.")
             return
-        file_name, _ = QFileDialog.getSaveFileName(self.view, "Exporter en JSON", "", "JSON (*.json)")
+        file_name, filtre = QFileDialog.getSaveFileName(self.view, "Exporter en JSON", "",
+                                                        "JSON (*.json);;JSON compact (*.json);;Plan binaire (*.mtp)")
         if file_name:
-            import io
-            buffer = io.StringIO()
-            self.view.grid_overlay.export_cells_to_json(buffer)
-            with open(file_name, "w", encoding="utf-8") as f:
-                f.write(buffer.getvalue())
-            buffer.close()
-            QMessageBox.information(self.view, "Export", "Exportation réussie !")
+            if filtre.startswith("Plan binaire") or file_name.endswith(".mtp"):
+                reussi = self.view.grid_overlay.export_cells_to_binary(file_name)
+            else:
+                # Écriture directe dans le fichier, case par case
+                compact = filtre.startswith("JSON compact")
+                reussi = self.view.grid_overlay.export_cells_to_json(file_name, compact, self.suivi_progression("Exportation…"))
+            if reussi:
+                self.enregistrer_emplacements()
+                QMessageBox.information(self.view, "Export", "Exportation réussie !")
 
     def importer_quadrillage_json(self):
         """Importe un quadrillage depuis un fichier JSON."""
         if self.view.grid_overlay.image_item is None:
             QMessageBox.warning(self.view, "Erreur", "Veuillez d'abord charger une image de plan avant d'importer un JSON.")
             return
-        file_name, _ = QFileDialog.getOpenFileName(self.view, "Importer JSON", "", "JSON (*.json)")
+        file_name, _ = QFileDialog.getOpenFileName(self.view, "Importer JSON", "", "Plans (*.json *.mtp);;JSON (*.json);;Plan binaire (*.mtp)")
         if file_name:
-            self.view.grid_overlay.import_cells_from_json(file_name)
-            QMessageBox.information(self.view, "Import", "Importation réussie !")
+            if file_name.endswith(".mtp"):
+                reussi = self.view.grid_overlay.import_cells_from_binary(file_name)
+            else:
+                reussi = self.view.grid_overlay.import_cells_from_json(file_name, self.suivi_progression("Importation…"))
+            if reussi:
+                self.view.slider_grid.setValue(self.view.grid_overlay.grid_size)
+                self.enregistrer_emplacements()
+                QMessageBox.information(self.view, "Import", "Importation réussie !")
+            else:
+                QMessageBox.warning(self.view, "Erreur", "Le fichier JSON n'a pas pu être importé.")
+
+    def enregistrer_emplacements(self):
+        """Enregistre dans la base les emplacements des articles du plan affiché (table placements)."""
+        if self.shop_id is None:
+            return
+        self.enregistrer_articles() # Les articles ajoutés entre-temps doivent exister dans la base
+        replace_placements(self.shop_id, self.view.grid_overlay.compiled_plan().cells)
+
+    def suivi_progression(self, titre):
+        """Crée une fenêtre de progression et la fonction de suivi (fait, total) qui la met à jour.
+
+        La fenêtre n'apparaît que si l'opération dure plus d'une demi-seconde.
+        """
+        dialog = QProgressDialog(titre, None, 0, 100, self.view)
+        dialog.setWindowTitle("Market Tracer")
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(500)
+
+        def suivi(fait, total):
+            dialog.setValue(min(100, 100 * fait // total) if total else 0)
+            QApplication.processEvents() # Garde la fenêtre réactive pendant la lecture ou l'écriture
+            if total and fait >= total:
+                dialog.close()
+        return suivi
 
     def ouvrir_configurer_magasin(self):
         """Ouvre la fenêtre de configuration du magasin."""
@@ -237,14 +271,81 @@ class AdminController:
 
     def ouvrir_gestion_magasins(self):
         """Ouvre la fenêtre de gestion des magasins."""
+        self.enregistrer_articles()
         dlg = ShopManagerDialog(self.user_id, self.view)
         if dlg.exec() and hasattr(dlg, "selected_shop_id"):
+            import_pending_articles(dlg.selected_shop_id)
             articles_json = get_shop_articles_by_id(dlg.selected_shop_id)
             if articles_json:
                 self.view.afficher_stocks_depuis_json(articles_json)
 
+    def tester_parcours(self):
+        """Calcule un parcours sur le plan en cours d'édition, sans l'exporter."""
+        grid_overlay = self.view.grid_overlay
+        if grid_overlay.image_item is None:
+            QMessageBox.warning(self.view, "Erreur", "Veuillez d'abord charger une image de plan.")
+            return
+        produit = self.view.stocks_list.current_product()
+        texte, ok = QInputDialog.getText(self.view, "Tester un parcours",
+                                         "Articles à chercher (séparés par des virgules) :",
+                                         text=produit[1] if produit else "")
+        articles = [article.strip() for article in texte.split(",") if article.strip()]
+        if not ok or not articles:
+            return
+
+        # Le plan est compilé directement depuis le modèle de l'éditeur ; ses parcours de test
+        # ne vont pas dans le cache (le plan change à chaque modification)
+        job = RouteJob(grid_overlay.compiled_plan(), articles, ("Rayon", "Stock"), cache=None)
+        job.signals.progress.connect(lambda pourcentage, etape, job=job: self.test_parcours_progression(job, pourcentage, etape))
+        job.signals.finished.connect(lambda resultat, job=job: self.test_parcours_termine(job, resultat))
+        job.signals.failed.connect(lambda message, job=job: self.test_parcours_echoue(job, message))
+        self.route_worker.submit(job)
+
+    def annuler_test_parcours(self):
+        """Annule et efface le parcours de test (le plan a été modifié)."""
+        self.route_worker.cancel()
+        self.view.grid_overlay.clear_path()
+
+    def test_parcours_progression(self, job, pourcentage, etape):
+        """Affiche l'avancement du parcours de test."""
+        if job is self.route_worker.job:
+            self.view.status_bar.setText(f"{etape}… {pourcentage} %")
+
+    def test_parcours_termine(self, job, resultat):
+        """Affiche le parcours de test sur le plan."""
+        if job.is_cancelled():
+            return
+        import algorithm
+        total_distance = algorithm.calculate_total_distance(resultat.full_path)
+        message = f"Parcours de test : {len(resultat.full_path)} étapes, {total_distance:.2f} m."
+        if resultat.rapproches:
+            rapproches = ", ".join(f"{article} → {produit}" for article, produit in resultat.rapproches)
+            message += f" {len(resultat.rapproches)} article(s) rapproché(s) du plan : {rapproches}."
+        if resultat.introuvables:
+            message += f" Introuvables : {', '.join(resultat.introuvables)}."
+        self.view.status_bar.setText(message)
+        self.view.grid_overlay.show_path(resultat.full_path, resultat.full_points)
+
+    def test_parcours_echoue(self, job, message):
+        """Signale l'échec du parcours de test."""
+        if job.is_cancelled():
+            return
+        self.view.status_bar.setText("Échec du parcours de test.")
+        QMessageBox.warning(self.view, "Erreur", message)
+
+    def fenetre_fermee(self):
+        """Enregistre les articles en attente et se détache de l'application (fenêtre fermée) :
+        un contrôleur d'une session terminée n'est plus appelé à la sortie de l'application."""
+        self.enregistrer_articles()
+        self.route_worker.cancel()
+        try:
+            QApplication.instance().aboutToQuit.disconnect(self.enregistrer_articles)
+        except TypeError: # Déjà détaché (fenêtre refermée)
+            pass
+
     def deconnexion(self):
-        """Déconnecte l'utilisateur et ouvre la fenêtre de connexion."""
+        """Déconnecte l'utilisateur et ouvre la fenêtre de connexion
+        (les articles en attente sont enregistrés à la fermeture de la fenêtre)."""
         from controllers.loginController import LoginController
         self.login_controller = LoginController()
         self.login_controller.view.show()
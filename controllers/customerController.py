@@ -1,7 +1,7 @@
 # ==============================================================
 # Contrôleur pour la fenêtre du client
 # Développé par D. MELOCCO
-# Dernière modification : 13/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
 from PyQt6.QtWidgets import QFileDialog, QMessageBox
@@ -9,6 +9,8 @@ from models.customerModel import (
     charger_produits_json, exporter_liste_json, importer_liste_json
 )
 from views.customerView import CustomerView
+from routeWorker import RouteJob, RouteWorker
+from routecache import route_cache
 
 class CustomerController:
     """Contrôleur pour la fenêtre du client"""
@@ -20,6 +22,8 @@ class CustomerController:
         self.shop_id = shop_id
         self.role = role
         self.view.setWindowTitle(f"Market Tracer - {self.role}")
+        self.route_worker = RouteWorker()
+        self.dernier_parcours = None # Dernier parcours affiché (pour l'export en image)
 
         # Connexion des signaux
         self.view.btn_ajouter.clicked.connect(self.ajouter_article)
@@ -27,12 +31,14 @@ class CustomerController:
         self.view.btn_vider_liste.clicked.connect(self.vider_liste)
         self.view.btn_exporter.clicked.connect(self.exporter_liste)
         self.view.btn_importer.clicked.connect(self.importer_liste)
-        self.view.filtre_combo.currentTextChanged.connect(self.view.filtrer_produits)
-        self.view.search_input.textChanged.connect(self.view.rechercher_produits)
+        self.view.filtre_combo.currentTextChanged.connect(self.view.appliquer_filtre)
+        self.view.search_input.textChanged.connect(lambda _: self.view.stocks_list.search_timer.start())
+        self.view.stocks_list.search_timer.timeout.connect(self.view.appliquer_filtre)
         self.view.btn_generer.clicked.connect(self.generer_parcours)
         self.view.btn_deconnexion.clicked.connect(self.deconnexion)
         self.view.menubar.actions()[0].menu().actions()[0].triggered.connect(self.exporter_liste)
         self.view.menubar.actions()[0].menu().actions()[1].triggered.connect(self.importer_liste)
+        self.view.action_exporter_parcours.triggered.connect(self.exporter_parcours)
         self.view.menubar.actions()[1].menu().actions()[0].triggered.connect(self.open_about)
         self.view.menubar.actions()[1].menu().actions()[1].triggered.connect(self.open_help)
         self.view.menubar.actions()[1].menu().actions()[2].triggered.connect(self.open_licence)
@@ -50,6 +56,8 @@ class CustomerController:
 
     def charger_plan(self):
         """Charge le plan du magasin et l'affiche dans la vue."""
+        import os
+        import plan
         from models.adminModel import get_shop_data
         shop_data = get_shop_data(self.shop_id)
 
@@ -58,15 +66,23 @@ class CustomerController:
         if plan_path:
             self.view.grid_overlay.load_image(plan_path)
 
+        # Affiche le quadrillage (le plan compilé est gardé en cache pour les parcours)
+        plan_json = shop_data[1] if shop_data and len(shop_data) > 2 else ""
+        if plan_path and plan_json and os.path.exists(plan_json):
+            compiled = plan.load_plan(plan_json)
+            self.view.grid_overlay.set_cell_store(compiled.to_store(), compiled.grid_size)
+
     def ajouter_article(self):
         """Ajoute l'article sélectionné à la liste de courses."""
-        item = self.view.stocks_list.currentItem()
+        produit = self.view.stocks_list.current_product()
 
         # Vérifie si l'article est sélectionné et s'il n'est pas déjà dans la liste
-        if item and item.text() not in self.liste_courses:
-            self.liste_courses.append(item.text())
-            self.view.courses_list.addItem(item.text())
-            self.view.status_bar.setText(f"Ajouté : {item.text()}")
+        if produit and produit[1] not in self.liste_courses:
+            nom = produit[1]
+            self.annuler_parcours()
+            self.liste_courses.append(nom)
+            self.view.courses_list.addItem(nom)
+            self.view.status_bar.setText(f"Ajouté : {nom}")
 
     def retirer_article(self):
         """Retire l'article sélectionné de la liste de courses."""
@@ -74,14 +90,18 @@ class CustomerController:
 
         # Vérifie si l'article est sélectionné dans la liste de courses
         if item:
+            self.annuler_parcours()
             self.liste_courses.remove(item.text())
             self.view.courses_list.takeItem(self.view.courses_list.row(item))
             self.view.status_bar.setText(f"Retiré : {item.text()}")
 
     def vider_liste(self):
         """Vide la liste de courses."""
+        self.annuler_parcours()
         self.liste_courses.clear()
         self.view.courses_list.clear()
+        self.dernier_parcours = None
+        self.view.grid_overlay.clear_path()
         self.view.status_bar.setText("Liste vidée.")
 
     def exporter_liste(self):
@@ -95,29 +115,32 @@ class CustomerController:
         """Importe une liste de courses depuis un fichier JSON."""
         file_name, _ = QFileDialog.getOpenFileName(self.view, "Importer une liste", "", "JSON (*.json)")
         if file_name:
-            self.liste_courses = importer_liste_json(file_name)
+            self.annuler_parcours()
+            # Chaque article est rapporté au nom du catalogue le plus proche (casse, accents, fautes)
+            self.liste_courses = []
+            corriges = 0
+            for article in importer_liste_json(file_name):
+                produit = self.view.stocks_list.source_model.closest(article)
+                nom = produit[1] if produit else article
+                corriges += nom != article
+                if nom not in self.liste_courses:
+                    self.liste_courses.append(nom)
             self.view.courses_list.clear()
             for article in self.liste_courses:
                 self.view.courses_list.addItem(article)
-            self.view.status_bar.setText("Liste importée.")
+            message = "Liste importée."
+            if corriges:
+                message += f" {corriges} article(s) rapproché(s) du catalogue."
+            self.view.status_bar.setText(message)
 
     def generer_parcours(self):
-        """Génère le parcours optimisé pour la liste de courses."""
+        """Lance le calcul du parcours optimisé pour la liste de courses (en arrière-plan)."""
         import os
-        import sys
-        import importlib.util
 
         if not self.liste_courses:
             QMessageBox.warning(self.view, "Avertissement", "La liste de courses est vide.")
             return
 
-        # Import dynamique de l'algorithme pour éviter les problèmes de dépendances
-        algo_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'algorithm.py'))
-        spec = importlib.util.spec_from_file_location("algorithm", algo_path)
-        algorithm = importlib.util.module_from_spec(spec)
-        sys.modules["algorithm"] = algorithm
-        spec.loader.exec_module(algorithm)
-
         # Récupère le chemin du plan du magasin depuis la base de données
         from models.adminModel import get_shop_data
         shop_data = get_shop_data(self.shop_id)
@@ -126,58 +149,82 @@ class CustomerController:
             QMessageBox.warning(self.view, "Erreur", "Plan du magasin introuvable.")
             return
 
-        # Charge le plan et la liste de courses
-        with open(plan_path, "r", encoding="latin-1") as f:
-            data = algorithm.json.load(f)
-        cells = data["cells"]
-        grid, entry, caisses = algorithm.load_grid_from_json(plan_path)
-
         # Vérifie si l'utilisateur a le droit d'accéder aux stocks ou seulement aux rayons
         if self.role == "Employé":
             allowed_types = ("Rayon", "Stock")
         else:
             allowed_types = ("Rayon",)
 
-        # 1. Trouver les coordonnées des articles de la liste
-        shopping_points = algorithm.find_shopping_points(cells, self.liste_courses, grid, allowed_types)
-        if not shopping_points:
-            QMessageBox.warning(self.view, "Erreur", "Aucun article de la liste trouvé dans le plan.")
+        # Un nouveau clic remplace le calcul en cours au lieu de s'y ajouter
+        job = RouteJob(plan_path, self.liste_courses, allowed_types)
+        job.signals.progress.connect(lambda pourcentage, etape, job=job: self.parcours_progression(job, pourcentage, etape))
+        job.signals.finished.connect(lambda resultat, job=job: self.parcours_termine(job, resultat))
+        job.signals.failed.connect(lambda message, job=job: self.parcours_echoue(job, message))
+        self.route_worker.submit(job)
+
+    def annuler_parcours(self):
+        """Annule le calcul de parcours en cours (la liste de courses a changé)."""
+        if self.route_worker.is_running():
+            self.route_worker.cancel()
+            self.view.status_bar.setText("Calcul du parcours annulé.")
+
+    def parcours_progression(self, job, pourcentage, etape):
+        """Affiche l'avancement du calcul de parcours."""
+        if job is self.route_worker.job:
+            self.view.status_bar.setText(f"{etape}… {pourcentage} %")
+
+    def parcours_termine(self, job, resultat):
+        """Affiche le parcours calculé (ignoré si un calcul plus récent a été lancé)."""
+        import algorithm
+        if job.is_cancelled():
             return
 
-        # 2. Trouver l'ordre optimal (brute force si peu d'articles)
-        if len(shopping_points) <= 5:
-            ordered_points = algorithm.brute_force(entry, shopping_points)[1:]  # sans le départ
-        else:
-            ordered_points = []
-            current = entry
-            remaining = shopping_points.copy()
-            while remaining:
-                next_point = min(remaining, key=lambda p: algorithm.calculate_heuristic(current, p))
-                ordered_points.append(next_point)
-                remaining.remove(next_point)
-                current = next_point
-
-        # 3. Ajouter la caisse la plus proche à la fin
-        last_point = ordered_points[-1] if ordered_points else entry
-        nearest_accessible_caisse = algorithm.find_nearest_accessible_caisse(grid, last_point, caisses)
-        if nearest_accessible_caisse is None:
-            QMessageBox.warning(self.view, "Erreur", "Aucune caisse accessible trouvée.")
+        total_distance = algorithm.calculate_total_distance(resultat.full_path)
+        precision = "optimal" if resultat.ordre.gap == 0 else f"écart ≤ {resultat.ordre.gap:.1%}"
+        origine = ", repris du cache" if resultat.en_cache else ""
+        message = f"Parcours généré ({len(resultat.full_path)} étapes, {total_distance:.2f} m, {precision}{origine})."
+        if resultat.rapproches:
+            rapproches = ", ".join(f"{article} → {produit}" for article, produit in resultat.rapproches)
+            message += f" {len(resultat.rapproches)} article(s) rapproché(s) du plan : {rapproches}."
+        if resultat.introuvables:
+            message += f" Introuvables : {', '.join(resultat.introuvables)}."
+        self.view.status_bar.setText(message)
+        stats = route_cache.stats()
+        self.view.status_bar.setToolTip(
+            f"Cache des parcours : {stats['hits']} repris ({stats['memory_hits']} en mémoire, "
+            f"{stats['stored_hits']} dans la base), {stats['misses']} absents du cache")
+        self.dernier_parcours = resultat
+        self.view.grid_overlay.show_path(resultat.full_path, resultat.full_points)
+
+    def parcours_echoue(self, job, message):
+        """Signale l'échec du calcul de parcours."""
+        if job.is_cancelled():
             return
-        full_points = [entry] + ordered_points + [nearest_accessible_caisse]
-
-        # 4. Calculer le chemin complet
-        full_path = algorithm.find_full_path(grid, full_points)
-
-        if full_path:
-            total_distance = algorithm.calculate_total_distance(full_path)
-            self.view.status_bar.setText(f"Parcours généré ({len(full_path)} étapes, {total_distance:.2f} m).")
-            algorithm.visualize_path(grid, full_path, full_points, cells)
-        else:
-            QMessageBox.warning(self.view, "Erreur", "Aucun chemin trouvé pour cette liste.")
+        self.view.status_bar.setText("Échec du calcul du parcours.")
+        QMessageBox.warning(self.view, "Erreur", message)
+
+    def exporter_parcours(self):
+        """Exporte le dernier parcours généré en image (nécessite matplotlib)."""
+        import algorithm
+        if self.dernier_parcours is None:
+            QMessageBox.warning(self.view, "Avertissement", "Aucun parcours à exporter.")
+            return
+        file_name, _ = QFileDialog.getSaveFileName(self.view, "Exporter le parcours", "", "Image PNG (*.png);;PDF (*.pdf)")
+        if not file_name:
+            return
+        resultat = self.dernier_parcours
+        try:
+            algorithm.export_path_image(file_name, resultat.compiled.grid, resultat.full_path,
+                                        resultat.full_points, resultat.compiled.cells)
+        except ImportError:
+            QMessageBox.warning(self.view, "Erreur", "L'export en image nécessite le module matplotlib.")
+            return
+        self.view.status_bar.setText("Parcours exporté.")
 
     def deconnexion(self):
         """Déconnecte l'utilisateur et ouvre la fenêtre de connexion."""
         from controllers.loginController import LoginController
+        self.route_worker.cancel()
         self.login_controller = LoginController()
         self.login_controller.view.show()
         self.view.close()
@@ -1,10 +1,10 @@
 # ==============================================================
 # Dialogue de gestion des employés
 # Développé par L. PACE--BOULNOIS
-# Dernière modification : 14/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
-import sqlite3
+from models import database
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QListWidget, QHBoxLayout, QPushButton, QMessageBox
 from employeEditDialog import EmployeEditDialog
 
@@ -42,23 +42,15 @@ class EmployeManagerDialog(QDialog):
     def refresh(self):
         """Rafraîchit la liste des employés de la boutique."""
         self.list.clear()
-        conn = sqlite3.connect("market_tracer.db")
-        c = conn.cursor()
-        c.execute("SELECT id, username FROM users WHERE role='Employé' AND shop_id=?", (self.shop_id,))
-        for emp_id, username in c.fetchall():
+        for emp_id, username in database.fetch_all("SELECT id, username FROM users WHERE role='Employé' AND shop_id=?", (self.shop_id,)):
             self.list.addItem(f"{emp_id} - {username}")
-        conn.close()
 
     def add_employee(self):
         """Ajoute un nouvel employé à la boutique."""
         dialog = EmployeEditDialog(parent=self)
         if dialog.exec():
             username, password = dialog.get_data()
-            conn = sqlite3.connect("market_tracer.db")
-            c = conn.cursor()
-            c.execute("INSERT INTO users (username, password, role, shop_id) VALUES (?, ?, 'Employé', ?)", (username, password, self.shop_id))
-            conn.commit()
-            conn.close()
+            database.execute("INSERT INTO users (username, password, role, shop_id) VALUES (?, ?, 'Employé', ?)", (username, password, self.shop_id))
             self.refresh()
 
     def edit_employee(self):
@@ -71,11 +63,7 @@ class EmployeManagerDialog(QDialog):
         dialog = EmployeEditDialog(parent=self)
         if dialog.exec():
             username, password = dialog.get_data()
-            conn = sqlite3.connect("market_tracer.db")
-            c = conn.cursor()
-            c.execute("UPDATE users SET username=?, password=? WHERE id=?", (username, password, emp_id))
-            conn.commit()
-            conn.close()
+            database.execute("UPDATE users SET username=?, password=? WHERE id=?", (username, password, emp_id))
             self.refresh()
 
     def delete_employee(self):
@@ -87,9 +75,5 @@ class EmployeManagerDialog(QDialog):
         emp_id = int(item.text().split(" - ")[0])
         reply = QMessageBox.question(self, "Confirmation", "Supprimer cet employé ?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            conn = sqlite3.connect("market_tracer.db")
-            c = conn.cursor()
-            c.execute("DELETE FROM users WHERE id=?", (emp_id,))
-            conn.commit()
-            conn.close()
+            database.execute("DELETE FROM users WHERE id=?", (emp_id,))
             self.refresh()
\ No newline at end of file
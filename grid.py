@@ -2,20 +2,177 @@
 
 # Market Tracer - Quadrillage (app n°1)
 # Développé par David Melocco et Simon Leclercq-Speter
-# Dernière modification : 13/06/2025
+# Dernière modification : 18/10/2026
 
 # ==============================================================
 
 # Importations
 import sys
 import json
+import numpy as np
+from cells import CELL_TYPES, CellStore
+from planjson import PlanJsonReader, write_plan_json
+from planbin import read_plan_binary, write_plan_binary
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QGraphicsView, QGraphicsScene,
     QGraphicsPixmapItem, QVBoxLayout, QWidget, QSlider, QPushButton, QHBoxLayout,
-    QGroupBox, QMessageBox, QListWidget, QListWidgetItem, QLabel, QToolTip
+    QGroupBox, QMessageBox, QListWidget, QListWidgetItem, QLabel, QToolTip,
+    QGraphicsPathItem, QGraphicsEllipseItem, QGraphicsSimpleTextItem, QGraphicsItem
 )
-from PyQt6.QtGui import QDrag, QPixmap, QFont, QBrush, QPen, QColor
-from PyQt6.QtCore import QMimeData, Qt, QRectF, pyqtSignal
+from PyQt6.QtGui import QDrag, QPixmap, QFont, QBrush, QPen, QColor, QPainterPath, QPainter
+from PyQt6.QtCore import QMimeData, Qt, QRectF, QPointF, QLineF, pyqtSignal
+
+# ==============================================================
+# Cache des émojis
+# ==============================================================
+class EmojiCache:
+    """Images des émojis, rendues une seule fois par (émoji, taille de case, densité de pixels)."""
+
+    def __init__(self):
+        """Initialise un cache vide."""
+        self._pixmaps = {}
+
+    def pixmap(self, emoji, grid_size, device_pixel_ratio=1.0):
+        """Image d'un émoji centré dans une case, nette sur les écrans haute densité.
+
+        Args:
+            emoji (str): l'émoji à afficher
+            grid_size (int): taille des cases en pixels (logiques)
+            device_pixel_ratio (float, optional): densité de pixels de l'écran
+        """
+        key = (emoji, grid_size, device_pixel_ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            side = max(1, round(grid_size * device_pixel_ratio))
+            pixmap = QPixmap(side, side)
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            font = QFont()
+            font.setPixelSize(max(1, int(grid_size * 0.8))) # En pixels : l'émoji tient dans la case
+            painter = QPainter(pixmap)
+            painter.setFont(font)
+            painter.drawText(QRectF(0, 0, grid_size, grid_size), Qt.AlignmentFlag.AlignCenter, emoji)
+            painter.end()
+            self._pixmaps[key] = pixmap
+        return pixmap
+
+    def clear(self):
+        """Vide le cache (changement de taille des cases)."""
+        self._pixmaps.clear()
+
+# ==============================================================
+# Calque des cases et du quadrillage
+# ==============================================================
+class GridLayerItem(QGraphicsItem):
+    """Toutes les cases coloriées, leurs émojis et les lignes du quadrillage en un seul élément.
+
+    Les types des cases sont lus directement dans la grille uint8 du modèle
+    (CellStore) et les émojis dans un second tableau uint8 (0 = aucun) : la
+    mémoire dépend de la taille du plan et non du nombre d'objets Qt. Les
+    couleurs ne sont appliquées qu'au moment de peindre, et seules les cases de
+    la zone exposée sont peintes.
+    """
+
+    def __init__(self, width, height, grid_size, store, colors, emoji_mapping, emoji_cache):
+        """Initialise le calque d'un plan.
+
+        Args:
+            width, height (float): dimensions de l'image en pixels
+            grid_size (int): taille des cases en pixels
+            store (CellStore): le modèle des cases
+            colors (list): couleur de chaque type de case, dans l'ordre de CELL_TYPES
+            emoji_mapping (dict): émoji de chaque catégorie de produit
+            emoji_cache (EmojiCache): images des émojis, partagées entre les calques
+        """
+        super().__init__()
+        self.rect = QRectF(0, 0, width, height)
+        self.grid_size = grid_size
+        self.store = store
+        self.brushes = [QBrush(color) for color in colors] # Pinceaux préparés une fois par type
+        self.emoji_mapping = emoji_mapping
+        self.emoji_texts = list(emoji_mapping.values())
+        self.emoji_cache = emoji_cache
+        self.pen = QPen(Qt.GlobalColor.red)
+        self.pen.setWidth(2)
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption) # Fournit la zone à repeindre
+        self.refresh()
+
+    def _emoji_code(self, obj):
+        """Code de l'émoji d'un objet (0 si aucun)."""
+        emoji = self.emoji_mapping.get(obj["category"], "") if obj else ""
+        return self.emoji_texts.index(emoji) + 1 if emoji else 0
+
+    def refresh(self):
+        """Relit tout le modèle (import d'un plan)."""
+        self.prepareGeometryChange()
+        self._shape = self.store.types.shape
+        self.emojis = np.zeros(self._shape, dtype=np.uint8)
+        for (row, col), obj in self.store.objects.items():
+            if self.store.code_at(row, col):
+                self.emojis[row, col] = self._emoji_code(obj)
+        self.update()
+
+    def refresh_cell(self, row, col):
+        """Relit une case du modèle et ne repeint qu'elle."""
+        if self.store.types.shape != self._shape:
+            self.prepareGeometryChange()
+            self._shape = self.store.types.shape
+            self.emojis = np.pad(self.emojis, ((0, self._shape[0] - self.emojis.shape[0]),
+                                               (0, self._shape[1] - self.emojis.shape[1])))
+        if not (0 <= row < self._shape[0] and 0 <= col < self._shape[1]):
+            return
+        self.emojis[row, col] = self._emoji_code(self.store.object_at(row, col)) if self.store.code_at(row, col) else 0
+        size = self.grid_size
+        self.update(QRectF(col * size - 1, row * size - 1, size + 2, size + 2))
+
+    def boundingRect(self):
+        """Zone couverte par le calque (avec la demi-épaisseur du trait)."""
+        size = self.grid_size
+        cells = QRectF(0, 0, self._shape[1] * size, self._shape[0] * size)
+        return self.rect.united(cells).adjusted(-1, -1, 1, 1)
+
+    def paint(self, painter, option, widget=None):
+        """Peint les cases, les émojis et les lignes qui touchent la zone exposée."""
+        size = self.grid_size
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        row0, col0 = max(0, int(exposed.top() // size)), max(0, int(exposed.left() // size))
+        row1 = min(self._shape[0], int(exposed.bottom() // size) + 1)
+        col1 = min(self._shape[1], int(exposed.right() // size) + 1)
+        types = self.store.types[row0:row1, col0:col1]
+
+        # Cases : une suite de cases voisines de même type sur une ligne = un seul rectangle
+        painter.setPen(Qt.PenStyle.NoPen)
+        for code in np.unique(types):
+            if code == 0:
+                continue
+            mask = np.zeros((types.shape[0], types.shape[1] + 2), dtype=np.int8)
+            mask[:, 1:-1] = types == code
+            edges = np.diff(mask, axis=1)
+            starts, ends = np.nonzero(edges == 1), np.nonzero(edges == -1)
+            painter.setBrush(self.brushes[code - 1])
+            painter.drawRects([QRectF((col0 + start) * size, (row0 + row) * size, (end - start) * size, size)
+                               for row, start, end in zip(starts[0].tolist(), starts[1].tolist(), ends[1].tolist())])
+
+        # Émojis, seulement si les cases sont assez grandes à l'écran
+        if size * option.levelOfDetailFromTransform(painter.worldTransform()) >= 8:
+            emojis = self.emojis[row0:row1, col0:col1]
+            ratio = painter.device().devicePixelRatioF()
+            for row, col in zip(*np.nonzero(emojis)):
+                pixmap = self.emoji_cache.pixmap(self.emoji_texts[emojis[row, col] - 1], size, ratio)
+                painter.drawPixmap(QPointF((col0 + col) * size, (row0 + row) * size), pixmap)
+
+        # Lignes du quadrillage
+        lines = []
+        x = col0 * size
+        while x <= min(exposed.right() + 1, self.rect.width()):
+            lines.append(QLineF(x, max(0, exposed.top()), x, min(exposed.bottom(), self.rect.height())))
+            x += size
+        y = row0 * size
+        while y <= min(exposed.bottom() + 1, self.rect.height()):
+            lines.append(QLineF(max(0, exposed.left()), y, min(exposed.right(), self.rect.width()), y))
+            y += size
+        painter.setPen(self.pen)
+        painter.drawLines(lines)
 
 # ==============================================================
 # Quadrillage avec des cellules colorées
@@ -31,12 +188,22 @@ class GridOverlay(QGraphicsView):
         self.setScene(self.scene)
         self.image_item = None
         self.grid_size = 50
-        self.entrance_number = 0
 
-        self.colored_cells = {}
-        self.objects_in_cells = {}
+        # Modèle des cases (types et objets) ; les couleurs ne servent qu'à l'affichage
+        self.cell_store = CellStore()
         self.setMouseTracking(True)
 
+        # Calque unique des cases coloriées, des émojis et des lignes (voir GridLayerItem)
+        self.grid_layer = None
+        self.emoji_cache = EmojiCache()
+        self._compiled = None # Plan compilé du modèle (voir compiled_plan)
+        self._compiled_key = None
+
+        # Parcours affiché par-dessus le plan (cases traversées, points de passage)
+        self.route_path = []
+        self.route_points = []
+        self.route_item = None
+
         # Coefficient de zoom
         self.zoom_factor = 1.0
 
@@ -95,8 +262,9 @@ class GridOverlay(QGraphicsView):
             return
 
         self.scene.clear()
-        self.colored_cells.clear()
-        self.objects_in_cells.clear()
+        self.route_item = None
+        self.grid_layer = None
+        self.cell_store.clear()
 
         # Créer l'image
         self.image_item = QGraphicsPixmapItem(pixmap)
@@ -112,53 +280,93 @@ class GridOverlay(QGraphicsView):
         if not self.image_item:
             return
 
-        # Supprime tout sauf l'image de fond
+        # Supprime tout sauf l'image de fond (les enfants partent avec leur parent)
         for item in self.scene.items():
-            if isinstance(item, QGraphicsPixmapItem):
+            if isinstance(item, QGraphicsPixmapItem) or item.parentItem() is not None:
                 continue
             self.scene.removeItem(item)
+        self.route_item = None
         rect = self.image_item.boundingRect()
 
-        # Cases coloriées et émojis
-        for (row, col), color in self.colored_cells.items():
-            x = col * self.grid_size
-            y = row * self.grid_size
-            cell_rect = QRectF(x, y, self.grid_size, self.grid_size)
-            self.scene.addRect(cell_rect, QPen(Qt.PenStyle.NoPen), QBrush(color))
-
-            # Affichage de l'émoji centré si objet présent
-            if (row, col) in self.objects_in_cells:
-                obj_data = self.objects_in_cells[(row, col)]
-                category = obj_data["category"]
-                emoji = self.emoji_mapping.get(category, "")
-                if emoji:
-                    font = QFont()
-                    font.setPointSize(int(self.grid_size * 0.7))
-                    temp_text_item = self.scene.addText(emoji)
-                    temp_text_item.setFont(font)
-                    text_rect = temp_text_item.boundingRect()
-                    self.scene.removeItem(temp_text_item)
-                    text_item = self.scene.addText(emoji)
-                    text_item.setFont(font)
-                    offset_x = x + (self.grid_size - text_rect.width()) / 2
-                    offset_y = y + (self.grid_size - text_rect.height()) / 2
-                    text_item.setPos(offset_x, offset_y)
-
-        pen = QPen(Qt.GlobalColor.red)
-        pen.setWidth(2)
-
-        x = 0
-        while x <= rect.width():
-            self.scene.addLine(x, 0, x, rect.height(), pen)
-            x += self.grid_size
-
-        y = 0
-        while y <= rect.height():
-            self.scene.addLine(0, y, rect.width(), y, pen)
-            y += self.grid_size
+        # Cases coloriées, émojis et lignes : un seul calque peint à la demande
+        self.grid_layer = GridLayerItem(rect.width(), rect.height(), self.grid_size, self.cell_store,
+                                        [self.color_types[t] for t in CELL_TYPES], self.emoji_mapping,
+                                        self.emoji_cache)
+        self.scene.addItem(self.grid_layer)
 
+        self._draw_route()
         self.grid_modified.emit()
 
+    def _update_cell(self, cell_key):
+        """Repeint une seule case après une modification du modèle."""
+        if self.grid_layer is not None:
+            self.grid_layer.refresh_cell(*cell_key)
+
+    def show_path(self, path, points):
+        """Affiche un parcours sur le plan, sans redessiner le quadrillage.
+
+        Args:
+            path (list): les cases (ligne, colonne) traversées, dans l'ordre
+            points (list): les points de passage (entrée, articles, caisse), numérotés dans l'ordre
+        """
+        self.route_path = list(path)
+        self.route_points = list(points)
+        self._draw_route()
+
+    def clear_path(self):
+        """Retire le parcours affiché."""
+        self.route_path = []
+        self.route_points = []
+        self._draw_route()
+
+    def _draw_route(self):
+        """(Re)crée l'élément du parcours : un seul tracé, avec les points de passage pour enfants."""
+        if self.route_item is not None:
+            self.scene.removeItem(self.route_item)
+            self.route_item = None
+        if not self.route_path or not self.image_item:
+            return
+
+        size = self.grid_size
+        def center(cell):
+            return (cell[1] + 0.5) * size, (cell[0] + 0.5) * size
+
+        # Tracé du parcours de centre de case en centre de case
+        painter_path = QPainterPath()
+        painter_path.moveTo(*center(self.route_path[0]))
+        for cell in self.route_path[1:]:
+            painter_path.lineTo(*center(cell))
+        self.route_item = QGraphicsPathItem(painter_path)
+        pen = QPen(QColor(255, 120, 0, 220))
+        pen.setWidthF(max(2.0, size * 0.15))
+        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+        self.route_item.setPen(pen)
+        self.route_item.setZValue(10)
+
+        # Points de passage numérotés : entrée en vert, caisse en rouge
+        font = QFont()
+        font.setBold(True)
+        font.setPixelSize(max(8, int(size * 0.4)))
+        radius = size * 0.35
+        for idx, point in enumerate(self.route_points):
+            if idx == 0:
+                color = QColor(39, 174, 96)
+            elif idx == len(self.route_points) - 1:
+                color = QColor(231, 76, 60)
+            else:
+                color = QColor(255, 255, 255)
+            x, y = center(point)
+            marker = QGraphicsEllipseItem(x - radius, y - radius, 2 * radius, 2 * radius, self.route_item)
+            marker.setBrush(QBrush(color))
+            marker.setPen(QPen(Qt.GlobalColor.black))
+            label = QGraphicsSimpleTextItem(str(idx + 1), marker)
+            label.setFont(font)
+            label_rect = label.boundingRect()
+            label.setPos(x - label_rect.width() / 2, y - label_rect.height() / 2)
+
+        self.scene.addItem(self.route_item)
+
     def set_grid_size(self, size):
         """Définit la taille de la grille et redessine le quadrillage.
 
@@ -166,6 +374,7 @@ class GridOverlay(QGraphicsView):
             size (int): taille de la grille en pixels.
         """
         self.grid_size = size
+        self.emoji_cache.clear()
         self.draw_grid()
 
     def set_pan_mode(self, enable):
@@ -197,31 +406,32 @@ class GridOverlay(QGraphicsView):
         col, row = int(x // self.grid_size), int(y // self.grid_size)
         cell_key = (row, col)
 
-        # Limiter à une seule entrée
-        if self.current_color_type == 'Entrée':
-            if self.entrance_number >= 1:
-                QMessageBox.warning(self, "Erreur", "Il ne peut y avoir qu'une seule entrée.")
-                self.is_painting = False
+        # Rien à faire si la case a déjà ce type (la souris reste souvent dans la même case)
+        current = self.cell_store.type_at(row, col)
+        if self.current_color_type == 'Gomme':
+            if current is None:
                 return
-            self.entrance_number = 1
+        elif current == self.current_color_type:
+            return
+
+        # Limiter à une seule entrée
+        if self.current_color_type == 'Entrée' and self.cell_store.count('Entrée') >= 1:
+            QMessageBox.warning(self, "Erreur", "Il ne peut y avoir qu'une seule entrée.")
+            self.is_painting = False
+            return
 
         # Si on est en mode gomme, on supprime la cellule
         if self.current_color_type == 'Gomme':
-            if self.colored_cells.get(cell_key) == self.color_types['Entrée']:
-                self.entrance_number = 0
-            self.colored_cells.pop(cell_key, None)
-            self.objects_in_cells.pop(cell_key, None)
+            self.cell_store.set_type(row, col, None)
         else:
-            color = self.color_types[self.current_color_type]
-            self.colored_cells[cell_key] = color
+            self.cell_store.set_type(row, col, self.current_color_type)
 
-        self.draw_grid()
+        self._update_cell(cell_key)
         self.grid_modified.emit()
 
     def reset_colored_cells(self):
         """Réinitialise le quadrillage en supprimant toutes les cellules coloriées et les objets."""
-        self.colored_cells.clear()
-        self.objects_in_cells.clear()
+        self.cell_store.clear()
         self.draw_grid()
         self.grid_modified.emit()
 
@@ -247,7 +457,6 @@ class GridOverlay(QGraphicsView):
         scene_pos = self.mapToScene(event.pos())
         col = int(scene_pos.x() // self.grid_size)
         row = int(scene_pos.y() // self.grid_size)
-        cell_key = (row, col)
 
         # Afficher des informations sur la cellule
         if self.is_panning and self.last_pan_point:
@@ -258,8 +467,8 @@ class GridOverlay(QGraphicsView):
         elif self.is_painting:
             self.color_cell_at_position(scene_pos)
         else:
-            if self.colored_cells.get(cell_key) in [self.color_types['Rayon'], self.color_types['Stock']]:
-                obj_data = self.objects_in_cells.get(cell_key)
+            if self.cell_store.is_shelf(row, col):
+                obj_data = self.cell_store.object_at(row, col)
                 if obj_data:
                     product_name = obj_data["product"]
                     QToolTip.showText(event.globalPosition().toPoint(), f"Produit : {product_name}", self)
@@ -310,12 +519,9 @@ class GridOverlay(QGraphicsView):
         cell_key = (row, col)
 
         # On autorise les dépôts sur Rayon ET Stock
-        allowed_types = ["Rayon", "Stock"]  
-        cell_color = self.colored_cells.get(cell_key)
-
-        if any(cell_color == self.color_types[cell_type] for cell_type in allowed_types):
-            self.objects_in_cells[cell_key] = {"category": category_name, "product": obj_name}
-            self.draw_grid()
+        if self.cell_store.is_shelf(row, col):
+            self.cell_store.set_object(row, col, category_name, obj_name)
+            self._update_cell(cell_key)
             self.grid_modified.emit()
         else:
             QMessageBox.warning(self, "Attention", "Vous ne pouvez déposer que sur des Rayons ou Stocks.")
@@ -323,57 +529,89 @@ class GridOverlay(QGraphicsView):
 # ==============================================================
 # Exportation et importation par Lysandre Pace-Boulnois
 # ==============================================================
-    def export_cells_to_json(self, path_or_buffer):
-        """Exporte les cellules coloriées et les objets en JSON."""
-        data = {
-            "grid_size": self.grid_size,
-            "cells": []
-        }
-        for (row, col), color in self.colored_cells.items():
-            for type_str, type_color in self.color_types.items():
-                if color.rgba() == type_color.rgba():
-                    cell_data = {
-                        "row": row,
-                        "col": col,
-                        "type": type_str
-                    }
-                    if type_str in ["Rayon", "Stock"]:
-                        obj_data = self.objects_in_cells.get((row, col), None)
-                        cell_data["object"] = {
-                            "category": obj_data["category"],
-                            "product": obj_data["product"]
-                        } if obj_data else None
-                    data["cells"].append(cell_data)
-                    break
+    def export_cells_to_json(self, path_or_buffer, compact=False, progress=None):
+        """Exporte les cellules coloriées et les objets en JSON, case par case.
+
+        Args:
+            path_or_buffer (str | flux texte): fichier de destination
+            compact (bool, optional): sans indentation (fichier bien plus petit)
+            progress (Callable[[int, int], None], optional): suivi (cases écrites, total)
+
+        Returns:
+            bool: True si l'exportation a réussi
+        """
         try:
             if hasattr(path_or_buffer, "write"):
-                json.dump(data, path_or_buffer, indent=2, ensure_ascii=False)
+                write_plan_json(path_or_buffer, self.grid_size, self.cell_store.iter_cells(),
+                                len(self.cell_store), compact, progress)
             else:
                 with open(path_or_buffer, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                    write_plan_json(f, self.grid_size, self.cell_store.iter_cells(),
+                                    len(self.cell_store), compact, progress)
+            return True
         except Exception as e:
             print(f"Erreur lors de l'exportation : {e}")
             QMessageBox.warning(self, "Erreur", f"Erreur lors de l'exportation : {e}")
+            return False
 
-    def export_cells_to_json_string(self):
+    def export_cells_to_json_string(self, compact=False):
         """Exporte les cellules coloriées et les objets en JSON sous forme de chaîne."""
         import io
         buffer = io.StringIO()
-        self.export_cells_to_json(buffer)
+        self.export_cells_to_json(buffer, compact)
         return buffer.getvalue()
 
-    def import_cells_from_json(self, path):
-        """Importe les cellules coloriées et les objets depuis un fichier JSON.
+    def import_cells_from_json(self, path, progress=None):
+        """Importe les cellules coloriées et les objets depuis un fichier JSON, lu au fil de l'eau.
 
         Args:
             path (str): chemin d'accès au fichier JSON.
+            progress (Callable[[int, int], None], optional): suivi (octets lus, taille du fichier)
+
+        Returns:
+            bool: True si l'importation a réussi
         """
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self._import_cells_from_data(data)
+            with PlanJsonReader.open(path, progress) as reader:
+                self._import_cells_from_reader(reader)
+            return True
+        except Exception as e:
+            print(f"Erreur lors de l'importation : {e}")
+            return False
+
+    def export_cells_to_binary(self, path):
+        """Exporte les cellules coloriées et les objets au format binaire compact .mtp.
+
+        Args:
+            path (str): chemin du fichier .mtp
+
+        Returns:
+            bool: True si l'exportation a réussi
+        """
+        try:
+            write_plan_binary(path, self.cell_store, self.grid_size)
+            return True
+        except Exception as e:
+            print(f"Erreur lors de l'exportation : {e}")
+            QMessageBox.warning(self, "Erreur", f"Erreur lors de l'exportation : {e}")
+            return False
+
+    def import_cells_from_binary(self, path):
+        """Importe les cellules coloriées et les objets depuis un plan binaire .mtp.
+
+        Args:
+            path (str): chemin du fichier .mtp
+
+        Returns:
+            bool: True si l'importation a réussi
+        """
+        try:
+            store, grid_size = read_plan_binary(path)
+            self.set_cell_store(store, grid_size)
+            return True
         except Exception as e:
             print(f"Erreur lors de l'importation : {e}")
+            return False
 
     def import_cells_from_json_content(self, json_content):
         """Importe les cellules coloriées et les objets depuis une chaîne JSON.
@@ -381,43 +619,44 @@ class GridOverlay(QGraphicsView):
         Args:
             json_content (str): chaîne JSON contenant les données des cellules.
         """
+        import io
         try:
-            data = json.loads(json_content)
-            self._import_cells_from_data(data)
+            self._import_cells_from_reader(PlanJsonReader(io.StringIO(json_content)))
         except Exception as e:
             print(f"Erreur lors de l'importation (content) : {e}")
 
-    def _import_cells_from_data(self, data):
-        """Importe les cellules coloriées et les objets depuis un dictionnaire ou une liste."""
-        self.colored_cells.clear()
-        self.objects_in_cells.clear()
-        self.entrance_number = 0
-        if isinstance(data, dict) and "grid_size" in data:
-            self.grid_size = data["grid_size"]
-            self.set_grid_size(self.grid_size)
-        cells = data["cells"] if isinstance(data, dict) and "cells" in data else data
-        for cell in cells:
-            row = cell.get("row")
-            col = cell.get("col")
-            type_str = cell.get("type")
-            obj = cell.get("object")
-            if type_str in self.color_types:
-                self.colored_cells[(row, col)] = self.color_types[type_str]
-                if obj:
-                    if isinstance(obj, dict):
-                        self.objects_in_cells[(row, col)] = {
-                            "category": obj.get("category", "Autre"),
-                            "product": obj.get("product", "")
-                        }
-                    else:
-                        self.objects_in_cells[(row, col)] = {
-                            "category": "Autre",
-                            "product": obj
-                        }
-                if type_str == "Entrée":
-                    self.entrance_number = 1
+    def _import_cells_from_reader(self, reader):
+        """Importe les cellules décodées une par une par un PlanJsonReader."""
+        store = CellStore.from_cells(reader.cells())
+        self.set_cell_store(store, reader.grid_size)
+
+    def set_cell_store(self, store, grid_size=None):
+        """Affiche un modèle de cases existant (sans passer par le JSON).
+
+        Args:
+            store (CellStore): le modèle des cases
+            grid_size (int, optional): taille des cases en pixels (inchangée si None)
+        """
+        self.cell_store = store
+        if grid_size is not None and grid_size != self.grid_size:
+            self.grid_size = grid_size
+            self.emoji_cache.clear()
         self.draw_grid()
 
+    def compiled_plan(self):
+        """Plan en cours d'édition, compilé pour le calcul de parcours.
+
+        Le plan compilé est lu directement dans le modèle des cases et gardé
+        tant que le plan n'est pas modifié (les distances déjà calculées
+        restent alors en cache).
+        """
+        import plan
+        key = (self.cell_store.uid, self.cell_store.revision, self.grid_size)
+        if self._compiled_key != key:
+            self._compiled = plan.CompiledPlan.from_store(self.cell_store, self.grid_size)
+            self._compiled_key = key
+        return self._compiled
+
     def set_zoom(self, factor):
         """Ajuste le zoom global du plan."""
         self.resetTransform()
@@ -1,50 +1,125 @@
 # ==============================================================
 # Modèle pour la fenêtre d'administration du gérant
 # Développé par D. MELOCCO, L. PACE--BOULNOIS, S. LECLERCQ-SPETER, N. COLIN
-# Dernière modification : 13/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
+#
+# Les articles d'un magasin sont rangés dans les tables categories et
+# articles (une ligne par article) : ajouter ou retirer un article ne
+# touche qu'une ligne, et plusieurs modifications peuvent être validées
+# ensemble (apply_article_changes). Les emplacements des articles sur le
+# plan sont dans la table placements.
 
-import sqlite3
+import json
+
+from models import database
 
 def get_shop_data(user_id):
     """Récupère les données du magasin pour un utilisateur donné."""
-    conn = sqlite3.connect("market_tracer.db")
-    c = conn.cursor()
-    c.execute("SELECT articles_json, plan_json, chemin FROM shops WHERE user_id=?", (user_id,))
-    result = c.fetchone()
-    conn.close()
-    return result
+    return database.fetch_one("SELECT articles_json, plan_json, chemin FROM shops WHERE user_id=?", (user_id,))
 
 def update_shop_image(user_id, file_name):
     """Met à jour le chemin de l'image du magasin pour un utilisateur donné."""
-    conn = sqlite3.connect("market_tracer.db")
-    c = conn.cursor()
-    c.execute("UPDATE shops SET chemin=? WHERE user_id=?", (file_name, user_id))
-    conn.commit()
-    conn.close()
-
-def update_articles_json(user_id, articles_json_content):
-    """Met à jour le contenu JSON des articles du magasin pour un utilisateur donné."""
-    conn = sqlite3.connect("market_tracer.db")
-    c = conn.cursor()
-    c.execute("UPDATE shops SET articles_json=? WHERE user_id=?", (articles_json_content, user_id))
-    conn.commit()
-    conn.close()
+    database.execute("UPDATE shops SET chemin=? WHERE user_id=?", (file_name, user_id))
 
 def get_employees_shop_id(user_id):
     """Récupère l'ID du magasin associé à un employé donné."""
-    conn = sqlite3.connect("market_tracer.db")
-    c = conn.cursor()
-    c.execute("SELECT id FROM shops WHERE user_id=?", (user_id,))
-    row = c.fetchone()
-    conn.close()
+    row = database.fetch_one("SELECT id FROM shops WHERE user_id=?", (user_id,))
     return row[0] if row else None
 
 def get_shop_articles_by_id(shop_id):
-    """Récupère les articles JSON d'un magasin à partir de son ID."""
-    conn = sqlite3.connect("market_tracer.db")
-    c = conn.cursor()
-    c.execute("SELECT articles_json FROM shops WHERE id=?", (shop_id,))
-    result = c.fetchone()
-    conn.close()
-    return result[0] if result else None
\ No newline at end of file
+    """Récupère les articles d'un magasin à partir de son ID, au format JSON ({catégorie: [articles]})."""
+    if database.fetch_one("SELECT 1 FROM shops WHERE id=?", (shop_id,)) is None:
+        return None
+    return json.dumps(get_articles(shop_id), ensure_ascii=False)
+
+# ==============================================================
+# Articles et catégories
+# ==============================================================
+def get_articles(shop_id):
+    """Articles d'un magasin par catégorie ({catégorie: [articles]}), dans l'ordre d'ajout."""
+    articles = {}
+    for categorie, nom in database.fetch_all("""
+            SELECT categories.nom, articles.nom FROM articles
+            JOIN categories ON categories.id = articles.category_id
+            WHERE articles.shop_id=? ORDER BY categories.id, articles.id""", (shop_id,)):
+        articles.setdefault(categorie, []).append(nom)
+    return articles
+
+def add_article(shop_id, categorie, nom):
+    """Ajoute un article (et sa catégorie si elle est nouvelle) : une seule ligne insérée."""
+    with database.transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO categories (shop_id, nom) VALUES (?, ?)", (shop_id, categorie))
+        conn.execute("""
+            INSERT OR IGNORE INTO articles (shop_id, category_id, nom)
+            SELECT ?, id, ? FROM categories WHERE shop_id=? AND nom=?""", (shop_id, nom, shop_id, categorie))
+
+def remove_article(shop_id, categorie, nom):
+    """Retire un article d'un magasin (ses emplacements sur le plan sont retirés avec lui)."""
+    database.execute("""
+        DELETE FROM articles WHERE shop_id=? AND nom=?
+        AND category_id IN (SELECT id FROM categories WHERE shop_id=? AND nom=?)""", (shop_id, nom, shop_id, categorie))
+
+def apply_article_changes(shop_id, changes):
+    """Applique une série d'ajouts et de retraits d'articles dans une seule transaction.
+
+    Args:
+        shop_id (int): l'ID du magasin
+        changes (Iterable[Tuple[str, str, bool]]): (catégorie, article, True pour
+            l'ajouter ou False pour le retirer), dans l'ordre
+    """
+    with database.transaction():
+        for categorie, nom, ajout in changes:
+            if ajout:
+                add_article(shop_id, categorie, nom)
+            else:
+                remove_article(shop_id, categorie, nom)
+
+def replace_articles(shop_id, articles):
+    """Remplace tous les articles d'un magasin.
+
+    Args:
+        shop_id (int): l'ID du magasin
+        articles (dict): {catégorie: [articles]}, comme dans les JSON d'articles
+    """
+    with database.transaction() as conn:
+        conn.execute("DELETE FROM articles WHERE shop_id=?", (shop_id,))
+        conn.execute("DELETE FROM categories WHERE shop_id=?", (shop_id,))
+        for categorie, noms in articles.items():
+            category_id = conn.execute("INSERT INTO categories (shop_id, nom) VALUES (?, ?)", (shop_id, categorie)).lastrowid
+            conn.executemany("INSERT OR IGNORE INTO articles (shop_id, category_id, nom) VALUES (?, ?, ?)",
+                             [(shop_id, category_id, nom) for nom in noms])
+
+# ==============================================================
+# Emplacements des articles sur le plan
+# ==============================================================
+def get_placements(shop_id):
+    """Emplacements des articles d'un magasin : liste de (catégorie, article, type, ligne, colonne)."""
+    return database.fetch_all("""
+        SELECT categories.nom, articles.nom, placements.type, placements.row, placements.col FROM placements
+        JOIN articles ON articles.id = placements.article_id
+        JOIN categories ON categories.id = articles.category_id
+        WHERE articles.shop_id=? ORDER BY placements.row, placements.col""", (shop_id,))
+
+def replace_placements(shop_id, cells):
+    """Remplace les emplacements des articles d'un magasin par ceux d'un plan.
+
+    Seules les cases dont l'objet est un article connu du magasin sont gardées.
+
+    Args:
+        shop_id (int): l'ID du magasin
+        cells (Iterable[dict]): les cases du plan, au format du JSON de quadrillage
+    """
+    with database.transaction() as conn:
+        ids = {(categorie, nom): article_id for article_id, categorie, nom in conn.execute("""
+            SELECT articles.id, categories.nom, articles.nom FROM articles
+            JOIN categories ON categories.id = articles.category_id WHERE articles.shop_id=?""", (shop_id,))}
+        conn.execute("DELETE FROM placements WHERE article_id IN (SELECT id FROM articles WHERE shop_id=?)", (shop_id,))
+        rows = []
+        for cell in cells:
+            obj = cell.get("object")
+            if isinstance(obj, dict):
+                article_id = ids.get((obj.get("category"), obj.get("product")))
+                if article_id is not None:
+                    rows.append((article_id, cell["type"], cell["row"], cell["col"]))
+        conn.executemany("INSERT OR IGNORE INTO placements (article_id, type, row, col) VALUES (?, ?, ?, ?)", rows)
\ No newline at end of file
@@ -0,0 +1,119 @@
+# ==============================================================
+# Accès à la base de données SQLite
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Une seule connexion par fil d'exécution, ouverte à la première requête
+# et gardée jusqu'à la fermeture de l'application : ouvrir la base à chaque
+# requête coûte cher quand elle est sur un disque réseau. La base est en
+# mode WAL (lectures et écriture simultanées) et les requêtes préparées
+# sont gardées en cache par sqlite3 (voir STATEMENT_CACHE_SIZE).
+#
+# Le chemin de la base vaut "market_tracer.db" par défaut ; il peut être
+# changé par la variable d'environnement MARKET_TRACER_DB ou par
+# set_database_path() avant la première requête.
+
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+
+DEFAULT_PATH = "market_tracer.db"
+ENV_VARIABLE = "MARKET_TRACER_DB" # Variable d'environnement donnant le chemin de la base
+STATEMENT_CACHE_SIZE = 256 # Requêtes préparées gardées par connexion
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL", # Les lecteurs ne bloquent pas l'écriture
+    "PRAGMA synchronous=NORMAL", # Sûr en mode WAL, bien moins de synchronisations disque
+    "PRAGMA busy_timeout=5000", # Attend (ms) au lieu d'échouer si la base est verrouillée
+    "PRAGMA foreign_keys=ON", # Suppressions en cascade (articles, emplacements)
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000", # Cache de pages de 8 Mo
+)
+
+_path = os.environ.get(ENV_VARIABLE, DEFAULT_PATH)
+_local = threading.local()
+_connections: List[sqlite3.Connection] = [] # Toutes les connexions ouvertes (fermées à la sortie)
+_lock = threading.Lock()
+_generation = 0 # Incrémenté à chaque fermeture générale : les fils rouvrent alors leur connexion
+
+def get_database_path() -> str:
+    """Chemin de la base de données."""
+    return _path
+
+def set_database_path(path: str) -> None:
+    """Change le chemin de la base de données (les connexions ouvertes sont fermées).
+
+    Args:
+        path (str): chemin du fichier SQLite
+    """
+    global _path
+    close_all()
+    _path = path
+
+def connection() -> sqlite3.Connection:
+    """Connexion du fil d'exécution courant, ouverte à la première demande."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.generation != _generation:
+        conn = sqlite3.connect(_path, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        _local.conn, _local.generation = conn, _generation
+        with _lock:
+            _connections.append(conn)
+    return conn
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """Exécute un bloc de requêtes dans une transaction (validée, ou annulée en cas d'erreur).
+
+    Dans une transaction déjà ouverte (migration par exemple), le bloc en fait
+    simplement partie : il est validé ou annulé avec elle.
+    """
+    conn = connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    with conn:
+        yield conn
+
+def fetch_one(sql: str, params: Sequence = ()) -> Optional[tuple]:
+    """Première ligne du résultat d'une requête, ou None."""
+    return connection().execute(sql, params).fetchone()
+
+def fetch_all(sql: str, params: Sequence = ()) -> List[tuple]:
+    """Toutes les lignes du résultat d'une requête."""
+    return connection().execute(sql, params).fetchall()
+
+def execute(sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+    """Exécute une requête de modification et la valide."""
+    with transaction() as conn:
+        return conn.execute(sql, params)
+
+def close() -> None:
+    """Ferme la connexion du fil d'exécution courant."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        _local.conn = None
+        with _lock:
+            if conn in _connections:
+                _connections.remove(conn)
+        conn.close()
+
+def close_all() -> None:
+    """Ferme toutes les connexions ouvertes (fin de l'application, changement de base)."""
+    global _generation
+    with _lock:
+        connections = list(_connections)
+        _connections.clear()
+        _generation += 1
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.conn = None
+
+atexit.register(close_all)
@@ -0,0 +1,264 @@
+# ==============================================================
+# Migrations du schéma de la base de données
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Chaque migration fait passer la base d'une version à la suivante ; la
+# version courante est gardée dans PRAGMA user_version et l'historique
+# dans la table schema_version. Au démarrage, une base à jour ne coûte
+# qu'une lecture de user_version ; sinon les migrations manquantes sont
+# appliquées dans l'ordre, toutes dans une seule transaction.
+#
+# Pour faire évoluer le schéma : ajouter une fonction à la fin de
+# MIGRATIONS, sans jamais modifier celles déjà publiées.
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from models import database
+from models.adminModel import replace_articles, replace_placements # Reprises après la migration
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    """Tables des utilisateurs et des magasins, comptes par défaut."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT UNIQUE,
+            password TEXT,
+            role TEXT,
+            shop_id INTEGER,
+            first_login INTEGER DEFAULT 1
+        )
+    ''')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS shops (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT,
+            auteur TEXT,
+            date_creation TEXT,
+            apropos TEXT,
+            chemin TEXT,
+            articles_json TEXT,
+            user_id INTEGER,
+            plan_json TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES ('gerant', '1234', 'Gérant')")
+    conn.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES ('employe', 'abcd', 'Employé')")
+
+def _create_article_tables(conn: sqlite3.Connection) -> None:
+    """Tables des catégories, articles et emplacements, index des requêtes fréquentes."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            shop_id INTEGER NOT NULL REFERENCES shops(id) ON DELETE CASCADE,
+            nom TEXT NOT NULL,
+            UNIQUE(shop_id, nom)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY,
+            shop_id INTEGER NOT NULL REFERENCES shops(id) ON DELETE CASCADE,
+            category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+            nom TEXT NOT NULL,
+            UNIQUE(category_id, nom)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS placements (
+            id INTEGER PRIMARY KEY,
+            article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            type TEXT NOT NULL,
+            row INTEGER NOT NULL,
+            col INTEGER NOT NULL,
+            UNIQUE(article_id, row, col)
+        )
+    """)
+    # Index des colonnes filtrées par les requêtes (users.username est déjà indexé par UNIQUE)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_shops_user_id ON shops(user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_shop_role ON users(shop_id, role)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_shop ON articles(shop_id)")
+
+def _migrate_articles_blobs(conn: sqlite3.Connection) -> None:
+    """Range dans les nouvelles tables les articles encore stockés dans shops.articles_json.
+
+    La colonne contient soit le chemin d'un JSON d'articles (choisi dans la
+    configuration du magasin, gardé), soit le contenu JSON lui-même (écrit par
+    les anciennes versions, effacé une fois repris). Les emplacements sont lus
+    dans le plan du magasin. Un magasin dont les fichiers sont illisibles est
+    laissé tel quel (voir import_pending_articles).
+
+    Les requêtes sont écrites ici plutôt que reprises des modèles : la
+    migration fait toujours la même chose, même si les modèles évoluent.
+    """
+    shops = conn.execute("""
+        SELECT id, articles_json, plan_json FROM shops
+        WHERE articles_json IS NOT NULL AND articles_json != ''
+        AND NOT EXISTS (SELECT 1 FROM categories WHERE categories.shop_id = shops.id)""").fetchall()
+    for shop_id, articles_json, plan_json in shops:
+        found = _read_shop_files(shop_id, articles_json, plan_json)
+        if found is None:
+            continue
+        articles, cells = found
+        if not articles_json.endswith(".json"):
+            conn.execute("UPDATE shops SET articles_json='' WHERE id=?", (shop_id,))
+        for categorie, noms in articles.items():
+            category_id = conn.execute("INSERT INTO categories (shop_id, nom) VALUES (?, ?)",
+                                       (shop_id, categorie)).lastrowid
+            conn.executemany("INSERT OR IGNORE INTO articles (shop_id, category_id, nom) VALUES (?, ?, ?)",
+                             [(shop_id, category_id, nom) for nom in noms])
+        ids = {(categorie, nom): article_id for article_id, categorie, nom in conn.execute("""
+            SELECT articles.id, categories.nom, articles.nom FROM articles
+            JOIN categories ON categories.id = articles.category_id WHERE articles.shop_id=?""", (shop_id,))}
+        rows = []
+        for cell in cells:
+            obj = cell.get("object")
+            if isinstance(obj, dict):
+                article_id = ids.get((obj.get("category"), obj.get("product")))
+                if article_id is not None:
+                    rows.append((article_id, cell["type"], cell["row"], cell["col"]))
+        conn.executemany("INSERT OR IGNORE INTO placements (article_id, type, row, col) VALUES (?, ?, ?, ?)", rows)
+
+def _read_shop_files(shop_id: int, articles_json: str, plan_json: Optional[str]) -> Optional[Tuple[dict, List[dict]]]:
+    """Articles ({catégorie: [articles]}) et cases du plan d'un magasin, ou None si illisibles.
+
+    Args:
+        shop_id (int): l'ID du magasin (pour le message d'erreur)
+        articles_json (str): chemin d'un JSON d'articles, ou contenu JSON
+        plan_json (str, optional): chemin du plan du magasin
+    """
+    try:
+        if articles_json.endswith(".json"):
+            if not os.path.isfile(articles_json):
+                return None
+            with open(articles_json, encoding="utf-8") as f:
+                articles = json.load(f)
+        else:
+            articles = json.loads(articles_json)
+        cells = _plan_cells(plan_json) if plan_json and os.path.isfile(plan_json) else []
+    except (OSError, ValueError) as e:
+        print(f"Articles du magasin {shop_id} non repris : {e}")
+        return None
+    return (articles, cells) if isinstance(articles, dict) else None
+
+def import_pending_articles(shop_id: Optional[int] = None) -> int:
+    """Reprend les articles des magasins marqués comme pas encore repris (shops.articles_imported).
+
+    La migration ne passe qu'une fois : un magasin dont le fichier d'articles
+    était absent ou illisible à ce moment-là est repris ici, au chargement du
+    magasin, dès que le fichier redevient lisible. Il est alors marqué comme
+    repris, même si son fichier ne contient aucune catégorie.
+
+    Args:
+        shop_id (int, optional): seulement ce magasin (tous par défaut)
+
+    Returns:
+        int: le nombre de magasins repris
+    """
+    query = """
+        SELECT id, articles_json, plan_json FROM shops
+        WHERE articles_imported = 0 AND articles_json IS NOT NULL AND articles_json != ''"""
+    params = ()
+    if shop_id is not None:
+        query += " AND id=?"
+        params = (shop_id,)
+    imported = 0
+    for shop_id, articles_json, plan_json in database.fetch_all(query, params):
+        found = _read_shop_files(shop_id, articles_json, plan_json)
+        if found is None:
+            continue
+        articles, cells = found
+        with database.transaction() as conn:
+            if not articles_json.endswith(".json"):
+                conn.execute("UPDATE shops SET articles_json='' WHERE id=?", (shop_id,))
+            replace_articles(shop_id, articles)
+            replace_placements(shop_id, cells)
+            conn.execute("UPDATE shops SET articles_imported=1 WHERE id=?", (shop_id,))
+        imported += 1
+    return imported
+
+def _create_route_cache_table(conn: sqlite3.Connection) -> None:
+    """Table des parcours calculés (voir routecache.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS route_cache (
+            key TEXT PRIMARY KEY,
+            plan TEXT NOT NULL,
+            route BLOB NOT NULL,
+            used_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_route_cache_used_at ON route_cache(used_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_route_cache_plan ON route_cache(plan)")
+
+def _add_articles_imported_flag(conn: sqlite3.Connection) -> None:
+    """Marque les magasins dont les articles sont déjà dans les tables (voir import_pending_articles)."""
+    conn.execute("ALTER TABLE shops ADD COLUMN articles_imported INTEGER NOT NULL DEFAULT 0")
+    conn.execute("""
+        UPDATE shops SET articles_imported=1
+        WHERE articles_json IS NULL OR articles_json = ''
+        OR EXISTS (SELECT 1 FROM categories WHERE categories.shop_id = shops.id)""")
+
+def _plan_cells(plan_path: str) -> List[dict]:
+    """Cases d'un plan JSON ou binaire .mtp."""
+    import planbin
+    from planjson import PlanJsonReader
+    if plan_path.endswith(planbin.EXTENSION):
+        store, _ = planbin.read_plan_binary(plan_path)
+        return store.to_cells()
+    with PlanJsonReader.open(plan_path) as reader:
+        return list(reader.cells())
+
+# Migrations dans l'ordre : la migration d'indice i fait passer la base à la version i + 1
+MIGRATIONS: List[Tuple[str, Callable[[sqlite3.Connection], None]]] = [
+    ("Tables users et shops", _create_base_tables),
+    ("Tables categories, articles, placements et index", _create_article_tables),
+    ("Reprise des articles de shops.articles_json", _migrate_articles_blobs),
+    ("Table route_cache", _create_route_cache_table),
+    ("Colonne shops.articles_imported", _add_articles_imported_flag),
+]
+LATEST_VERSION = len(MIGRATIONS)
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Version du schéma de la base (0 pour une base neuve ou antérieure aux migrations)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate() -> int:
+    """Met la base à jour en appliquant les migrations manquantes (sur la connexion du fil courant).
+
+    Returns:
+        int: le nombre de migrations appliquées
+
+    Raises:
+        RuntimeError: si la base a été créée par une version plus récente de l'application
+        sqlite3.Error: si une migration échoue (la base est alors laissée intacte)
+    """
+    conn = database.connection() # Celle qu'utilisent aussi les modèles appelés par les migrations
+    version = schema_version(conn)
+    if version == LATEST_VERSION:
+        return 0 # Chemin rapide : aucune requête de définition
+    if version > LATEST_VERSION:
+        raise RuntimeError(f"Base de données en version {version}, plus récente que l'application ({LATEST_VERSION})")
+
+    conn.execute("BEGIN IMMEDIATE") # Verrouille la base : une seule instance migre
+    with conn:
+        version = schema_version(conn) # Une autre instance a pu migrer entre-temps
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TEXT
+            )
+        """)
+        pending = MIGRATIONS[version:]
+        for number, (description, migration) in enumerate(pending, version + 1):
+            migration(conn)
+            conn.execute("INSERT OR REPLACE INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                         (number, description, datetime.now().isoformat(timespec="seconds")))
+        conn.execute(f"PRAGMA user_version = {LATEST_VERSION}")
+    return len(pending)
\ No newline at end of file
@@ -0,0 +1,391 @@
+# ==============================================================
+# Ordre de passage dans les rayons (problème du voyageur de commerce)
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Le départ (l'entrée) est imposé et l'arrivée est la caisse la plus
+# avantageuse. Pour ramener ce choix libre à un chemin ordinaire, on ajoute
+# un nœud fictif « fin » relié à chaque article par la distance de cet
+# article à sa caisse la plus proche : tous les solveurs cherchent alors un
+# chemin 0 -> articles -> fin.
+#
+# - Held-Karp (programmation dynamique sur les sous-ensembles, vectorisée
+#   avec NumPy) : exact, jusqu'à EXACT_LIMIT articles ;
+# - séparation et évaluation (branch and bound) : exact si le temps le
+#   permet, jusqu'à BRANCH_AND_BOUND_LIMIT articles ;
+# - au-delà, plus proche voisin amélioré par 2-opt et Or-opt.
+#
+# Quand un produit se trouve à plusieurs endroits, chaque article devient un
+# groupe d'emplacements candidats dont un seul doit être visité (voyageur de
+# commerce généralisé) : Held-Karp par groupes tant que le nombre d'états et le
+# temps accordé le permettent, sinon alternance entre choix de l'ordre et choix
+# des emplacements.
+#
+# Les distances sont supposées symétriques (distances de marche).
+
+import time
+from math import inf
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+EXACT_LIMIT = 15 # Nombre maximal d'articles pour Held-Karp
+EXACT_STATES = 4_000_000 # Nombre maximal d'états (sous-ensembles x emplacements) pour Held-Karp par groupes
+BRANCH_AND_BOUND_LIMIT = 40 # Nombre maximal d'articles pour le branch and bound
+DEFAULT_TIME_BUDGET = 1.0 # Temps de calcul maximal (secondes)
+
+class OrderingResult(NamedTuple):
+    """Résultat d'un solveur d'ordre de passage."""
+    order: List[int] # Indices dans la matrice : départ, articles puis caisse
+    cost: float # Distance totale du parcours retenu
+    lower_bound: float # Meilleure borne inférieure connue
+    method: str # Solveur utilisé
+
+    @property
+    def gap(self) -> float:
+        """Écart relatif entre le parcours retenu et la borne inférieure (0 = optimal)"""
+        if self.cost in (0, inf):
+            return 0.0
+        return max(0.0, (self.cost - self.lower_bound) / self.cost)
+
+# ==============================================================
+# Point d'entrée
+# ==============================================================
+def solve_order(distances: np.ndarray, n_sources: int, time_budget: float = DEFAULT_TIME_BUDGET) -> OrderingResult:
+    """Choisit l'ordre de passage et la caisse d'arrivée.
+
+    Args:
+        distances (np.ndarray): matrice des distances ; l'indice 0 est le départ,
+            les indices 1 à n_sources - 1 les articles, les suivants les caisses
+        n_sources (int): nombre de points de départ (départ + articles)
+        time_budget (float, optional): temps de calcul maximal en secondes
+
+    Returns:
+        OrderingResult: l'ordre des indices (départ, articles, caisse) et sa qualité
+    """
+    deadline = time.perf_counter() + time_budget
+    n = n_sources - 1
+    weights = _augmented_matrix(distances, n_sources)
+    lower_bound = _root_lower_bound(weights, n)
+
+    exact = held_karp(weights, n, deadline=deadline) if n <= EXACT_LIMIT else None
+    if exact is not None:
+        path, cost = exact
+        lower_bound, method = cost, "held-karp"
+    else:
+        path = local_search(weights, n, _nearest_neighbor(weights, n), deadline)
+        cost = _path_cost(weights, path)
+        method = "local-search"
+        if n <= BRANCH_AND_BOUND_LIMIT:
+            path, cost, bound = branch_and_bound(weights, n, path, cost, deadline)
+            lower_bound, method = max(lower_bound, bound), "branch-and-bound"
+
+    # Remplace le nœud fictif de fin par la caisse la plus proche du dernier article
+    last = path[-2]
+    checkout = n_sources + int(np.argmin(distances[last, n_sources:])) if len(distances) > n_sources else None
+    order = path[:-1] + ([checkout] if checkout is not None else [])
+    return OrderingResult(order, cost, min(lower_bound, cost), method)
+
+def solve_group_order(distances: np.ndarray, n_sources: int, groups: List[List[int]],
+                      time_budget: float = DEFAULT_TIME_BUDGET) -> OrderingResult:
+    """Choisit un emplacement par article, l'ordre de passage et la caisse d'arrivée.
+
+    Args:
+        distances (np.ndarray): matrice des distances ; l'indice 0 est le départ,
+            les indices 1 à n_sources - 1 les emplacements candidats, les suivants les caisses
+        n_sources (int): nombre de points de départ (départ + emplacements)
+        groups (List[List[int]]): indices des emplacements candidats de chaque article
+            (les emplacements absents de tous les groupes sont ignorés)
+        time_budget (float, optional): temps de calcul maximal en secondes
+
+    Returns:
+        OrderingResult: l'ordre des indices (départ, un emplacement par article, caisse)
+    """
+    deadline = time.perf_counter() + time_budget
+    members = [0] + [node for group in groups for node in group]
+    if len(members) != n_sources:
+        # Ne garde que le départ, les emplacements utiles et les caisses
+        mapping = members + list(range(n_sources, len(distances)))
+        position = {node: i for i, node in enumerate(members)}
+        sub_groups = [[position[node] for node in group] for group in groups]
+        result = solve_group_order(distances[np.ix_(mapping, mapping)], len(members), sub_groups, time_budget)
+        return result._replace(order=[mapping[i] for i in result.order])
+
+    if all(len(group) == 1 for group in groups):
+        order = [0] + [group[0] for group in groups]
+        sub = distances[np.ix_(order + list(range(n_sources, len(distances))),
+                               order + list(range(n_sources, len(distances))))]
+        result = solve_order(sub, len(order), time_budget)
+        mapping = order + list(range(n_sources, len(distances)))
+        return result._replace(order=[mapping[i] for i in result.order])
+
+    weights = _augmented_matrix(distances, n_sources)
+    lower_bound = _group_lower_bound(weights, groups)
+    group_of = [0] * (n_sources - 1)
+    for g, group in enumerate(groups):
+        for node in group:
+            group_of[node - 1] = g
+
+    # Held-Karp par groupes tant que le nombre d'états et le temps accordé le permettent
+    exact = None
+    if (1 << len(groups)) * (n_sources - 1) <= EXACT_STATES:
+        exact = held_karp(weights, n_sources - 1, group_of, deadline)
+    if exact is not None:
+        path, cost = exact
+        order, lower_bound, method = path[:-1], cost, "held-karp"
+    else:
+        order, cost = _alternate_order_and_locations(distances, weights, groups, n_sources, deadline)
+        method = "local-search"
+
+    checkout = n_sources + int(np.argmin(distances[order[-1], n_sources:])) if len(distances) > n_sources else None
+    order = order + ([checkout] if checkout is not None else [])
+    return OrderingResult(order, cost, min(lower_bound, cost), method)
+
+def _group_lower_bound(weights: np.ndarray, groups: List[List[int]]) -> float:
+    """Borne inférieure : chaque article est atteint par l'arête entrante la plus courte vers l'un de ses emplacements."""
+    end = len(weights) - 1
+    bound = 0.0
+    for group in groups:
+        incoming = weights[:end, group].copy()
+        incoming[group, :] = inf
+        bound += float(incoming.min())
+    members = [node for group in groups for node in group]
+    return bound + float(weights[members, end].min())
+
+def _best_locations(weights: np.ndarray, sequence: List[List[int]]):
+    """Meilleur emplacement de chaque article pour un ordre de passage donné (plus court chemin par couches)."""
+    end = len(weights) - 1
+    costs = weights[0, sequence[0]]
+    choices = []
+    for previous, group in zip(sequence[:-1], sequence[1:]):
+        steps = costs[:, None] + weights[np.ix_(previous, group)]
+        choices.append(steps.argmin(axis=0))
+        costs = steps.min(axis=0)
+    totals = costs + weights[sequence[-1], end]
+    k = int(totals.argmin())
+    chosen = [sequence[-1][k]]
+    for group, choice in zip(sequence[-2::-1], choices[::-1]):
+        k = int(choice[k])
+        chosen.append(group[k])
+    return chosen[::-1], float(totals.min())
+
+def _alternate_order_and_locations(distances, weights, groups, n_sources, deadline):
+    """Alterne ordre de passage (emplacements fixés) et emplacements (ordre fixé) jusqu'à stabilisation."""
+    checkouts = list(range(n_sources, len(distances)))
+    # Départ : l'emplacement le plus proche de l'entrée pour chaque article
+    chosen = [min(group, key=lambda node: weights[0, node]) for group in groups]
+    best_order, best_cost = None, inf
+    while True:
+        remaining = max(0.0, deadline - time.perf_counter())
+        mapping = [0] + chosen + checkouts
+        result = solve_order(distances[np.ix_(mapping, mapping)], len(chosen) + 1, remaining)
+        sequence = [groups[i - 1] for i in result.order[1:len(chosen) + 1]]
+        chosen, cost = _best_locations(weights, sequence)
+        if cost >= best_cost - 1e-9 or time.perf_counter() > deadline:
+            if cost < best_cost:
+                best_order, best_cost = [0] + chosen, cost
+            return best_order, best_cost
+        best_order, best_cost = [0] + chosen, cost
+
+def _augmented_matrix(distances: np.ndarray, n_sources: int) -> np.ndarray:
+    """Matrice des distances entre départ et articles, augmentée du nœud fictif de fin."""
+    weights = np.zeros((n_sources + 1, n_sources + 1))
+    weights[:n_sources, :n_sources] = distances[:n_sources, :n_sources]
+    if len(distances) > n_sources:
+        end_cost = distances[:n_sources, n_sources:].min(axis=1)
+    else:
+        end_cost = np.full(n_sources, inf)
+    weights[:n_sources, n_sources] = end_cost
+    weights[n_sources, :n_sources] = end_cost
+    weights[0, n_sources] = weights[n_sources, 0] = inf if n_sources > 1 else end_cost[0]
+    return weights
+
+def _path_cost(weights, path: List[int]) -> float:
+    """Longueur d'un chemin dans la matrice augmentée"""
+    return float(sum(weights[a][b] for a, b in zip(path[:-1], path[1:])))
+
+def _root_lower_bound(weights: np.ndarray, n: int) -> float:
+    """Borne inférieure : chaque article et la fin sont atteints par leur arête entrante minimale."""
+    if n == 0:
+        return float(weights[0, 1])
+    incoming = weights[:n + 1, 1:].copy()
+    np.fill_diagonal(incoming[1:], inf)
+    return float(incoming.min(axis=0).sum())
+
+# ==============================================================
+# Held-Karp
+# ==============================================================
+def held_karp(weights: np.ndarray, n: int, groups: Optional[List[int]] = None, deadline: Optional[float] = None):
+    """Chemin optimal par programmation dynamique sur les sous-ensembles d'articles.
+
+    ``best[mask, j]`` est la longueur du plus court chemin partant du départ,
+    visitant exactement un nœud de chaque groupe de ``mask`` et se terminant
+    sur ``j``. Les sous-ensembles d'un même cardinal sont traités d'un seul bloc.
+
+    Args:
+        weights (np.ndarray): matrice augmentée (départ, nœuds 1 à n, fin)
+        n (int): nombre de nœuds entre le départ et la fin
+        groups (List[int], optional): groupe de chaque nœud ; un seul nœud par
+            groupe est visité (par défaut, chaque nœud forme son propre groupe)
+        deadline (float, optional): échéance (time.perf_counter) au-delà de laquelle
+            le calcul est abandonné
+
+    Returns:
+        Optional[Tuple[List[int], float]]: le chemin (départ, nœuds, fin) et sa longueur,
+        ou None si l'échéance est dépassée
+    """
+    end = n + 1
+    if n == 0:
+        return [0, end], float(weights[0, end])
+    group_of = np.arange(n) if groups is None else np.asarray(groups)
+    n_groups = int(group_of.max()) + 1
+    between = weights[1:end, 1:end]
+    size = 1 << n_groups
+    masks = np.arange(size)
+    cardinal = np.zeros(size, dtype=np.int8)
+    for bit in range(n_groups):
+        cardinal += ((masks >> bit) & 1).astype(np.int8)
+
+    best = np.full((size, n), inf)
+    parent = np.full((size, n), -1, dtype=np.int16)
+    best[1 << group_of, np.arange(n)] = weights[0, 1:end]
+
+    for card in range(2, n_groups + 1):
+        layer = masks[cardinal == card]
+        for j in range(n):
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            bit = 1 << int(group_of[j])
+            subsets = layer[layer & bit != 0]
+            candidates = best[subsets ^ bit] + between[:, j]
+            choice = candidates.argmin(axis=1)
+            best[subsets, j] = candidates[np.arange(len(subsets)), choice]
+            parent[subsets, j] = choice
+
+    totals = best[size - 1] + weights[1:end, end]
+    last = int(totals.argmin())
+    path = []
+    mask, j = size - 1, last
+    while j != -1:
+        path.append(j + 1)
+        previous = int(parent[mask, j])
+        mask ^= 1 << int(group_of[j])
+        j = previous
+    return [0] + path[::-1] + [end], float(totals[last])
+
+# ==============================================================
+# Séparation et évaluation
+# ==============================================================
+def branch_and_bound(weights: np.ndarray, n: int, incumbent: List[int], incumbent_cost: float, deadline: float):
+    """Recherche exacte en profondeur avec élagage, interrompue à l'échéance.
+
+    La borne d'un nœud ajoute au coût partiel l'arête entrante minimale de
+    chaque article restant et la sortie minimale parmi eux.
+
+    Returns:
+        Tuple[List[int], float, float]: le meilleur chemin, sa longueur et la
+        borne inférieure prouvée (égale à la longueur si la recherche a abouti)
+    """
+    end = n + 1
+    w = weights.tolist()
+    incoming = weights[:end, :end].copy()
+    np.fill_diagonal(incoming, inf)
+    min_in = incoming.min(axis=0).tolist()
+    root_bound = _root_lower_bound(weights, n)
+
+    best_path, best_cost = list(incumbent), incumbent_cost
+    remaining = set(range(1, end))
+    path = [0]
+    explored = 0
+    aborted = False
+
+    def explore(current: int, cost: float, bound_rest: float) -> None:
+        nonlocal best_path, best_cost, explored, aborted
+        explored += 1
+        if explored & 1023 == 0 and time.perf_counter() > deadline:
+            aborted = True
+        if aborted:
+            return
+        if not remaining:
+            total = cost + w[current][end]
+            if total < best_cost:
+                best_cost, best_path = total, path + [end]
+            return
+        exit_cost = min(w[v][end] for v in remaining)
+        if cost + bound_rest + exit_cost >= best_cost:
+            return
+        row = w[current]
+        for nxt in sorted(remaining, key=row.__getitem__):
+            step = cost + row[nxt]
+            if step + bound_rest - min_in[nxt] >= best_cost:
+                continue
+            remaining.discard(nxt)
+            path.append(nxt)
+            explore(nxt, step, bound_rest - min_in[nxt])
+            path.pop()
+            remaining.add(nxt)
+            if aborted:
+                return
+
+    explore(0, 0.0, sum(min_in[v] for v in remaining))
+    return best_path, best_cost, (root_bound if aborted else best_cost)
+
+# ==============================================================
+# Recherche locale
+# ==============================================================
+def _nearest_neighbor(weights: np.ndarray, n: int) -> List[int]:
+    """Chemin glouton : l'article le plus proche à chaque étape."""
+    w = weights.tolist()
+    path = [0]
+    remaining = set(range(1, n + 1))
+    while remaining:
+        row = w[path[-1]]
+        nxt = min(remaining, key=row.__getitem__)
+        path.append(nxt)
+        remaining.discard(nxt)
+    return path + [n + 1]
+
+def local_search(weights: np.ndarray, n: int, path: List[int], deadline: float) -> List[int]:
+    """Améliore un chemin par 2-opt et Or-opt jusqu'à l'optimum local ou l'échéance.
+
+    Le départ et le nœud fictif de fin restent aux extrémités.
+    """
+    w = weights.tolist()
+    path = list(path)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = _two_opt_pass(w, path) or _or_opt_pass(w, path)
+    return path
+
+def _two_opt_pass(w, path: List[int]) -> bool:
+    """Inverse le premier segment dont l'inversion raccourcit le chemin."""
+    last = len(path) - 1
+    for i in range(1, last - 1):
+        a, b = path[i - 1], path[i]
+        for j in range(i + 1, last):
+            c, d = path[j], path[j + 1]
+            if w[a][c] + w[b][d] < w[a][b] + w[c][d] - 1e-9:
+                path[i:j + 1] = path[i:j + 1][::-1]
+                return True
+    return False
+
+def _or_opt_pass(w, path: List[int]) -> bool:
+    """Déplace le premier bloc de 1 à 3 articles dont le déplacement raccourcit le chemin."""
+    last = len(path) - 1
+    for length in (1, 2, 3):
+        for i in range(1, last - length + 1):
+            j = i + length - 1
+            prev, first, final, nxt = path[i - 1], path[i], path[j], path[j + 1]
+            removed = w[prev][first] + w[final][nxt] - w[prev][nxt]
+            for k in range(last):
+                if i - 1 <= k <= j:
+                    continue
+                a, b = path[k], path[k + 1]
+                if w[a][first] + w[final][b] - w[a][b] < removed - 1e-9:
+                    segment = path[i:j + 1]
+                    rest = path[:i] + path[j + 1:]
+                    position = k + 1 if k < i else k + 1 - length
+                    path[:] = rest[:position] + segment + rest[position:]
+                    return True
+    return False
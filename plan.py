@@ -0,0 +1,326 @@
+# ==============================================================
+# Plan compilé du magasin (cache des plans JSON)
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Un plan JSON n'est analysé qu'une seule fois : le résultat (grille
+# d'obstacles, entrée, caisses, index des produits, accès aux rayons) est
+# gardé en mémoire tant que le fichier ne change pas, et enregistré à côté
+# du JSON au format .npz pour les lancements suivants. Le plan en cours
+# d'édition (CellStore de l'éditeur) se compile directement, sans JSON.
+# La grille d'obstacles est aussi enregistrée à part (.obstacles.npy) et
+# projetée en mémoire pour le calcul des parcours : sur les très grands
+# plans, ses pages sont lues à la demande et partagées entre processus, et
+# le plan chargé depuis son .npz ne reconstruit pas la grille en mémoire.
+#
+# Les tables de distances des repères de l'heuristique ALT (voir
+# algorithm.Landmarks) sont un prétraitement facultatif : calculées par
+# prepare_landmarks, enregistrées à côté du plan (.landmarks.npz) avec
+# l'empreinte du plan compilé, et attachées à la grille de recherche tant
+# que cette empreinte est celle du plan chargé.
+#
+# Utilisation : python plan.py plan.json   (calcul des repères d'un plan)
+
+import hashlib
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import algorithm
+from cells import CELL_TYPES, CellStore # Codes des types de cases (indice dans CELL_TYPES)
+from planjson import PlanJsonReader
+import planbin
+from products import ProductIndex
+
+NPZ_VERSION = 1 # Version du format .npz
+OBSTACLE_TYPES = ("Rayon", "Mur") # Types de cases infranchissables
+MAX_CACHED_PLANS = 8 # Nombre de plans gardés en mémoire
+
+class CompiledPlan:
+    """Plan du magasin prêt pour le calcul de parcours."""
+
+    def __init__(self, grid_size: int, rows: np.ndarray, cols: np.ndarray, types: np.ndarray,
+                 categories: np.ndarray, products: np.ndarray, shape: Optional[Tuple[int, int]] = None,
+                 search: Optional["algorithm.SearchGrid"] = None):
+        """Construit le plan à partir des colonnes des cases.
+
+        Args:
+            grid_size (int): taille des cases en pixels
+            rows, cols (np.ndarray): coordonnées de chaque case
+            types (np.ndarray): code du type de chaque case (indice dans CELL_TYPES)
+            categories, products (np.ndarray): catégorie et produit de chaque case ("" si aucun)
+            shape (Tuple[int, int], optional): dimensions de la grille (déduites des cases sinon)
+            search (SearchGrid, optional): grille de recherche sur la grille d'obstacles projetée
+                en mémoire (voir algorithm.open_obstacle_grid) : la grille n'est alors pas
+                recopiée en mémoire, ``grid`` est une vue sur le fichier
+        """
+        self.grid_size = grid_size
+        self.rows, self.cols, self.types = rows, cols, types
+        self.categories, self.products = categories, products
+
+        if shape is None:
+            shape = (int(rows.max()) + 1, int(cols.max()) + 1) if len(rows) else (0, 0)
+        self._mapped = search if search is not None and search.grid.shape == tuple(shape) else None
+        if self._mapped is not None:
+            self.grid = self._mapped.grid
+        else:
+            self.grid = np.zeros(shape, dtype=np.uint8)
+            obstacles = np.isin(types, [CELL_TYPES.index(t) for t in OBSTACLE_TYPES])
+            self.grid[rows[obstacles], cols[obstacles]] = 1
+
+        entries = np.nonzero(types == CELL_TYPES.index("Entrée"))[0]
+        self.entry = (int(rows[entries[-1]]), int(cols[entries[-1]])) if len(entries) else None
+        checkouts = np.nonzero(types == CELL_TYPES.index("Caisse"))[0]
+        self.caisses = [(int(rows[i]), int(cols[i])) for i in checkouts]
+
+        # Index produit (nom normalisé) -> cases par type, dans l'ordre du fichier
+        self.product_index = ProductIndex()
+        for i in np.nonzero(products != "")[0]:
+            self.product_index.add(str(products[i]), CELL_TYPES[types[i]], int(rows[i]), int(cols[i]))
+
+        # Cases libres donnant accès à chaque rayon, stock et caisse
+        self.access: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for i in np.nonzero(np.isin(types, [CELL_TYPES.index(t) for t in ("Rayon", "Stock", "Caisse")]))[0]:
+            row, col = int(rows[i]), int(cols[i])
+            self.access[(row, col)] = algorithm.find_accessible_neighbors(self.grid, row, col)
+
+        self._search = None
+        self._cells = None
+        self._fingerprint: Optional[str] = None
+        self.obstacles_path: Optional[str] = None # Grille d'obstacles enregistrée (.npy), si elle l'a été
+        self.landmarks_path: Optional[str] = None # Tables des repères (heuristique ALT), si calculées
+
+    @property
+    def search(self) -> "algorithm.SearchGrid":
+        """Grille aplatie pour A* (construite une fois, avec son cache de distances et
+        les tables des repères si elles ont été calculées)"""
+        if self._search is not None:
+            return self._search
+        self._search = self._mapped if self._mapped is not None else algorithm.SearchGrid(self.grid)
+        if self.landmarks_path is not None:
+            try:
+                landmarks = algorithm.Landmarks.load(self.landmarks_path)
+                # Tables d'un autre plan (ou d'une version précédente) : ignorées
+                if landmarks.fingerprint == self.fingerprint and landmarks.tables.shape[1] == self._search.size:
+                    self._search.landmarks = landmarks
+            except (OSError, ValueError) as e:
+                print(f"Tables des repères illisibles, ignorées : {e}")
+        return self._search
+
+    def build_landmarks(self, landmarks_path: Optional[str] = None) -> "algorithm.Landmarks":
+        """Calcule les tables de distances des repères et les attache à la grille de recherche.
+
+        Args:
+            landmarks_path (str, optional): fichier .npz où les enregistrer
+
+        Returns:
+            algorithm.Landmarks: les repères calculés
+        """
+        search = self.search
+        landmarks = algorithm.Landmarks.build(search, algorithm.choose_landmarks(search, self.entry, self.caisses))
+        landmarks.fingerprint = self.fingerprint
+        if landmarks_path is not None:
+            landmarks.save(landmarks_path)
+            self.landmarks_path = landmarks_path
+        search.landmarks = landmarks
+        return landmarks
+
+    @property
+    def fingerprint(self) -> str:
+        """Empreinte de ce qui détermine un parcours : grille d'obstacles, entrée et caisses (voir routecache.py)"""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(np.array(self.grid.shape, dtype=np.int64).tobytes())
+            # Par blocs de lignes : une grille projetée en mémoire n'est jamais recopiée en entier
+            block = max(1, (1 << 20) // max(self.grid.shape[1], 1))
+            for start in range(0, self.grid.shape[0], block):
+                digest.update(np.ascontiguousarray(self.grid[start:start + block], dtype=np.uint8).tobytes())
+            digest.update(repr((self.entry, self.caisses)).encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def shopping_candidates(self, shopping_list: List[str], allowed_types=("Rayon",), substitutions=None):
+        """Cases candidates de chaque article d'une liste de courses, et articles introuvables
+        (voir algorithm.resolve_shopping_candidates)."""
+        return algorithm.resolve_shopping_candidates(self.product_index, shopping_list, self.grid, allowed_types,
+                                                     self.access, substitutions)
+
+    @property
+    def cells(self) -> List[dict]:
+        """Cases au format du JSON d'origine"""
+        if self._cells is None:
+            self._cells = []
+            for row, col, typ, category, product in zip(
+                    self.rows.tolist(), self.cols.tolist(), self.types.tolist(),
+                    self.categories.tolist(), self.products.tolist()):
+                cell = {"row": row, "col": col, "type": CELL_TYPES[typ]}
+                if CELL_TYPES[typ] in ("Rayon", "Stock"):
+                    cell["object"] = {"category": category, "product": product} if product else None
+                self._cells.append(cell)
+        return self._cells
+
+    @classmethod
+    def from_store(cls, store: CellStore, grid_size: int) -> "CompiledPlan":
+        """Compile le plan en cours d'édition, directement depuis le modèle des cases.
+
+        Args:
+            store (CellStore): le modèle des cases de l'éditeur
+            grid_size (int): taille des cases en pixels
+        """
+        rows, cols = np.nonzero(store.types)
+        types = store.types[rows, cols] - 1 # Codes du modèle (0 = vide) -> indices dans CELL_TYPES
+        categories = np.full(len(rows), "", dtype=object)
+        products = np.full(len(rows), "", dtype=object)
+        if store.objects:
+            position = {cell: i for i, cell in enumerate(zip(rows.tolist(), cols.tolist()))}
+            for cell, obj in store.objects.items():
+                i = position.get(cell)
+                if i is not None:
+                    categories[i], products[i] = obj["category"], obj["product"]
+        return cls(grid_size, rows.astype(np.int32), cols.astype(np.int32), types,
+                   categories.astype(str), products.astype(str), store.types.shape)
+
+    def to_store(self) -> CellStore:
+        """Modèle des cases du plan, pour l'afficher dans l'éditeur ou la vue client."""
+        store = CellStore(*self.grid.shape)
+        store.types[self.rows, self.cols] = self.types + 1
+        for i in np.nonzero(self.products != "")[0]:
+            store.set_object(int(self.rows[i]), int(self.cols[i]), str(self.categories[i]), str(self.products[i]))
+        return store
+
+    def save_npz(self, npz_path: str, source_stamp: Tuple[int, int]) -> None:
+        """Enregistre le plan compilé au format .npz."""
+        with algorithm.replace_file(npz_path) as f:
+            np.savez(f, version=NPZ_VERSION, stamp=np.array(source_stamp, dtype=np.int64),
+                     grid_size=self.grid_size, shape=np.array(self.grid.shape),
+                     rows=self.rows, cols=self.cols, types=self.types,
+                     categories=self.categories, products=self.products)
+
+    def save_obstacles(self, obstacles_path: str) -> None:
+        """Enregistre la grille d'obstacles (.npy projetable en mémoire, voir algorithm.open_obstacle_grid)."""
+        algorithm.save_obstacle_grid(obstacles_path, self.grid)
+        self.obstacles_path = obstacles_path
+
+    @classmethod
+    def load_npz(cls, npz_path: str, source_stamp: Tuple[int, int],
+                 search: Optional["algorithm.SearchGrid"] = None) -> Optional["CompiledPlan"]:
+        """Charge un plan compilé .npz, ou None s'il est absent ou périmé
+        (``search`` : grille d'obstacles projetée en mémoire, voir __init__)."""
+        try:
+            with np.load(npz_path, allow_pickle=False) as data:
+                if int(data["version"]) != NPZ_VERSION or tuple(data["stamp"].tolist()) != tuple(source_stamp):
+                    return None
+                return cls(int(data["grid_size"]), data["rows"], data["cols"], data["types"],
+                           data["categories"], data["products"], tuple(data["shape"].tolist()), search)
+        except (OSError, KeyError, ValueError):
+            return None
+
+# ==============================================================
+# Cache
+# ==============================================================
+def npz_path_for(json_path: str) -> str:
+    """Chemin du fichier .npz associé à un plan JSON"""
+    return os.path.splitext(json_path)[0] + ".npz"
+
+def obstacles_path_for(json_path: str) -> str:
+    """Chemin de la grille d'obstacles associée à un plan JSON"""
+    return os.path.splitext(json_path)[0] + ".obstacles.npy"
+
+def landmarks_path_for(json_path: str) -> str:
+    """Chemin des tables des repères associées à un plan JSON (ou binaire .mtp)"""
+    return os.path.splitext(json_path)[0] + ".landmarks.npz"
+
+def _is_fresh(derived_path: str, source_path: str) -> bool:
+    """Indique si un fichier dérivé (grille d'obstacles) a été écrit avec sa source actuelle (ou après)."""
+    try:
+        return os.stat(derived_path).st_mtime_ns >= os.stat(source_path).st_mtime_ns
+    except OSError:
+        return False
+
+def prepare_landmarks(json_path: str) -> str:
+    """Calcule et enregistre les tables des repères d'un plan (prétraitement facultatif).
+
+    Args:
+        json_path (str): chemin du plan JSON (ou binaire .mtp)
+
+    Returns:
+        str: le chemin du fichier .landmarks.npz écrit
+    """
+    landmarks_path = landmarks_path_for(json_path)
+    load_plan(json_path).build_landmarks(landmarks_path)
+    return landmarks_path
+
+def load_plan(json_path: str, use_npz: bool = True) -> CompiledPlan:
+    """Renvoie le plan compilé d'un fichier JSON (ou binaire .mtp), depuis le cache si possible.
+
+    Le cache est indexé par chemin, date de modification et taille du fichier :
+    un plan modifié sur le disque est automatiquement recompilé.
+
+    Args:
+        json_path (str): chemin du plan JSON
+        use_npz (bool, optional): lire et écrire la forme compilée .npz (et la grille
+            d'obstacles .obstacles.npy) à côté du JSON
+    """
+    stat = os.stat(json_path)
+    return _load_plan(os.path.abspath(json_path), stat.st_mtime_ns, stat.st_size, use_npz)
+
+@lru_cache(maxsize=MAX_CACHED_PLANS)
+def _load_plan(json_path: str, mtime_ns: int, size: int, use_npz: bool) -> CompiledPlan:
+    """Compile un plan (une fois par version du fichier)."""
+    compiled = _compile_plan(json_path, (mtime_ns, size), use_npz)
+    # Repères calculés pour ce plan (empreinte vérifiée au chargement, voir CompiledPlan.search)
+    landmarks_path = landmarks_path_for(json_path)
+    if os.path.isfile(landmarks_path):
+        compiled.landmarks_path = landmarks_path
+    return compiled
+
+def _compile_plan(json_path: str, stamp: Tuple[int, int], use_npz: bool) -> CompiledPlan:
+    """Compile un plan, depuis son .npz s'il est à jour."""
+    if json_path.endswith(planbin.EXTENSION):
+        # Plan binaire : déjà compact, pas besoin de .npz
+        store, grid_size = planbin.read_plan_binary(json_path)
+        return CompiledPlan.from_store(store, grid_size)
+
+    npz_path = npz_path_for(json_path)
+    obstacles_path = obstacles_path_for(json_path)
+    if use_npz:
+        # Grille d'obstacles projetée en mémoire : la grille n'est pas reconstruite en RAM
+        search = None
+        if _is_fresh(obstacles_path, npz_path):
+            try:
+                search = algorithm.open_obstacle_grid(obstacles_path)
+            except (OSError, ValueError) as e:
+                print(f"Grille d'obstacles illisible, recalculée : {e}")
+        compiled = CompiledPlan.load_npz(npz_path, stamp, search)
+        if compiled is not None:
+            if search is not None and compiled.grid is search.grid:
+                compiled.obstacles_path = obstacles_path
+            return compiled
+
+    # Lecture au fil de l'eau : le document JSON n'est jamais entièrement en mémoire
+    with PlanJsonReader.open(json_path) as reader:
+        store = CellStore.from_cells(reader.cells())
+    compiled = CompiledPlan.from_store(store, reader.grid_size or 50)
+    if use_npz:
+        try:
+            compiled.save_npz(npz_path, stamp)
+            compiled.save_obstacles(obstacles_path) # Après le .npz : voir _is_fresh
+        except OSError as e:
+            print(f"Impossible d'enregistrer le plan compilé : {e}")
+    return compiled
+
+def clear_cache() -> None:
+    """Vide le cache des plans compilés en mémoire."""
+    _load_plan.cache_clear()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Utilisation : python plan.py plan.json")
+        sys.exit(1)
+    output = prepare_landmarks(sys.argv[1])
+    landmarks = load_plan(sys.argv[1]).search.landmarks
+    print(f"{len(landmarks.points)} repères {landmarks.points} -> {output} ({os.path.getsize(output)} octets)")
@@ -0,0 +1,164 @@
+# ==============================================================
+# Format binaire compact des plans (.mtp)
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Un plan JSON répète les clés "row", "col", "type" pour chaque case. Le
+# format .mtp stocke la grille des types (codes de cells.CELL_TYPES) codée
+# par plages, une table des noms de produits et de catégories, puis les
+# objets posés sur les rayons sous forme de colonnes d'entiers ; le tout est
+# compressé avec zlib.
+#
+# En-tête (non compressé, petit-boutiste) :
+#   "MTPL", version (u16), grid_size (u16), lignes (u32), colonnes (u32)
+# Corps (zlib) :
+#   nombre de plages (u32), valeurs (u8[]), longueurs (u32[])
+#   nombre de chaînes (u32), taille de la table (u32), chaînes UTF-8 séparées par \0
+#   nombre d'objets (u32), lignes, colonnes, catégories, produits (u32[] chacun)
+#
+# Utilisation : python planbin.py plan.json [plan.mtp]   (conversion d'un plan JSON)
+
+import os
+import struct
+import sys
+import zlib
+from typing import Tuple
+
+import numpy as np
+
+from cells import CellStore
+
+MAGIC = b"MTPL"
+VERSION = 1 # Version du format .mtp
+EXTENSION = ".mtp"
+HEADER = struct.Struct("<4sHHII")
+COUNT = struct.Struct("<I")
+
+def write_plan_binary(path_or_buffer, store: CellStore, grid_size: int) -> None:
+    """Enregistre un plan au format binaire .mtp.
+
+    Args:
+        path_or_buffer (str | flux binaire): fichier de destination
+        store (CellStore): le modèle des cases
+        grid_size (int): taille des cases en pixels
+    """
+    rows, cols = store.types.shape
+
+    # Grille des types codée par plages (suites de cases identiques, ligne par ligne)
+    flat = store.types.ravel()
+    starts = np.flatnonzero(np.diff(flat)) + 1 if flat.size else np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], starts)) if flat.size else starts
+    lengths = np.diff(np.append(starts, flat.size)).astype("<u4")
+    values = flat[starts].astype(np.uint8)
+
+    # Table des chaînes et objets
+    strings, index = [], {}
+    def string_id(text):
+        if text not in index:
+            index[text] = len(strings)
+            strings.append(text)
+        return index[text]
+    cells = sorted(store.objects)
+    objects = np.array([(row, col, string_id(store.objects[(row, col)]["category"]),
+                         string_id(store.objects[(row, col)]["product"])) for row, col in cells],
+                       dtype="<u4").reshape(-1, 4)
+    table = "\0".join(strings).encode("utf-8")
+
+    body = b"".join((
+        COUNT.pack(len(values)), values.tobytes(), lengths.tobytes(),
+        COUNT.pack(len(strings)), COUNT.pack(len(table)), table,
+        COUNT.pack(len(objects)), objects.T.copy().tobytes(),
+    ))
+    data = HEADER.pack(MAGIC, VERSION, grid_size, rows, cols) + zlib.compress(body, 6)
+    if hasattr(path_or_buffer, "write"):
+        path_or_buffer.write(data)
+    else:
+        with open(path_or_buffer, "wb") as f:
+            f.write(data)
+
+def read_plan_binary(path_or_buffer, with_objects: bool = True) -> Tuple[CellStore, int]:
+    """Charge un plan au format binaire .mtp.
+
+    Args:
+        path_or_buffer (str | flux binaire): fichier à lire
+        with_objects (bool, optional): False pour ne lire que les types (calcul de la grille)
+
+    Returns:
+        Tuple[CellStore, int]: le modèle des cases et la taille des cases en pixels
+
+    Raises:
+        ValueError: si le fichier n'est pas un plan .mtp valide ou d'une version inconnue
+    """
+    if hasattr(path_or_buffer, "read"):
+        data = path_or_buffer.read()
+    else:
+        with open(path_or_buffer, "rb") as f:
+            data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError("Fichier de plan binaire invalide : en-tête incomplet")
+    magic, version, grid_size, rows, cols = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Fichier de plan binaire invalide : signature inconnue")
+    if version != VERSION:
+        raise ValueError(f"Version de plan binaire non prise en charge : {version}")
+    try:
+        body = zlib.decompress(data[HEADER.size:])
+    except zlib.error as e:
+        raise ValueError(f"Fichier de plan binaire corrompu : {e}")
+
+    offset = 0
+    def take(count, dtype):
+        nonlocal offset
+        array = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+    def take_count():
+        return int(take(1, "<u4")[0])
+
+    try:
+        n_runs = take_count()
+        values = take(n_runs, np.uint8)
+        lengths = take(n_runs, "<u4")
+        n_strings = take_count()
+        table_size = take_count()
+        strings = body[offset:offset + table_size].decode("utf-8").split("\0") if n_strings else []
+        offset += table_size
+        n_objects = take_count()
+        objects = take(4 * n_objects, "<u4").reshape(4, n_objects)
+    except ValueError as e:
+        raise ValueError(f"Fichier de plan binaire corrompu : {e}")
+    if int(lengths.sum(dtype=np.int64)) != rows * cols or len(strings) != n_strings:
+        raise ValueError("Fichier de plan binaire corrompu : dimensions incohérentes")
+
+    store = CellStore()
+    store.types = np.repeat(values, lengths).reshape(rows, cols)
+    if with_objects:
+        object_rows, object_cols, categories, products = (column.tolist() for column in objects)
+        store.objects = {(row, col): {"category": strings[category], "product": strings[product]}
+                         for row, col, category, product in zip(object_rows, object_cols, categories, products)}
+    return store, grid_size
+
+def convert_json_to_binary(json_path: str, binary_path: str = None) -> str:
+    """Convertit un plan JSON au format binaire .mtp.
+
+    Args:
+        json_path (str): le plan JSON
+        binary_path (str, optional): le fichier .mtp (à côté du JSON par défaut)
+
+    Returns:
+        str: le chemin du fichier .mtp écrit
+    """
+    from planjson import PlanJsonReader
+    binary_path = binary_path or os.path.splitext(json_path)[0] + EXTENSION
+    with PlanJsonReader.open(json_path) as reader:
+        store = CellStore.from_cells(reader.cells())
+    write_plan_binary(binary_path, store, reader.grid_size or 50)
+    return binary_path
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Utilisation : python planbin.py plan.json [plan.mtp]")
+        sys.exit(1)
+    output = convert_json_to_binary(*sys.argv[1:])
+    print(f"{sys.argv[1]} ({os.path.getsize(sys.argv[1])} octets) -> {output} ({os.path.getsize(output)} octets)")
@@ -0,0 +1,199 @@
+# ==============================================================
+# Lecture et écriture en continu des plans JSON
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Les plans de plusieurs étages dépassent la dizaine de Mo : les cases sont
+# écrites par lots et relues au fil de l'eau, morceau par morceau, sans
+# jamais construire tout le document en mémoire. Le format est inchangé
+# ({"grid_size": ..., "cells": [...]}, ou une simple liste de cases).
+
+import codecs
+import json
+import os
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+CHUNK_SIZE = 1 << 16 # Taille des morceaux lus (octets)
+BATCH_SIZE = 2000 # Cases encodées d'un coup à l'écriture
+
+ProgressCallback = Callable[[int, int], None] # (fait, total) ; total = 0 s'il est inconnu
+
+def write_plan_json(stream, grid_size: int, cells: Iterable[dict], total: int = 0,
+                    compact: bool = False, progress: Optional[ProgressCallback] = None) -> None:
+    """Écrit un plan JSON par lots de cases.
+
+    Args:
+        stream: flux texte ouvert en écriture
+        grid_size (int): taille des cases en pixels
+        cells (Iterable[dict]): les cases, au format du JSON de quadrillage
+        total (int, optional): nombre de cases (pour le suivi)
+        compact (bool, optional): sans indentation ni espaces (fichier bien plus petit)
+        progress (ProgressCallback, optional): appelée après chaque lot avec (cases écrites, total)
+    """
+    if compact:
+        stream.write(f'{{"grid_size":{json.dumps(grid_size)},"cells":[')
+    else:
+        # Même présentation que json.dump(..., indent=2)
+        stream.write(f'{{\n  "grid_size": {json.dumps(grid_size)},\n  "cells": [')
+
+    done = 0
+    iterator = iter(cells)
+    while True:
+        batch = list(islice(iterator, BATCH_SIZE))
+        if not batch:
+            break
+        # Un lot est encodé d'un coup puis débarrassé de ses crochets
+        if compact:
+            text = json.dumps(batch, ensure_ascii=False, separators=(",", ":"))[1:-1]
+            stream.write(text if done == 0 else "," + text)
+        else:
+            text = json.dumps(batch, indent=2, ensure_ascii=False)[2:-2].replace("\n", "\n  ")
+            stream.write(("\n  " if done == 0 else ",\n  ") + text)
+        done += len(batch)
+        if progress is not None:
+            progress(done, max(total, done))
+
+    if compact:
+        stream.write("]}")
+    else:
+        stream.write("\n  ]\n}" if done else "]\n}")
+    if progress is not None and done == 0:
+        progress(0, 0)
+
+class PlanJsonReader:
+    """Lecteur en continu d'un plan JSON.
+
+    Les cases sont décodées une par une à mesure que le fichier est lu ;
+    ``grid_size`` est connu dès qu'il a été lu (avant les cases dans les
+    fichiers écrits par l'application).
+    """
+
+    def __init__(self, stream, total: int = 0, progress: Optional[ProgressCallback] = None,
+                 chunk_size: int = CHUNK_SIZE):
+        """Prépare la lecture.
+
+        Args:
+            stream: flux ouvert en lecture, binaire (UTF-8) ou texte
+            total (int, optional): taille du flux (pour le suivi)
+            progress (ProgressCallback, optional): appelée après chaque morceau lu avec (lu, total)
+            chunk_size (int, optional): taille des morceaux lus
+        """
+        self.grid_size: Optional[int] = None
+        self._stream = stream
+        self._total = total
+        self._progress = progress
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._read = 0
+        self._eof = False
+
+    @classmethod
+    def open(cls, path: str, progress: Optional[ProgressCallback] = None) -> "PlanJsonReader":
+        """Ouvre un fichier de plan (à fermer avec close())."""
+        return cls(open(path, "rb"), os.path.getsize(path), progress)
+
+    def close(self) -> None:
+        """Ferme le flux lu."""
+        self._stream.close()
+
+    def __enter__(self) -> "PlanJsonReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _fill(self) -> bool:
+        """Lit le morceau suivant ; False à la fin du flux."""
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if isinstance(chunk, bytes):
+            self._read += len(chunk)
+            text = self._utf8.decode(chunk, final=not chunk)
+        else:
+            self._read += len(chunk.encode("utf-8"))
+            text = chunk
+        if not chunk:
+            self._eof = True
+        # Oublie ce qui a déjà été décodé
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        if self._progress is not None:
+            self._progress(self._read, self._total)
+        return bool(chunk)
+
+    def _skip_whitespace(self) -> str:
+        """Avance jusqu'au prochain caractère significatif et le renvoie ("" à la fin)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        """Consomme le caractère attendu."""
+        if self._skip_whitespace() != char:
+            raise ValueError(f"JSON de plan invalide : '{char}' attendu à l'octet {self._read}")
+        self._pos += 1
+
+    def _value(self):
+        """Décode la valeur JSON suivante, en lisant d'autres morceaux si elle est incomplète."""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # Un nombre coupé en fin de morceau se décode sans erreur : on s'assure qu'il est complet
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _array(self) -> Iterator:
+        """Décode les éléments d'un tableau un par un."""
+        self._expect("[")
+        if self._skip_whitespace() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            char = self._skip_whitespace()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"JSON de plan invalide : ',' ou ']' attendu à l'octet {self._read}")
+
+    def cells(self) -> Iterator[dict]:
+        """Décode les cases une par une (grid_size est rempli au passage)."""
+        if self._skip_whitespace() == "[":
+            yield from self._array()
+            return
+
+        self._expect("{")
+        if self._skip_whitespace() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "cells":
+                yield from self._array()
+            else:
+                value = self._value()
+                if key == "grid_size":
+                    self.grid_size = value
+            char = self._skip_whitespace()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"JSON de plan invalide : ',' ou '}}' attendu à l'octet {self._read}")
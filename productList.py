@@ -0,0 +1,317 @@
+# ==============================================================
+# Liste des produits (modèle Qt filtré et vue avec drag & drop)
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Les produits sont gardés dans un catalogue rangé en colonnes
+# (products.ProductCatalog) affiché par un modèle Qt : filtrer la liste
+# masque des lignes (ProductFilterProxyModel) au lieu de recréer les
+# éléments. Les lignes à garder sont calculées par l'index de recherche du
+# catalogue, puis le modèle filtré ne fait que renvoyer vers elles. Un
+# QSortFilterProxyModel rappellerait Python pour chacune des lignes à
+# chaque frappe (environ 50 ms pour 50 000 produits, même sans résultat).
+#
+# Quand aucun nom ne contient le texte cherché, la liste propose les noms
+# qui lui ressemblent (fautes de frappe, pluriels), du plus proche au moins
+# proche (voir ProductCatalog.similar).
+#
+# Le modèle filtré ne présente ses lignes à la vue que par paquets de
+# FETCH_SIZE (canFetchMore / fetchMore) : la vue en demande d'autres quand
+# on fait défiler la liste jusqu'en bas.
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from PyQt6.QtCore import (
+    QAbstractListModel, QAbstractProxyModel, QMimeData, QModelIndex, Qt, QTimer
+)
+from PyQt6.QtGui import QDrag
+from PyQt6.QtWidgets import QListView
+
+from products import ProductCatalog, normalize_name
+
+ALL_CATEGORIES = "Toutes les catégories" # Entrée du filtre sans catégorie
+SEARCH_DELAY_MS = 200 # Délai entre la dernière frappe et la recherche
+FETCH_SIZE = 500 # Lignes présentées à la vue à chaque fetchMore
+
+CategoryRole = Qt.ItemDataRole.UserRole + 1 # Catégorie d'une ligne
+
+class ProductListModel(QAbstractListModel):
+    """Produits d'un catalogue affichés par leur nom, dans l'ordre d'ajout."""
+
+    def __init__(self, parent=None):
+        """Initialise une liste vide."""
+        super().__init__(parent)
+        self.catalog = ProductCatalog()
+        self._numbers = array("I") # Numéro dans le catalogue de chaque ligne (croissant)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._numbers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        category, name = self.catalog.product(self._numbers[index.row()])
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == CategoryRole:
+            return category
+        return None
+
+    def rows(self, numbers: List[int]) -> List[int]:
+        """Lignes des produits de numéros donnés (croissants), dans l'ordre de la liste."""
+        if len(self._numbers) == len(self.catalog.names): # Aucun produit retiré : ligne = numéro
+            return numbers
+        return np.searchsorted(np.frombuffer(self._numbers, dtype=np.uintc), numbers).tolist()
+
+    def product(self, row: int) -> Tuple[str, str]:
+        """(catégorie, nom) du produit d'une ligne."""
+        return self.catalog.product(self._numbers[row])
+
+    def closest(self, name: str) -> Optional[Tuple[str, str]]:
+        """(catégorie, nom) du produit le plus proche d'un nom (exact ou approché), ou None."""
+        number = self.catalog.find_name(name)
+        if number is None:
+            matches = self.catalog.similar(name, limit=1)
+            number = matches[0][0] if matches else None
+        return None if number is None else self.catalog.product(number)
+
+    def contains(self, category: str, name: str) -> bool:
+        """Indique si un produit est dans la liste (sans casse)."""
+        return self.catalog.find(category, name) is not None
+
+    def set_catalog(self, catalog: ProductCatalog) -> None:
+        """Affiche un autre catalogue."""
+        self.beginResetModel()
+        self.catalog = catalog
+        self._numbers = array("I", catalog.numbers())
+        self.endResetModel()
+
+    def set_products(self, products: Iterable[Tuple[str, str]]) -> None:
+        """Remplace tous les produits."""
+        self.set_catalog(ProductCatalog(products))
+
+    def add_product(self, category: str, name: str) -> bool:
+        """Ajoute un produit en fin de liste (False s'il y est déjà)."""
+        if self.contains(category, name):
+            return False
+        row = len(self._numbers)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._numbers.append(self.catalog.add(category, name))
+        self.endInsertRows()
+        return True
+
+    def remove_row(self, row: int) -> None:
+        """Retire le produit d'une ligne."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.catalog.remove(self._numbers.pop(row))
+        self.endRemoveRows()
+
+class ProductFilterProxyModel(QAbstractProxyModel):
+    """Ne montre que les produits correspondant à la recherche et à la catégorie choisies."""
+
+    def __init__(self, source: ProductListModel, parent=None):
+        """Filtre ``source`` (aucun filtre au départ)."""
+        super().__init__(parent)
+        self.text = ""
+        self.category: Optional[str] = None
+        self._rows = None # Lignes du modèle source gardées (None : toutes)
+        self._positions = None # Ligne du modèle source -> ligne filtrée (calculé à la demande)
+        self._shown = 0 # Lignes déjà présentées à la vue
+        self._similar = False # Lignes proposées par ressemblance (aucun nom ne contient le texte)
+        self._removing = None # Lignes filtrées en cours de retrait (première, dernière, présentées)
+        self._inserting = False # Lignes source insérées pas encore annoncées à la vue
+        self.setSourceModel(source)
+        source.modelReset.connect(self.refresh)
+        source.rowsInserted.connect(self._source_rows_inserted)
+        source.rowsAboutToBeRemoved.connect(self._source_rows_about_to_be_removed)
+        source.rowsRemoved.connect(self._source_rows_removed)
+
+    def set_filter(self, text: str, category: Optional[str] = None, shown: int = FETCH_SIZE) -> None:
+        """Ne garde que les produits dont le nom contient ``text`` (dans ``category`` si donnée)."""
+        source = self.sourceModel()
+        self.beginResetModel()
+        self.text, self.category = text, category
+        accepted = source.catalog.search(text, category)
+        self._similar = accepted == [] and bool(text.strip())
+        if self._similar:
+            accepted = [number for number, _ in source.catalog.similar(text, category=category)]
+        self._rows = None if accepted is None else source.rows(accepted)
+        self._positions = None
+        self._shown = min(self.total(), shown)
+        self.endResetModel()
+
+    def refresh(self, *_) -> None:
+        """Recalcule le filtre (nouveau catalogue)."""
+        self.set_filter(self.text, self.category)
+
+    def _keep_shown(self) -> None:
+        """Recalcule tout le filtre, sans raccourcir la liste présentée."""
+        self.set_filter(self.text, self.category, max(self._shown + 1, FETCH_SIZE))
+
+    def _accepts(self, row: int) -> bool:
+        """Indique si le produit d'une ligne source contient le texte cherché (et est dans la catégorie)."""
+        category, name = self.sourceModel().product(row)
+        return ((self.category is None or category == self.category)
+                and normalize_name(self.text) in normalize_name(name))
+
+    def _source_rows_inserted(self, parent, first: int, last: int) -> None:
+        """Ajoute les produits insérés qui passent le filtre, sans toucher aux autres lignes
+        (la vue garde sa position et sa sélection)."""
+        count = last - first + 1
+        if self._rows is None:
+            if first <= self._shown: # Dans la partie présentée ou juste après
+                self._inserting = True # total() compte déjà les lignes : pas de fetchMore entre-temps
+                self.beginInsertRows(QModelIndex(), first, last)
+                self._shown += count
+                self._inserting = False
+                self.endInsertRows()
+            return
+        accepted = [row for row in range(first, last + 1) if self._accepts(row)]
+        if self._similar:
+            if accepted: # Un nom contient désormais le texte : les propositions ne valent plus
+                self._keep_shown()
+            else:
+                self._rows = [row + count if row >= first else row for row in self._rows]
+                self._positions = None
+            return
+        self._rows = [row + count if row >= first else row for row in self._rows]
+        self._positions = None
+        for row in accepted:
+            position = bisect_left(self._rows, row) # Lignes gardées croissantes
+            if position <= self._shown:
+                self.beginInsertRows(QModelIndex(), position, position)
+                self._rows.insert(position, row)
+                self._shown += 1
+                self.endInsertRows()
+            else:
+                self._rows.insert(position, row)
+
+    def _source_rows_about_to_be_removed(self, parent, first: int, last: int) -> None:
+        """Annonce le retrait des lignes filtrées correspondant aux lignes source retirées."""
+        if self._rows is None:
+            positions = range(first, last + 1)
+        else:
+            positions = [position for position, row in enumerate(self._rows) if first <= row <= last]
+        shown = [position for position in positions if position < self._shown]
+        if shown and shown[-1] - shown[0] + 1 != len(shown):
+            self._removing = None # Lignes non contiguës : le filtre sera recalculé
+            return
+        self._removing = (positions, shown)
+        if shown:
+            self.beginRemoveRows(QModelIndex(), shown[0], shown[-1])
+
+    def _source_rows_removed(self, parent, first: int, last: int) -> None:
+        """Retire les lignes filtrées annoncées et décale les lignes source suivantes."""
+        if self._removing is None:
+            self._keep_shown()
+            return
+        positions, shown = self._removing
+        self._removing = None
+        count = last - first + 1
+        if self._rows is not None:
+            removed = set(positions)
+            self._rows = [row - count if row > last else row
+                          for position, row in enumerate(self._rows) if position not in removed]
+            self._positions = None
+        self._shown -= len(shown)
+        if shown:
+            self.endRemoveRows()
+
+    def total(self) -> int:
+        """Nombre de produits gardés par le filtre."""
+        return self.sourceModel().rowCount() if self._rows is None else len(self._rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._shown
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._inserting and self._shown < self.total()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._inserting:
+            return
+        shown = min(self.total(), self._shown + FETCH_SIZE)
+        if shown > self._shown:
+            self.beginInsertRows(QModelIndex(), self._shown, shown - 1)
+            self._shown = shown
+            self.endInsertRows()
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self._shown) or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row() if self._rows is None else self._rows[proxy_index.row()]
+        return self.sourceModel().index(row, 0)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self._rows is not None:
+            if self._positions is None:
+                self._positions = {source_row: position for position, source_row in enumerate(self._rows)}
+            row = self._positions.get(row, self._shown)
+        return self.createIndex(row, 0) if row < self._shown else QModelIndex()
+
+class ProductListView(QListView):
+    """Liste des produits ; le nom du produit glissé est déposé sur le plan."""
+
+    def __init__(self, parent=None):
+        """Crée la liste sur un modèle filtré vide."""
+        super().__init__(parent)
+        self.source_model = ProductListModel(self)
+        self.proxy_model = ProductFilterProxyModel(self.source_model, self)
+        self.setModel(self.proxy_model)
+        self.setUniformItemSizes(True) # Pas de mesure ligne par ligne sur les grands catalogues
+        # Recherche différée : une seule recherche quand la frappe s'arrête
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+
+    def current_product(self) -> Optional[Tuple[str, str]]:
+        """(catégorie, nom) du produit sélectionné, ou None."""
+        index = self.currentIndex()
+        if not index.isValid():
+            return None
+        return self.source_model.product(self.proxy_model.mapToSource(index).row())
+
+    def remove_current(self) -> None:
+        """Retire le produit sélectionné."""
+        index = self.currentIndex()
+        if index.isValid():
+            self.source_model.remove_row(self.proxy_model.mapToSource(index).row())
+
+    def count(self) -> int:
+        """Nombre de produits gardés par le filtre (présentés ou non)."""
+        return self.proxy_model.total()
+
+    def apply_filter(self, text: str, category: str = ALL_CATEGORIES) -> None:
+        """Filtre la liste (``ALL_CATEGORIES`` pour toutes les catégories)."""
+        self.search_timer.stop()
+        self.proxy_model.set_filter(text, None if category == ALL_CATEGORIES else category)
+
+    def startDrag(self, supportedActions):
+        """Démarre le drag & drop du produit sélectionné."""
+        product = self.current_product()
+        if product is None:
+            return
+        drag = QDrag(self)
+        mime = QMimeData()
+        mime.setText(product[1])
+        drag.setMimeData(mime)
+        drag.exec(supportedActions)
@@ -0,0 +1,371 @@
+# ==============================================================
+# Index des emplacements des produits dans le plan et catalogue des produits
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+
+import sys
+import unicodedata
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+def normalize_name(name: str) -> str:
+    """Clé de comparaison d'un nom de produit : sans casse, sans accents, espaces réduits."""
+    decomposed = unicodedata.normalize("NFKD", name).casefold()
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+def normalize_names(names: Iterable[str]) -> Tuple[str, np.ndarray]:
+    """Normalise des noms d'un coup, comme normalize_name.
+
+    Returns:
+        Tuple[str, np.ndarray]: le texte normalisé (un nom par ligne) et les
+        codes de ses caractères
+    """
+    text = "\n".join(name.replace("\n", " ") for name in names)
+    text = unicodedata.normalize("NFKD", text).casefold()
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+    # Accents et espaces : seuls les caractères présents dans le texte sont examinés
+    present = np.flatnonzero(np.bincount(codes)).tolist() if codes.size else []
+    marks = [code for code in present if unicodedata.combining(chr(code))]
+    spaces = [code for code in present if code != 10 and chr(code).isspace()]
+    codes = codes[~np.isin(codes, marks)] if marks else codes.copy()
+    if spaces:
+        codes[np.isin(codes, spaces)] = 32
+    space = codes == 32
+    if space.any():
+        # Une espace n'est gardée qu'après un caractère et avant un autre caractère du même nom
+        size = codes.size
+        positions = np.arange(size)
+        following = np.minimum.accumulate(np.where(space, size, positions)[::-1])[::-1]
+        before = np.zeros(size, dtype=bool)
+        before[1:] = ~space[:-1] & (codes[:-1] != 10)
+        after = following < size
+        after[after] = codes[following[after]] != 10
+        codes = codes[~space | (before & after)]
+    return codes.tobytes().decode("utf-32-le"), codes
+
+class ProductIndex:
+    """Associe chaque produit (nom normalisé) à ses cases, rangées par type de case."""
+
+    def __init__(self):
+        """Initialise un index vide."""
+        # Nom normalisé -> type de case -> [(ordre dans le plan, ligne, colonne)]
+        self._locations: Dict[str, Dict[str, List[Tuple[int, int, int]]]] = {}
+        self._count = 0
+        self._matcher: Optional["ProductCatalog"] = None # Noms normalisés, pour la recherche approchée
+        self._keys: List[str] = [] # Numéro dans _matcher -> nom normalisé
+
+    def add(self, product: str, cell_type: str, row: int, col: int) -> None:
+        """Ajoute un emplacement pour un produit."""
+        key = normalize_name(product)
+        if not key:
+            return
+        if key not in self._locations:
+            self._matcher = None
+        self._locations.setdefault(key, {}).setdefault(cell_type, []).append((self._count, row, col))
+        self._count += 1
+
+    @classmethod
+    def from_cells(cls, cells: Iterable[dict]) -> "ProductIndex":
+        """Construit l'index à partir des cases d'un plan JSON."""
+        index = cls()
+        for cell in cells:
+            obj = cell.get("object")
+            if isinstance(obj, dict):
+                obj = obj.get("product", "")
+            if isinstance(obj, str):
+                index.add(obj, cell.get("type"), cell["row"], cell["col"])
+        return index
+
+    def __contains__(self, product: str) -> bool:
+        return normalize_name(product) in self._locations
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def locations(self, product: str, allowed_types: Iterable[str] = ("Rayon",)) -> List[Tuple[int, int]]:
+        """Cases où se trouve un produit parmi les types autorisés, dans l'ordre du plan."""
+        by_type = self._locations.get(normalize_name(product))
+        if not by_type:
+            return []
+        found = []
+        for cell_type in allowed_types:
+            found.extend(by_type.get(cell_type, ()))
+        return [(row, col) for _, row, col in sorted(found)]
+
+    def match(self, product: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Noms normalisés des produits du plan les plus proches d'un nom, du plus proche au moins proche.
+
+        Returns:
+            List[Tuple[str, float]]: (nom normalisé, similarité entre 0 et 1) ; 1 pour le nom exact
+        """
+        key = normalize_name(product)
+        if self._matcher is None:
+            self._keys = list(self._locations)
+            self._matcher = ProductCatalog(("", name) for name in self._keys)
+        matches = [(self._keys[number], score) for number, score in self._matcher.similar(key, limit)]
+        if key in self._locations: # Le nom exact d'abord, même à similarité égale
+            matches = [(key, 1.0)] + [match for match in matches if match[0] != key][:limit - 1]
+        return matches
+
+    def resolve(self, product: str, allowed_types: Iterable[str] = ("Rayon",)) -> Optional[str]:
+        """Nom normalisé du produit du plan désigné par un nom (exact ou approché), ou None.
+
+        Seuls les produits présents dans une case d'un type autorisé sont retenus.
+        """
+        allowed_types = tuple(allowed_types)
+        for key, _ in self.match(product):
+            if any(cell_type in allowed_types for cell_type in self._locations[key]):
+                return key
+        return None
+
+
+# ==============================================================
+# Catalogue des produits et recherche par sous-chaîne
+# ==============================================================
+TRIGRAM_BUCKETS = 1 << 16 # Paquets de trigrammes (les collisions sont écartées à la vérification)
+REINDEX_RATIO = 8 # Index reconstruit quand plus d'un produit sur REINDEX_RATIO lui a échappé
+MIN_SIMILARITY = 0.6 # Similarité minimale d'un nom approché (coefficient de Dice des trigrammes)
+SIMILAR_LIMIT = 20 # Noms approchés proposés au plus
+
+def trigram_buckets(codes: np.ndarray) -> np.ndarray:
+    """Paquet de chaque suite de trois caractères (codes de caractères d'un texte normalisé)."""
+    codes = codes.astype(np.uint32)
+    mixed = (codes[:-2] * np.uint32(0x9E3779B1)) ^ (codes[1:-1] * np.uint32(0x85EBCA77)) \
+        ^ (codes[2:] * np.uint32(0xC2B2AE3D))
+    return (mixed >> np.uint32(16)).astype(np.uint16)
+
+class ProductCatalog:
+    """Catalogue de produits (catégorie, nom) indexé pour la recherche par sous-chaîne.
+
+    Chaque produit reçoit un numéro stable. Le catalogue est rangé en
+    colonnes : numéro de catégorie (tableau d'entiers) et nom (chaîne
+    partagée avec sys.intern). L'index de recherche n'est construit qu'à la
+    première recherche, d'un seul bloc : les noms normalisés (voir
+    normalize_name) forment un texte d'un nom par ligne, et chaque paquet
+    de trigrammes donne la liste triée des produits qui en contiennent un
+    (les trigrammes à cheval sur le début ou la fin d'un nom comptent aussi).
+    Une recherche croise les listes des trigrammes du texte cherché puis
+    vérifie les candidats dans le texte normalisé ; la recherche approchée
+    (similar) compte les trigrammes communs. Les produits ajoutés ensuite
+    sont examinés un par un, jusqu'à la reconstruction de l'index.
+    """
+
+    def __init__(self, products: Iterable[Tuple[str, str]] = ()):
+        """Crée le catalogue (produits (catégorie, nom) en double ignorés, sans casse)."""
+        self.category_names: List[str] = [] # Numéro de catégorie -> nom
+        self._category_numbers: Dict[str, int] = {}
+        self._category_sizes: List[int] = [] # Numéro de catégorie -> nombre de produits
+        self._product_categories = array("I") # Numéro de produit -> numéro de catégorie
+        self.names: List[Optional[str]] = [] # Numéro de produit -> nom, None si retiré
+        self._keys: Dict[Tuple[str, str], int] = {} # (catégorie, nom) en minuscules -> numéro
+        self._count = 0
+        # Index de recherche (voir _build_index)
+        self._indexed = 0 # Produits couverts par l'index
+        self._text = "" # Noms normalisés, un par ligne
+        self._starts: List[int] = [0] # Début de chaque ligne, puis fin du texte
+        self._postings = np.zeros(0, dtype=np.uint32) # Numéros des produits, paquet par paquet
+        self._offsets = np.zeros(TRIGRAM_BUCKETS + 1, dtype=np.int64) # Début de chaque paquet
+        self._sizes = np.zeros(0, dtype=np.int64) # Nombre de paquets de trigrammes de chaque produit
+        for category, name in products:
+            self.add(category, name)
+
+    @classmethod
+    def from_articles(cls, articles: Dict[str, List[str]]) -> "ProductCatalog":
+        """Catalogue d'un JSON d'articles ({catégorie: [produits]})."""
+        return cls((category, name) for category, names in articles.items() for name in names)
+
+    def add(self, category: str, name: str) -> Optional[int]:
+        """Ajoute un produit et renvoie son numéro (None s'il existe déjà)."""
+        key = (category.lower(), name.lower())
+        if key in self._keys:
+            return None
+        category_number = self._category_numbers.get(category)
+        if category_number is None:
+            category_number = self._category_numbers[category] = len(self.category_names)
+            self.category_names.append(category)
+            self._category_sizes.append(0)
+        number = len(self.names)
+        self._keys[key] = number
+        self._product_categories.append(category_number)
+        self._category_sizes[category_number] += 1
+        self.names.append(sys.intern(name))
+        self._count += 1
+        return number
+
+    def remove(self, number: int) -> None:
+        """Retire un produit (son numéro n'est pas réutilisé)."""
+        name = self.names[number]
+        if name is None:
+            return
+        category_number = self._product_categories[number]
+        del self._keys[(self.category_names[category_number].lower(), name.lower())]
+        self._category_sizes[category_number] -= 1
+        self.names[number] = None
+        self._count -= 1
+
+    def find(self, category: str, name: str) -> Optional[int]:
+        """Numéro d'un produit (sans casse), ou None s'il n'est pas au catalogue."""
+        return self._keys.get((category.lower(), name.lower()))
+
+    def find_name(self, name: str) -> Optional[int]:
+        """Numéro du premier produit portant un nom (sans casse ni accents), ou None."""
+        key = normalize_name(name)
+        for number in self.search(name) or ():
+            if normalize_name(self.names[number]) == key:
+                return number
+        return None
+
+    def product(self, number: int) -> Optional[Tuple[str, str]]:
+        """(catégorie, nom) d'un produit, ou None s'il a été retiré."""
+        name = self.names[number]
+        if name is None:
+            return None
+        return self.category_names[self._product_categories[number]], name
+
+    def numbers(self) -> Iterator[int]:
+        """Numéros des produits du catalogue, dans l'ordre d'ajout."""
+        return (number for number, name in enumerate(self.names) if name is not None)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def categories(self) -> List[str]:
+        """Catégories ayant au moins un produit."""
+        return [category for category, size in zip(self.category_names, self._category_sizes) if size]
+
+    def _build_index(self) -> None:
+        """Construit l'index de recherche sur tous les produits actuels."""
+        self._text, codes = normalize_names(name or "" for name in self.names)
+        newline = codes == 10
+        self._starts = [0] + (np.flatnonzero(newline) + 1).tolist() + [len(self._text) + 1]
+        # Trigrammes du texte entouré de retours à la ligne, rangés sous le produit (ligne)
+        # de leur caractère du milieu : ceux de début et de fin de nom comptent aussi
+        padded = np.concatenate(([10], codes, [10])).astype(np.uint32)
+        middle = ~newline
+        buckets = trigram_buckets(padded)[middle]
+        numbers = np.cumsum(np.concatenate(([0], newline)), dtype=np.uint32)[:-1][middle]
+        order = np.argsort(buckets, kind="stable") # Numéros croissants dans chaque paquet
+        buckets, numbers = buckets[order], numbers[order]
+        distinct = np.ones(buckets.size, dtype=bool)
+        distinct[1:] = (buckets[1:] != buckets[:-1]) | (numbers[1:] != numbers[:-1])
+        buckets, self._postings = buckets[distinct], numbers[distinct]
+        self._offsets = np.zeros(TRIGRAM_BUCKETS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(buckets, minlength=TRIGRAM_BUCKETS), out=self._offsets[1:])
+        self._sizes = np.bincount(self._postings, minlength=len(self.names))
+        self._indexed = len(self.names)
+
+    def _update_index(self) -> None:
+        """Reconstruit l'index s'il manque trop de produits."""
+        pending = len(self.names) - self._indexed
+        if pending and (self._indexed == 0 or pending * REINDEX_RATIO > self._indexed):
+            self._build_index()
+
+    @staticmethod
+    def _query_buckets(key: str, padded: bool = False) -> np.ndarray:
+        """Paquets (distincts) des trigrammes d'un nom normalisé, entouré de retours à la ligne si ``padded``."""
+        if padded:
+            key = f"\n{key}\n"
+        return np.unique(trigram_buckets(np.frombuffer(key.encode("utf-32-le"), dtype="<u4")))
+
+    def search(self, text: str = "", category: Optional[str] = None) -> Optional[List[int]]:
+        """Numéros des produits dont le nom contient ``text`` (sans casse ni accents).
+
+        Args:
+            text (str, optional): le texte cherché
+            category (str, optional): ne garder que les produits de cette catégorie
+
+        Returns:
+            Optional[List[int]]: les numéros trouvés (croissants), ou None si aucun filtre ne s'applique
+        """
+        query = normalize_name(text)
+        if not query and category is None:
+            return None
+        category_number = self._category_numbers.get(category) if category is not None else None
+        if category is not None and category_number is None:
+            return []
+        names = self.names
+        if not query:
+            categories = np.frombuffer(self._product_categories, dtype=np.uintc)
+            candidates = np.flatnonzero(categories == category_number).tolist()
+            del categories # Libère le tableau (il ne peut pas s'agrandir tant qu'il est partagé)
+            return [number for number in candidates if names[number] is not None]
+
+        self._update_index()
+        if len(query) >= 3:
+            # Croisement des paquets des trigrammes cherchés, du plus petit au plus grand
+            buckets = self._query_buckets(query)
+            offsets = self._offsets
+            postings = sorted((self._postings[offsets[bucket]:offsets[bucket + 1]] for bucket in buckets.tolist()),
+                              key=len)
+            candidates = postings[0]
+            for other in postings[1:]:
+                candidates = np.intersect1d(candidates, other, assume_unique=True)
+        else:
+            candidates = np.arange(self._indexed)
+        if category_number is not None:
+            categories = np.frombuffer(self._product_categories, dtype=np.uintc)
+            candidates = candidates[categories[candidates] == category_number]
+            del categories
+
+        find, starts = self._text.find, self._starts
+        found = [number for number in candidates.tolist()
+                 if names[number] is not None and find(query, starts[number], starts[number + 1]) != -1]
+        categories = self._product_categories
+        for number in range(self._indexed, len(names)): # Produits ajoutés après l'index
+            name = names[number]
+            if name is not None and (category_number is None or categories[number] == category_number) \
+                    and query in normalize_name(name):
+                found.append(number)
+        return found
+
+    def similar(self, text: str, limit: int = SIMILAR_LIMIT, category: Optional[str] = None,
+                threshold: float = MIN_SIMILARITY) -> List[Tuple[int, float]]:
+        """Produits dont le nom ressemble à ``text`` (fautes de frappe, pluriels, accents).
+
+        La similarité est le coefficient de Dice des trigrammes des noms
+        normalisés : 2 x trigrammes communs / (trigrammes de l'un + de l'autre).
+
+        Args:
+            text (str): le nom cherché
+            limit (int, optional): nombre de produits renvoyés au plus
+            category (str, optional): ne garder que les produits de cette catégorie
+            threshold (float, optional): similarité minimale
+
+        Returns:
+            List[Tuple[int, float]]: (numéro, similarité), du plus proche au moins proche
+        """
+        key = normalize_name(text)
+        category_number = self._category_numbers.get(category) if category is not None else None
+        if not key or (category is not None and category_number is None):
+            return []
+        self._update_index()
+        buckets = self._query_buckets(key, padded=True)
+        offsets = self._offsets
+        postings = [self._postings[offsets[bucket]:offsets[bucket + 1]] for bucket in buckets.tolist()]
+        shared = np.bincount(np.concatenate(postings), minlength=self._indexed) if postings else np.zeros(0)
+        numbers = np.flatnonzero(shared)
+        scores = 2 * shared[numbers] / (buckets.size + self._sizes[numbers])
+        keep = scores >= threshold
+        numbers, scores = numbers[keep], scores[keep]
+        if category_number is not None:
+            categories = np.frombuffer(self._product_categories, dtype=np.uintc)
+            keep = categories[numbers] == category_number
+            del categories
+            numbers, scores = numbers[keep], scores[keep]
+        found = list(zip(numbers.tolist(), scores.tolist()))
+        names, categories = self.names, self._product_categories
+        for number in range(self._indexed, len(names)): # Produits ajoutés après l'index
+            name = names[number]
+            if name is None or (category_number is not None and categories[number] != category_number):
+                continue
+            other = self._query_buckets(normalize_name(name), padded=True)
+            score = 2 * np.intersect1d(buckets, other, assume_unique=True).size / (buckets.size + other.size)
+            if score >= threshold:
+                found.append((number, score))
+        found = [(number, score) for number, score in found if names[number] is not None]
+        found.sort(key=lambda item: (-item[1], item[0]))
+        return found[:limit]
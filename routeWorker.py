@@ -0,0 +1,177 @@
+# ==============================================================
+# Calcul du parcours en arrière-plan
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Le calcul d'un parcours (distances de marche, ordre de passage) peut durer
+# plusieurs secondes sur un grand plan : il est exécuté dans un fil du
+# QThreadPool pour ne pas figer la fenêtre. Les résultats reviennent au fil
+# de l'interface par des signaux Qt. Un parcours déjà calculé pour le même
+# plan et les mêmes articles est repris du cache (voir routecache.py).
+
+import threading
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import algorithm
+import ordering
+import plan
+import routecache
+
+class RouteCancelled(Exception):
+    """Levée dans le fil de calcul quand le parcours demandé est devenu obsolète."""
+
+class RouteOutcome(NamedTuple):
+    """Parcours calculé, prêt à être affiché."""
+    full_points: List[Tuple[int, int]] # Entrée, articles puis caisse
+    full_path: List[Tuple[int, int]] # Parcours complet case par case
+    ordre: ordering.OrderingResult # Détail du choix de l'ordre de passage
+    introuvables: List[str] # Articles absents du plan
+    rapproches: List[Tuple[str, str]] # (article, produit du plan) reconnus sous un nom approché
+    compiled: plan.CompiledPlan # Plan utilisé pour le calcul
+    en_cache: bool = False # Parcours repris du cache
+
+class RouteSignals(QObject):
+    """Signaux émis par un calcul de parcours (reçus dans le fil de l'interface)."""
+    progress = pyqtSignal(int, str) # Pourcentage et étape en cours
+    finished = pyqtSignal(object) # RouteOutcome
+    failed = pyqtSignal(str) # Message d'erreur à afficher
+    cancelled = pyqtSignal()
+
+class RouteJob(QRunnable):
+    """Calcul d'un parcours pour une liste de courses, annulable à tout moment."""
+
+    def __init__(self, plan_source: Union[str, plan.CompiledPlan], shopping_list: List[str],
+                 allowed_types: Tuple[str, ...], time_budget: float = ordering.DEFAULT_TIME_BUDGET,
+                 cache: Optional[routecache.RouteCache] = routecache.route_cache):
+        """Prépare le calcul.
+
+        Args:
+            plan_source (str | CompiledPlan): chemin du plan JSON du magasin, ou plan
+                déjà compilé (plan en cours d'édition, voir GridOverlay.compiled_plan)
+            shopping_list (List[str]): les articles de la liste de courses
+            allowed_types (Tuple[str, ...]): types de cases où chercher les articles
+            time_budget (float, optional): temps maximal accordé au choix de l'ordre (secondes)
+            cache (RouteCache, optional): cache des parcours (None pour toujours recalculer)
+        """
+        super().__init__()
+        self.setAutoDelete(False) # Gardé par le contrôleur tant que ses signaux peuvent arriver
+        self.plan_source = plan_source
+        self.shopping_list = list(shopping_list) # Copie : la liste peut changer pendant le calcul
+        self.allowed_types = allowed_types
+        self.time_budget = time_budget
+        self.cache = cache
+        self.signals = RouteSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Demande l'arrêt du calcul (pris en compte à la prochaine étape)."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        """Indique si le calcul a été annulé."""
+        return self._cancelled.is_set()
+
+    def _check(self) -> None:
+        """Interrompt le calcul s'il a été annulé."""
+        if self._cancelled.is_set():
+            raise RouteCancelled()
+
+    def _report(self, done: int, total: int) -> None:
+        """Suivi des propagations de distances (de 10 % à 90 %)."""
+        self._check()
+        self.signals.progress.emit(10 + 80 * done // max(total, 1), "Calcul des distances")
+
+    def run(self) -> None:
+        """Calcule le parcours (exécuté dans un fil du QThreadPool)."""
+        try:
+            self._check()
+            self.signals.progress.emit(0, "Chargement du plan")
+            if isinstance(self.plan_source, plan.CompiledPlan):
+                compiled = self.plan_source
+            else:
+                compiled = plan.load_plan(self.plan_source)
+
+            # 1. Trouver les coordonnées des articles de la liste
+            rapproches = []
+            shopping_points, introuvables = compiled.shopping_candidates(self.shopping_list, self.allowed_types,
+                                                                         rapproches)
+            if not shopping_points:
+                self.signals.failed.emit("Aucun article de la liste trouvé dans le plan.")
+                return
+
+            # 2. Parcours déjà calculé pour ce plan et ces articles ?
+            key = None
+            if self.cache is not None:
+                key = routecache.route_key(compiled.fingerprint, shopping_points, self.allowed_types)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    self._check()
+                    self.signals.progress.emit(100, "Parcours repris du cache")
+                    self.signals.finished.emit(RouteOutcome(*cached, introuvables, rapproches, compiled, True))
+                    return
+
+            # 3. Ordre optimal sur les distances de marche, caisse la plus proche et parcours complet
+            self._check()
+            self.signals.progress.emit(10, "Calcul des distances")
+            full_points, full_path, ordre = algorithm.plan_route(
+                compiled.search, compiled.entry, shopping_points, compiled.caisses,
+                self.time_budget, self._report)
+            self._check()
+            if full_points is None:
+                self.signals.failed.emit("Aucune caisse accessible trouvée.")
+            elif not full_path:
+                self.signals.failed.emit("Aucun chemin trouvé pour cette liste.")
+            else:
+                if key is not None:
+                    self.cache.put(key, compiled.fingerprint, routecache.CachedRoute(full_points, full_path, ordre))
+                self.signals.progress.emit(100, "Parcours calculé")
+                self.signals.finished.emit(RouteOutcome(full_points, full_path, ordre, introuvables, rapproches, compiled))
+        except RouteCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(f"Erreur lors du calcul du parcours : {e}")
+
+class RouteWorker:
+    """Lance les calculs de parcours un par un ; un nouveau calcul annule le précédent."""
+
+    def __init__(self):
+        """Initialise le fil de calcul (un seul à la fois : le cache de distances n'est pas partagé)."""
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.job: Optional[RouteJob] = None
+        self._jobs = set() # Calculs lancés, gardés en vie jusqu'à leur dernier signal
+
+    def submit(self, job: RouteJob) -> RouteJob:
+        """Annule le calcul en cours et lance ``job``."""
+        self.cancel()
+        self.job = job
+        self._jobs.add(job)
+        for signal in (job.signals.finished, job.signals.failed, job.signals.cancelled):
+            signal.connect(lambda *_, job=job: self._done(job))
+        self.pool.start(job)
+        return job
+
+    def _done(self, job: RouteJob) -> None:
+        """Oublie un calcul terminé."""
+        self._jobs.discard(job)
+        if self.job is job:
+            self.job = None
+
+    def cancel(self) -> None:
+        """Annule le calcul en cours (ses résultats ne seront pas émis)."""
+        if self.job is not None:
+            self.job.cancel()
+            if self.pool.tryTake(self.job): # Retire le calcul s'il n'a pas encore commencé
+                self._jobs.discard(self.job)
+            self.job = None
+
+    def is_running(self) -> bool:
+        """Indique si un calcul est en cours."""
+        return self.job is not None
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Attend la fin des calculs (fermeture de la fenêtre)."""
+        return self.pool.waitForDone(msecs)
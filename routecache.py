@@ -0,0 +1,174 @@
+# ==============================================================
+# Cache des parcours calculés
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Un client régénère souvent le même parcours (même magasin, même liste de
+# la semaine). Les parcours calculés sont gardés en mémoire (les plus
+# récemment utilisés) et, si possible, dans la table route_cache de la base
+# pour les lancements suivants.
+#
+# La clé d'un parcours est une empreinte du plan compilé (grille
+# d'obstacles, entrée, caisses : voir CompiledPlan.fingerprint), des types
+# de cases autorisés et de l'ensemble des cases candidates des articles. Un
+# plan modifié par le gérant a donc une autre empreinte : ses anciens
+# parcours ne sont plus jamais servis et finissent par être évincés.
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import ordering
+
+MEMORY_CAPACITY = 64 # Parcours gardés en mémoire
+MAX_STORED_ROUTES = 500 # Parcours gardés dans la base
+
+Point = Tuple[int, int]
+
+class CachedRoute(NamedTuple):
+    """Parcours gardé en cache (voir routeWorker.RouteOutcome)."""
+    full_points: List[Point] # Entrée, articles puis caisse
+    full_path: List[Point] # Parcours complet case par case
+    ordre: ordering.OrderingResult # Détail du choix de l'ordre de passage
+
+def route_key(fingerprint: str, groups: Iterable[Sequence[Point]], allowed_types: Iterable[str]) -> str:
+    """Clé d'un parcours.
+
+    Args:
+        fingerprint (str): empreinte du plan compilé
+        groups (Iterable[Sequence[Point]]): cases candidates de chaque article (ordre indifférent)
+        allowed_types (Iterable[str]): types de cases où les articles sont cherchés
+
+    Returns:
+        str: la clé (hexadécimale)
+    """
+    points = sorted({tuple(sorted(tuple(point) for point in group)) for group in groups})
+    content = json.dumps([fingerprint, sorted(allowed_types), points], separators=(",", ":"))
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+def _encode(route: CachedRoute) -> bytes:
+    """Parcours compressé pour la base."""
+    ordre = route.ordre
+    data = {"points": route.full_points, "path": route.full_path, "order": ordre.order,
+            "cost": ordre.cost, "lower_bound": ordre.lower_bound, "method": ordre.method}
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+def _decode(blob: bytes) -> CachedRoute:
+    """Parcours lu dans la base."""
+    data = json.loads(zlib.decompress(blob))
+    ordre = ordering.OrderingResult(data["order"], data["cost"], data["lower_bound"], data["method"])
+    return CachedRoute([tuple(point) for point in data["points"]], [tuple(point) for point in data["path"]], ordre)
+
+class RouteCache:
+    """Parcours récemment calculés, en mémoire et dans la base (table route_cache).
+
+    Utilisable depuis plusieurs fils : chaque fil passe par sa propre
+    connexion à la base (voir models.database).
+    """
+
+    def __init__(self, capacity: int = MEMORY_CAPACITY, persistent: bool = True,
+                 max_stored: int = MAX_STORED_ROUTES):
+        """Crée un cache vide.
+
+        Args:
+            capacity (int, optional): parcours gardés en mémoire
+            persistent (bool, optional): garder aussi les parcours dans la base
+            max_stored (int, optional): parcours gardés dans la base
+        """
+        self.capacity = capacity
+        self.persistent = persistent
+        self.max_stored = max_stored
+        self._routes: "OrderedDict[str, CachedRoute]" = OrderedDict() # Du plus ancien au plus récent
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.stored_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedRoute]:
+        """Parcours d'une clé, ou None s'il n'est pas en cache."""
+        with self._lock:
+            route = self._routes.get(key)
+            if route is not None:
+                self._routes.move_to_end(key)
+                self.memory_hits += 1
+                return route
+        route = self._load(key) if self.persistent else None
+        with self._lock:
+            if route is None:
+                self.misses += 1
+                return None
+            self.stored_hits += 1
+            self._remember(key, route)
+        return route
+
+    def put(self, key: str, fingerprint: str, route: CachedRoute) -> None:
+        """Garde un parcours calculé.
+
+        Args:
+            key (str): sa clé (voir route_key)
+            fingerprint (str): empreinte du plan (colonne plan de la table)
+            route (CachedRoute): le parcours
+        """
+        with self._lock:
+            self._remember(key, route)
+        if self.persistent:
+            self._store(key, fingerprint, route)
+
+    def _remember(self, key: str, route: CachedRoute) -> None:
+        """Range un parcours en mémoire, en évinçant le moins récemment utilisé (verrou pris)."""
+        self._routes[key] = route
+        self._routes.move_to_end(key)
+        while len(self._routes) > self.capacity:
+            self._routes.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[CachedRoute]:
+        """Parcours enregistré dans la base, ou None."""
+        from models import database
+        try:
+            row = database.fetch_one("SELECT route FROM route_cache WHERE key=?", (key,))
+            if row is None:
+                return None
+            database.execute("UPDATE route_cache SET used_at=? WHERE key=?", (time.time(), key))
+            return _decode(row[0])
+        except (sqlite3.Error, ValueError, KeyError, zlib.error) as e:
+            print(f"Cache des parcours illisible : {e}")
+            return None
+
+    def _store(self, key: str, fingerprint: str, route: CachedRoute) -> None:
+        """Enregistre un parcours dans la base, en ne gardant que les max_stored plus récents."""
+        from models import database
+        try:
+            with database.transaction() as conn:
+                conn.execute("INSERT OR REPLACE INTO route_cache (key, plan, route, used_at) VALUES (?, ?, ?, ?)",
+                             (key, fingerprint, _encode(route), time.time()))
+                conn.execute("""
+                    DELETE FROM route_cache WHERE key NOT IN (
+                        SELECT key FROM route_cache ORDER BY used_at DESC LIMIT ?)""", (self.max_stored,))
+        except sqlite3.Error as e:
+            print(f"Impossible d'enregistrer le parcours en cache : {e}")
+
+    def clear(self) -> None:
+        """Vide le cache (mémoire et base) et remet les compteurs à zéro."""
+        with self._lock:
+            self._routes.clear()
+            self.memory_hits = self.stored_hits = self.misses = 0
+        if self.persistent:
+            from models import database
+            try:
+                database.execute("DELETE FROM route_cache")
+            except sqlite3.Error as e:
+                print(f"Impossible de vider le cache des parcours : {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs du cache : succès (en mémoire, dans la base), échecs et parcours en mémoire."""
+        with self._lock:
+            return {"hits": self.memory_hits + self.stored_hits, "memory_hits": self.memory_hits,
+                    "stored_hits": self.stored_hits, "misses": self.misses, "size": len(self._routes)}
+
+route_cache = RouteCache() # Cache partagé par les fenêtres de l'application
@@ -1,10 +1,10 @@
 # ==============================================================
 # Dialog de gestion des magasins
 # Développé par L. PACE--BOULNOIS
-# Dernière modification : 14/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
-import sqlite3
+from models import database
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QListWidget, QHBoxLayout, QPushButton, QMessageBox
 )
@@ -45,12 +45,8 @@ class ShopManagerDialog(QDialog):
     def refresh(self):
         """Rafraîchit la liste des magasins de l'utilisateur."""
         self.list.clear()
-        conn = sqlite3.connect("market_tracer.db")
-        c = conn.cursor()
-        c.execute("SELECT id, nom FROM shops WHERE user_id=?", (self.user_id,))
-        for shop_id, nom in c.fetchall():
+        for shop_id, nom in database.fetch_all("SELECT id, nom FROM shops WHERE user_id=?", (self.user_id,)):
             self.list.addItem(f"{shop_id} - {nom}")
-        conn.close()
 
     def get_selected_shop_id(self):
         """Retourne l'ID du magasin sélectionné dans la liste."""
@@ -78,11 +74,7 @@ class ShopManagerDialog(QDialog):
         shop_id = self.get_selected_shop_id()
         if shop_id:
             from configureWindow import ConfigureWindow
-            conn = sqlite3.connect("market_tracer.db")
-            c = conn.cursor()
-            c.execute("SELECT nom, auteur, date_creation, apropos, chemin, articles_json FROM shops WHERE id=?", (shop_id,))
-            row = c.fetchone()
-            conn.close()
+            row = database.fetch_one("SELECT nom, auteur, date_creation, apropos, chemin, articles_json FROM shops WHERE id=?", (shop_id,))
             if row:
                 shop_data = {
                     "nom": row[0],
@@ -102,9 +94,5 @@ class ShopManagerDialog(QDialog):
         if shop_id:
             reply = QMessageBox.question(self, "Confirmation", "Supprimer ce magasin ?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
-                conn = sqlite3.connect("market_tracer.db")
-                c = conn.cursor()
-                c.execute("DELETE FROM shops WHERE id=?", (shop_id,))
-                conn.commit()
-                conn.close()
+                database.execute("DELETE FROM shops WHERE id=?", (shop_id,))
                 self.refresh()
\ No newline at end of file
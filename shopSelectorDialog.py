@@ -1,10 +1,10 @@
 # ==============================================================
 # Dialog de sélection d'un magasin
 # Développé par L. PACE--BOULNOIS
-# Dernière modification : 14/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
-import sqlite3
+from models import database
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QListWidget, QPushButton, QHBoxLayout, QMessageBox
 )
@@ -40,12 +40,8 @@ class ShopSelectorDialog(QDialog):
 
     def populate_shops(self):
         """Remplit la liste des magasins depuis la base de données."""
-        conn = sqlite3.connect("market_tracer.db")
-        c = conn.cursor()
-        c.execute("SELECT id, nom FROM shops")
-        for shop_id, nom in c.fetchall():
+        for shop_id, nom in database.fetch_all("SELECT id, nom FROM shops"):
             self.list.addItem(f"{shop_id} - {nom}")
-        conn.close()
 
     def accept(self):
         """Valide la sélection du magasin."""
@@ -0,0 +1,13 @@
+# ==============================================================
+# Configuration des tests
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Les modules de l'application sont à la racine du dépôt : elle est ajoutée
+# au chemin d'import pour lancer les tests avec pytest depuis n'importe où.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
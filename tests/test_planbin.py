@@ -0,0 +1,82 @@
+# ==============================================================
+# Tests du format binaire des plans (.mtp)
+# Développé par D. MELOCCO
+# Dernière modification : 18/10/2026
+# ==============================================================
+#
+# Un plan converti au format .mtp doit se relire exactement comme le plan
+# JSON d'origine : mêmes types de cases, mêmes objets, même grille
+# d'obstacles, même entrée et mêmes caisses.
+
+import io
+import json
+import os
+
+import numpy as np
+import pytest
+
+import algorithm
+import planbin
+from cells import CellStore
+
+PLAN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "json", "plan_complet.json")
+
+@pytest.fixture
+def plan_with_objects(tmp_path):
+    """Copie de plan_complet.json avec des produits posés sur des rayons et des stocks."""
+    with open(PLAN_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    shelves = [cell for cell in data["cells"] if cell["type"] in ("Rayon", "Stock")]
+    for i, cell in enumerate(shelves[::7]):
+        if i % 3 == 0:
+            cell["object"] = "Pâté de campagne" # Ancien format : nom seul
+        else:
+            cell["object"] = {"category": f"Rayon n°{i % 5}", "product": f"Crème brûlée {i}"}
+    path = tmp_path / "plan.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return str(path)
+
+def load_json_store(json_path):
+    """Modèle des cases et taille des cases d'un plan JSON (import habituel)."""
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    return CellStore.from_cells(data["cells"]), data["grid_size"]
+
+@pytest.mark.parametrize("use_objects", [False, True])
+def test_round_trip_matches_json(tmp_path, plan_with_objects, use_objects):
+    json_path = plan_with_objects if use_objects else PLAN_PATH
+    binary_path = planbin.convert_json_to_binary(json_path, str(tmp_path / "plan.mtp"))
+
+    expected, expected_grid_size = load_json_store(json_path)
+    store, grid_size = planbin.read_plan_binary(binary_path)
+    assert grid_size == expected_grid_size
+    np.testing.assert_array_equal(store.types, expected.types)
+    assert store.objects == expected.objects
+    assert bool(store.objects) == use_objects
+
+def test_write_read_buffer():
+    store = CellStore(3, 4)
+    store.set_type(0, 0, "Entrée")
+    store.set_type(2, 3, "Rayon")
+    store.set_object(2, 3, "Épicerie", "Café")
+    buffer = io.BytesIO()
+    planbin.write_plan_binary(buffer, store, 40)
+
+    read, grid_size = planbin.read_plan_binary(io.BytesIO(buffer.getvalue()))
+    assert grid_size == 40
+    np.testing.assert_array_equal(read.types, store.types)
+    assert read.objects == store.objects
+
+def test_load_grid_from_binary_matches_json(tmp_path, plan_with_objects):
+    binary_path = planbin.convert_json_to_binary(plan_with_objects, str(tmp_path / "plan.mtp"))
+    grid, entry, caisses = algorithm.load_grid_from_binary(binary_path)
+    expected_grid, expected_entry, expected_caisses = algorithm.load_grid_from_json(plan_with_objects)
+    np.testing.assert_array_equal(grid, expected_grid)
+    assert entry == expected_entry
+    assert sorted(caisses) == sorted(expected_caisses)
+
+@pytest.mark.parametrize("data", [b"", b"XXXX" + bytes(12), planbin.HEADER.pack(planbin.MAGIC, 99, 50, 1, 1)])
+def test_invalid_file(data):
+    with pytest.raises(ValueError):
+        planbin.read_plan_binary(io.BytesIO(data))
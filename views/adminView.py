@@ -1,19 +1,23 @@
 # ==============================================================
 # Vue pour la fenêtre d'administration du gérant
 # Développé par D. MELOCCO, L. PACE--BOULNOIS
-# Dernière modification : 13/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QFrame, QPushButton,
-    QLineEdit, QGroupBox, QMenuBar, QComboBox, QMessageBox, QSlider
+    QLineEdit, QGroupBox, QMenuBar, QComboBox, QSlider
 )
 from PyQt6.QtGui import QFont, QIcon
-from PyQt6.QtCore import Qt
-from grid import GridOverlay, DraggableListWidget
+from PyQt6.QtCore import Qt, pyqtSignal
+from grid import GridOverlay
+from products import ProductCatalog
+from productList import ProductListView, ALL_CATEGORIES
 
 class AdminView(QWidget):
     """Vue pour la fenêtre d'administration du gérant"""
+    fermee = pyqtSignal() # Fenêtre fermée (déconnexion ou fermeture)
+
     def __init__(self):
         """Initialise la vue d'administration du gérant."""
         super().__init__()
@@ -21,7 +25,6 @@ class AdminView(QWidget):
         self.setWindowIcon(QIcon("img/logo_v1.png"))
         self.setMinimumSize(1280, 768)
         self.categories = set() # Ensemble pour stocker les catégories de produits
-        self.produit_categorie_map = {} # Dictionnaire pour stocker les produits et leurs catégories
         self.setup_ui()
 
     def setup_ui(self):
@@ -44,6 +47,7 @@ class AdminView(QWidget):
         self.action_reinitialiser_plan = self.plan_menu.addAction("Réinitialiser le plan")
         self.action_exporter_json = self.plan_menu.addAction("Exporter en JSON")
         self.action_importer_json = self.plan_menu.addAction("Importer depuis JSON")
+        self.action_tester_parcours = self.plan_menu.addAction("Tester un parcours")
 
         self.aide_menu = self.menubar.addMenu("Aide")
         self.action_about = self.aide_menu.addAction("À propos")
@@ -97,7 +101,7 @@ class AdminView(QWidget):
         filtre_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
         left_col.addWidget(filtre_label)
         self.filtre_combo = QComboBox()
-        self.filtre_combo.addItem("Toutes les catégories")
+        self.filtre_combo.addItem(ALL_CATEGORIES)
         left_col.addWidget(self.filtre_combo)
 
         # Recercher un article
@@ -112,7 +116,7 @@ class AdminView(QWidget):
         stocks_label = QLabel("Vos stocks")
         stocks_label.setFont(QFont("Arial", 11, QFont.Weight.Bold))
         left_col.addWidget(stocks_label)
-        self.stocks_list = DraggableListWidget()
+        self.stocks_list = ProductListView()
         self.stocks_list.setDragEnabled(True)
         left_col.addWidget(self.stocks_list, stretch=1)
 
@@ -244,76 +248,51 @@ class AdminView(QWidget):
     def afficher_stocks_depuis_json(self, articles_json_content):
         """Affiche les stocks à partir d'un contenu JSON."""
         import json
-        self.stocks_list.clear()
-        self.produit_categorie_map = {}
-        self.categories = set()
         try:
-            data = json.loads(articles_json_content)
-            for categorie, produits in data.items():
-                self.categories.add(categorie)
-                for produit in produits:
-                    key = f"{categorie.lower()}::{produit.lower()}"
-                    self.stocks_list.addItem(produit)
-                    self.produit_categorie_map[key] = (categorie, produit)
-            if hasattr(self, "maj_filtre_categories"):
-                self.maj_filtre_categories()
-            if hasattr(self, "status_bar"):
-                self.status_bar.setText(f"{self.stocks_list.count()} produits chargés depuis la base de données.")
+            catalogue = ProductCatalog.from_articles(json.loads(articles_json_content))
+            self.stocks_list.source_model.set_catalog(catalogue)
+            self.categories = set(catalogue.categories())
+            self.maj_filtre_categories()
+            self.appliquer_filtre()
+            self.status_bar.setText(f"{self.stocks_list.count()} produits chargés depuis la base de données.")
         except Exception as e:
-            self.stocks_list.addItem("Aucun stock trouvé.")
-            if hasattr(self, "status_bar"):
-                self.status_bar.setText("Erreur lors du chargement des articles.")
+            self.categories = set()
+            self.stocks_list.source_model.set_products([])
+            self.status_bar.setText("Erreur lors du chargement des articles.")
 
     def maj_filtre_categories(self):
         """Met à jour la liste des catégories dans le filtre."""
         self.filtre_combo.blockSignals(True)
         self.filtre_combo.clear()
-        self.filtre_combo.addItem("Toutes les catégories")
+        self.filtre_combo.addItem(ALL_CATEGORIES)
         for cat in sorted(self.categories, key=lambda x: x.lower()):
             self.filtre_combo.addItem(cat)
         self.filtre_combo.blockSignals(False)
 
-    def filtrer_stocks(self, categorie):
-        """Filtre les stocks affichés en fonction de la catégorie sélectionnée."""
-        self.stocks_list.clear()
-        texte = self.search_input.text().lower() if hasattr(self, "search_input") else ""
-        for key, (cat, nom) in self.produit_categorie_map.items():
-            if (categorie == "Toutes les catégories" or cat.lower() == categorie.lower()) and texte in nom.lower():
-                self.stocks_list.addItem(nom)
-
-    def rechercher_stocks(self, texte):
-        """Recherche des stocks en fonction du texte entré dans le champ de recherche."""
-        texte = texte.lower()
-        categorie = self.filtre_combo.currentText()
-        self.stocks_list.clear()
-        for key, (cat, nom) in self.produit_categorie_map.items():
-            if (categorie == "Toutes les catégories" or cat == categorie) and texte in nom.lower():
-                self.stocks_list.addItem(nom)
-
-    def retirer_article_selectionne(self):
-        """Retire l'article sélectionné de la liste des stocks."""
-        item = self.stocks_list.currentItem()
-        if not item:
-            QMessageBox.warning(self, "Aucun article sélectionné", "Veuillez sélectionner un article à retirer.")
-            return
-        nom = item.text()
-        key_to_remove = None
-        for key, (cat, nom_map) in self.produit_categorie_map.items():
-            if nom_map == nom:
-                key_to_remove = key
-                break
-        if key_to_remove:
-            del self.produit_categorie_map[key_to_remove]
-            self.stocks_list.takeItem(self.stocks_list.row(item))
-            self.sauvegarder_articles_json()
-            self.status_bar.setText(f"Article '{nom}' retiré du stock.")
-        else:
-            QMessageBox.warning(self, "Erreur", "Impossible de retrouver la catégorie de l'article à retirer.")
-
-    def sauvegarder_articles_json(self):
-        """Sauvegarde les articles dans un fichier JSON."""
-        import json
-        data = {}
-        for key, (cat, nom) in self.produit_categorie_map.items():
-            data.setdefault(cat, []).append(nom)
-        articles_json_content = json.dumps(data, ensure_ascii=False, indent=2)
\ No newline at end of file
+    def appliquer_filtre(self, *_):
+        """Filtre les stocks affichés selon la catégorie choisie et le texte recherché."""
+        self.stocks_list.apply_filter(self.search_input.text(), self.filtre_combo.currentText())
+
+    def contient_produit(self, categorie, nom):
+        """Indique si un produit est déjà dans la liste des stocks (sans casse)."""
+        return self.stocks_list.source_model.contains(categorie, nom)
+
+    def ajouter_produit(self, categorie, nom):
+        """Ajoute un produit à la liste des stocks."""
+        self.stocks_list.source_model.add_product(categorie, nom)
+        if categorie not in self.categories:
+            self.categories.add(categorie)
+            self.maj_filtre_categories()
+
+    def retirer_produit_selectionne(self):
+        """Retire le produit sélectionné de la liste des stocks et renvoie (catégorie, nom), ou None."""
+        produit = self.stocks_list.current_product()
+        if produit is None:
+            return None
+        self.stocks_list.remove_current()
+        return produit
+
+    def closeEvent(self, event):
+        """Signale la fermeture de la fenêtre (le contrôleur enregistre les articles en attente)."""
+        self.fermee.emit()
+        super().closeEvent(event)
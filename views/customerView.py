@@ -1,16 +1,18 @@
 # ==============================================================
 # Vue pour la fenêtre client & employé
 # Développé par N. COLIN, D. MELOCCO
-# Dernière modification : 14/06/2025
+# Dernière modification : 18/10/2026
 # ==============================================================
 
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QFrame, QPushButton,
-    QLineEdit, QGroupBox, QMenuBar, QComboBox, QSlider
+    QLineEdit, QGroupBox, QMenuBar, QComboBox, QSlider, QListWidget
 )
 from PyQt6.QtGui import QFont, QIcon
 from PyQt6.QtCore import Qt
-from grid import GridOverlay, DraggableListWidget
+from grid import GridOverlay
+from products import ProductCatalog
+from productList import ProductListView, ALL_CATEGORIES
 
 class CustomerView(QWidget):
     """Vue pour la fenêtre client"""
@@ -21,7 +23,6 @@ class CustomerView(QWidget):
         self.setWindowIcon(QIcon("img/logo_v1.png"))
         self.setMinimumSize(1280, 768)
         self.categories = set() # Ensemble pour stocker les catégories de produits
-        self.produit_categorie_map = {} # Dictionnaire pour stocker les produits et leurs catégories
         self.setup_ui()
 
     def setup_ui(self):
@@ -35,6 +36,7 @@ class CustomerView(QWidget):
         self.fichier_menu = self.menubar.addMenu("Fichier")
         self.action_exporter = self.fichier_menu.addAction("Exporter ma liste")
         self.action_importer = self.fichier_menu.addAction("Importer une liste")
+        self.action_exporter_parcours = self.fichier_menu.addAction("Exporter le parcours en image")
 
         self.aide_menu = self.menubar.addMenu("Aide")
         self.action_about = self.aide_menu.addAction("À propos")
@@ -87,7 +89,7 @@ class CustomerView(QWidget):
         filtre_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
         liste_layout.addWidget(filtre_label)
         self.filtre_combo = QComboBox()
-        self.filtre_combo.addItem("Toutes les catégories")
+        self.filtre_combo.addItem(ALL_CATEGORIES)
         liste_layout.addWidget(self.filtre_combo)
 
         # Recherche d'article
@@ -102,7 +104,7 @@ class CustomerView(QWidget):
         produits_label = QLabel("Articles disponibles")
         produits_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
         liste_layout.addWidget(produits_label)
-        self.stocks_list = DraggableListWidget()
+        self.stocks_list = ProductListView()
         self.stocks_list.setDragEnabled(False)
         liste_layout.addWidget(self.stocks_list, stretch=1)
 
@@ -110,8 +112,7 @@ class CustomerView(QWidget):
         liste_courses_label = QLabel("Votre liste de courses")
         liste_courses_label.setFont(QFont("Arial", 11, QFont.Weight.Bold))
         liste_layout.addWidget(liste_courses_label)
-        self.courses_list = DraggableListWidget()
-        self.courses_list.setDragEnabled(True)
+        self.courses_list = QListWidget() # Sans glisser-déposer : le plan du client n'est pas modifiable
         liste_layout.addWidget(self.courses_list, stretch=1)
 
         left_col.addWidget(liste_frame)
@@ -216,45 +217,27 @@ class CustomerView(QWidget):
     def afficher_produits_depuis_json(self, produits_json_content):
         """Affiche les produits à partir d'un contenu JSON."""
         import json
-        self.stocks_list.clear()
-        self.produit_categorie_map = {}
-        self.categories = set()
         try:
-            data = json.loads(produits_json_content)
-            for categorie, produits in data.items():
-                self.categories.add(categorie)
-                for produit in produits:
-                    key = f"{categorie.lower()}::{produit.lower()}"
-                    self.stocks_list.addItem(produit)
-                    self.produit_categorie_map[key] = (categorie, produit)
+            catalogue = ProductCatalog.from_articles(json.loads(produits_json_content))
+            self.stocks_list.source_model.set_catalog(catalogue)
+            self.categories = set(catalogue.categories())
             self.maj_filtre_categories()
+            self.appliquer_filtre()
             self.status_bar.setText(f"{self.stocks_list.count()} produits chargés.")
         except Exception as e:
-            self.stocks_list.addItem("Aucun produit trouvé.")
+            self.categories = set()
+            self.stocks_list.source_model.set_products([])
             self.status_bar.setText("Erreur lors du chargement des produits.")
 
     def maj_filtre_categories(self):
         """Met à jour la liste des catégories dans le filtre."""
         self.filtre_combo.blockSignals(True)
         self.filtre_combo.clear()
-        self.filtre_combo.addItem("Toutes les catégories")
+        self.filtre_combo.addItem(ALL_CATEGORIES)
         for cat in sorted(self.categories, key=lambda x: x.lower()):
             self.filtre_combo.addItem(cat)
         self.filtre_combo.blockSignals(False)
 
-    def filtrer_produits(self, categorie):
-        """Filtre les produits affichés en fonction de la catégorie sélectionnée."""
-        self.stocks_list.clear()
-        texte = self.search_input.text().lower()
-        for key, (cat, nom) in self.produit_categorie_map.items():
-            if (categorie == "Toutes les catégories" or cat.lower() == categorie.lower()) and texte in nom.lower():
-                self.stocks_list.addItem(nom)
-
-    def rechercher_produits(self, texte):
-        """Recherche des produits en fonction du texte entré dans le champ de recherche."""
-        texte = texte.lower()
-        categorie = self.filtre_combo.currentText()
-        self.stocks_list.clear()
-        for key, (cat, nom) in self.produit_categorie_map.items():
-            if (categorie == "Toutes les catégories" or cat == categorie) and texte in nom.lower():
-                self.stocks_list.addItem(nom)
\ No newline at end of file
+    def appliquer_filtre(self, *_):
+        """Filtre les produits affichés selon la catégorie choisie et le texte recherché."""
+        self.stocks_list.apply_filter(self.search_input.text(), self.filtre_combo.currentText())
\ No newline at end of file